@@ -0,0 +1,60 @@
+"""Benchmarks the model layer and the REST API on synthetic data.
+
+    python bench.py --scale small --out results.json
+    python bench.py --scale medium --out after.json --compare results.json
+"""
+import argparse
+import sys
+import time
+
+from benchmarks import datagen, load, micro, report
+from src.app import create_app
+from src.model.agency import Agency
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", choices=sorted(datagen.SCALES), default="small",
+                        help="the size of the generated data")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--only", choices=("micro", "load"), help="run one of the two suites")
+    parser.add_argument("--filter", default="", help="only the benchmarks whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=5, help="timing rounds per microbenchmark")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--threads", type=int, default=1, help="clients sending the requests concurrently")
+    parser.add_argument("--no-cache", action="store_true", help="load test without the response cache")
+    parser.add_argument("--out", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="compare the results with those of an earlier run")
+    args = parser.parse_args(argv)
+
+    scale = datagen.SCALES[args.scale]
+    results = {"environment": report.environment(), "scale": dict(scale, name=args.scale, seed=args.seed)}
+
+    # the API serves the singleton agency, so the data goes there
+    agency = Agency.singleton_instance = Agency()
+    start = time.perf_counter()
+    results["data"] = datagen.populate(agency, seed=args.seed, **scale)
+    print(f"generated {results['data']} in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+
+    if args.only in (None, "micro"):
+        results["micro"] = micro.run(agency, repeat=args.repeat, only=args.filter)
+    if args.only in (None, "load"):
+        app = create_app()
+        if args.no_cache:
+            app.extensions["response_cache"].max_entries = 0
+        results["load"] = dict(load.run(app, agency, requests=args.requests, threads=args.threads,
+                                        only=args.filter),
+                               requests=args.requests, threads=args.threads, cache=not args.no_cache)
+
+    for line in report.summary(results):
+        print(line)
+    if args.out:
+        report.save(results, args.out)
+    if args.compare:
+        for line in report.compare(report.load(args.compare), results):
+            print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
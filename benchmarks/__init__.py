@@ -0,0 +1 @@
+"""Benchmarks of the model layer and the REST API; run them with bench.py."""
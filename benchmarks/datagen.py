@@ -0,0 +1,62 @@
+import random
+from typing import Any, Dict
+
+from src.model.agency import Agency
+from src.model.editor import Editor
+from src.model.issue import Issue
+from src.model.newspaper import Newspaper
+from src.model.subscriber import Subscriber
+
+# papers x issues per paper x subscribers, plus how many papers a subscriber
+# reads and the share of subscribers a released issue was delivered to
+SCALES: Dict[str, Dict[str, Any]] = {
+    "tiny": dict(papers=5, issues=5, subscribers=200, editors=5, subscriptions=2, delivered=0.8),
+    "small": dict(papers=20, issues=20, subscribers=5000, editors=20, subscriptions=3, delivered=0.8),
+    "medium": dict(papers=200, issues=50, subscribers=100000, editors=100, subscriptions=3, delivered=0.8),
+    "large": dict(papers=1000, issues=100, subscribers=1000000, editors=500, subscriptions=4, delivered=0.9),
+}
+
+FIRST_ID = 1000
+
+
+def populate(agency: Agency, papers: int, issues: int, subscribers: int, editors: int,
+             subscriptions: int, delivered: float, seed: int = 42) -> Dict[str, int]:
+    """Fill an agency with synthetic data through the model's own methods.
+
+    IDs are consecutive from FIRST_ID per kind (issue IDs are shared by all
+    papers). Every second issue is released and sent to a `delivered` share
+    of its paper's subscribers. The same seed gives the same data.
+    """
+    rng = random.Random(seed)
+    agency.add_editors([Editor(id=FIRST_ID + number, name=f"Editor {number}") for number in range(editors)])
+    agency.add_newspapers([Newspaper(paper_id=FIRST_ID + number, name=f"Paper {number}",
+                                     frequency=rng.choice((1, 7, 14, 30)), price=round(rng.uniform(1, 40), 2))
+                           for number in range(papers)])
+    agency.add_subscribers([Subscriber(id=FIRST_ID + number, name=f"Subscriber {number}")
+                            for number in range(subscribers)])
+
+    all_papers = list(agency.newspapers)
+    all_editors = list(agency.editors)
+    for subscriber in agency.subscribers:
+        for paper in rng.sample(all_papers, min(subscriptions, len(all_papers))):
+            subscriber.subscribe(paper)
+
+    issue_id = FIRST_ID
+    deliveries = 0
+    for paper in all_papers:
+        new_issues = []
+        for number in range(issues):
+            new_issues.append(Issue(name=f"Vol. {number}", id=issue_id,
+                                    releasedate=f"20{20 + number // 12 % 10}-{number % 12 + 1:02d}-{rng.randint(1, 28):02d}T06:00:00"))
+            issue_id += 1
+        paper.add_issues(new_issues)
+        audience = list(paper.subscribers)
+        for number, issue in enumerate(new_issues):
+            if all_editors:
+                issue.set_editor(rng.choice(all_editors))
+            if number % 2 == 0:
+                paper.release_issue(issue.id, releasedate=issue.releasedate)
+                recipients = rng.sample(audience, int(len(audience) * delivered))
+                deliveries += issue.send_issue_to_all(recipients)["sent"]
+    return {"papers": papers, "issues": issue_id - FIRST_ID, "subscribers": subscribers, "editors": editors,
+            "subscriptions": sum(len(paper.subscribers) for paper in all_papers), "deliveries": deliveries}
@@ -0,0 +1,246 @@
+import collections
+import itertools
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from flask import Flask
+
+from src.model.agency import Agency
+from src.model.editor import Editor
+from src.model.issue import Issue
+from src.model.newspaper import Newspaper
+from src.model.subscriber import Subscriber
+
+from .timing import percentiles
+
+# (URL, JSON body or None)
+Request = Tuple[str, Any]
+
+# routes of flask-restx itself
+_IGNORED_RULES = ("/", "/swagger.json", "/static/<path:filename>", "/swaggerui/<path:filename>")
+
+
+class Scenario(object):
+    """Load on one endpoint: `build(number)` returns the number-th request.
+
+    `setup`, if given, runs untimed before the requests, e.g. to create the
+    objects a DELETE scenario removes. `share` scales the number of requests
+    for endpoints that are expensive on purpose (exports, reconciliation).
+    """
+
+    def __init__(self, method: str, rule: str, build: Callable[[int], Request],
+                 setup: Optional[Callable[[int], None]] = None, share: float = 1.0, label: str = ""):
+        self.method = method
+        self.rule = rule
+        self.build = build
+        self.setup = setup
+        self.share = share
+        self.label = label
+
+    @property
+    def name(self) -> str:
+        # scenarios of the same endpoint differ by their label
+        name = f"{self.method} {self.rule}"
+        return f"{name} [{self.label}]" if self.label else name
+
+    def count(self, requests: int) -> int:
+        return max(1, int(requests * self.share))
+
+
+class _Ids(object):
+    # endless streams of the IDs in an agency, in a fixed random order
+    def __init__(self, ids: List[Any], seed: int):
+        ids = list(ids)
+        random.Random(seed).shuffle(ids)
+        self._next = itertools.cycle(ids).__next__ if ids else None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> Any:
+        with self._lock:
+            return self._next()
+
+
+def scenarios(agency: Agency, seed: int = 7) -> List[Scenario]:
+    """A scenario for every endpoint of the API, reads before writes.
+
+    Writes change throwaway objects where they would destroy the data of
+    later scenarios; e.g. DELETEs remove newspapers created in their setup.
+    """
+    papers = _Ids([paper.paper_id for paper in agency.newspapers], seed)
+    subscribers = _Ids([subscriber.id for subscriber in agency.subscribers], seed)
+    editors = _Ids([editor.id for editor in agency.editors], seed)
+    paper_issues = _Ids([(paper.paper_id, issue.id) for paper in agency.newspapers for issue in paper.issues], seed)
+    released = _Ids([(paper.paper_id, issue.id) for paper in agency.newspapers
+                     for issue in paper.issues if issue.released], seed)
+    throwaway: Dict[str, List[Any]] = collections.defaultdict(list)
+    job_ids: List[int] = []
+
+    def new_papers(count: int) -> None:
+        ids = agency.ids.next_ids("newspaper", count, agency.get_newspaper)
+        agency.add_newspapers([Newspaper(paper_id=paper_id, name="Throwaway", frequency=7, price=1.0)
+                               for paper_id in ids])
+        throwaway["papers"] = ids
+
+    def new_editors(count: int) -> None:
+        ids = agency.ids.next_ids("editor", count, agency.get_editor)
+        agency.add_editors([Editor(id=editor_id, name="Throwaway") for editor_id in ids])
+        throwaway["editors"] = ids
+
+    def new_subscribers(count: int) -> None:
+        ids = agency.ids.next_ids("subscriber", count, agency.get_subscriber)
+        agency.add_subscribers([Subscriber(id=subscriber_id, name="Throwaway") for subscriber_id in ids])
+        throwaway["subscribers"] = ids
+
+    def unreleased_issues(count: int) -> None:
+        paper = agency.get_newspaper(papers())
+        ids = agency.ids.next_ids("issue", count, paper.get_issue)
+        paper.add_issues([Issue(name="Throwaway", id=issue_id, releasedate="2030-01-01T06:00:00")
+                          for issue_id in ids])
+        throwaway["issues"] = [(paper.paper_id, issue_id) for issue_id in ids]
+
+    def finished_job(count: int) -> None:
+        job = agency.jobs.submit("benchmark", lambda progress: {})
+        while agency.jobs.get(job.id).status not in ("finished", "failed"):
+            time.sleep(0.001)
+        job_ids[:] = [job.id]
+
+    def paper_body(number: int) -> Dict[str, Any]:
+        return {"name": f"Bench paper {number}", "frequency": 7, "price": 9.5}
+
+    def issue_body(number: int) -> Dict[str, Any]:
+        return {"name": f"Bench issue {number}", "releasedate": "2030-01-01T06:00:00", "released": False}
+
+    def batch(body: Callable[[int], Dict[str, Any]], number: int) -> List[Dict[str, Any]]:
+        return [body(100 * number + offset) for offset in range(100)]
+
+    def name_body(number: int) -> Dict[str, Any]:
+        return {"name": f"Bench {number}"}
+
+    def issue_url(suffix: str = "") -> Callable[[int], Request]:
+        def build(number: int) -> Request:
+            paper_id, issue_id = paper_issues()
+            return f"/newspaper/{paper_id}/issue/{issue_id}{suffix}", None
+        return build
+
+    def deliver(number: int) -> Request:
+        paper_id, issue_id = released()
+        return f"/newspaper/{paper_id}/issue/{issue_id}/deliver?subscriber_id={subscribers()}", None
+
+    return [
+        # reads
+        Scenario("GET", "/newspaper/", lambda n: ("/newspaper/", None)),
+        Scenario("GET", "/newspaper/", lambda n: ("/newspaper/?price_max=20&sort=-price&limit=50", None),
+                 label="filtered"),
+        Scenario("GET", "/newspaper/export", lambda n: ("/newspaper/export", None), share=0.1),
+        Scenario("GET", "/newspaper/<int:paper_id>", lambda n: (f"/newspaper/{papers()}", None)),
+        Scenario("GET", "/newspaper/<int:paper_id>/issue", lambda n: (f"/newspaper/{papers()}/issue", None)),
+        Scenario("GET", "/newspaper/<int:paper_id>/issue",
+                 lambda n: (f"/newspaper/{papers()}/issue?released=true&sort=-releasedate&limit=20", None),
+                 label="filtered"),
+        Scenario("GET", "/newspaper/<int:paper_id>/issue/export",
+                 lambda n: (f"/newspaper/{papers()}/issue/export", None), share=0.1),
+        Scenario("GET", "/newspaper/<int:paper_id>/issue/<int:issue_id>", issue_url()),
+        Scenario("GET", "/newspaper/<int:paper_id>/subscribers",
+                 lambda n: (f"/newspaper/{papers()}/subscribers", None)),
+        Scenario("GET", "/editor/", lambda n: ("/editor/?limit=100", None)),
+        Scenario("GET", "/editor/<int:editor_id>", lambda n: (f"/editor/{editors()}", None)),
+        Scenario("GET", "/editor/<int:editor_id>/issues", lambda n: (f"/editor/{editors()}/issues?limit=100", None)),
+        Scenario("GET", "/subscriber/", lambda n: (f"/subscriber/?limit=100&after={subscribers()}", None)),
+        Scenario("GET", "/subscriber/export", lambda n: ("/subscriber/export", None), share=0.02),
+        Scenario("GET", "/subscriber/<int:subscriber_id>", lambda n: (f"/subscriber/{subscribers()}", None)),
+        Scenario("GET", "/subscriber/<int:subscriber_id>/stats",
+                 lambda n: (f"/subscriber/{subscribers()}/stats", None)),
+        Scenario("GET", "/subscriber/<int:subscriber_id>/missingissues",
+                 lambda n: (f"/subscriber/{subscribers()}/missingissues", None)),
+        Scenario("GET", "/reports/revenue", lambda n: ("/reports/revenue", None), share=0.1),
+        Scenario("GET", "/reports/subscribers", lambda n: ("/reports/subscribers", None), share=0.1),
+        Scenario("GET", "/reports/deliveries", lambda n: ("/reports/deliveries", None), share=0.1),
+        Scenario("GET", "/reports/editors", lambda n: ("/reports/editors", None), share=0.1),
+        Scenario("GET", "/jobs/<int:job_id>", lambda n: (f"/jobs/{job_ids[0]}", None), setup=finished_job),
+        # writes
+        Scenario("POST", "/newspaper/", lambda n: ("/newspaper/", paper_body(n))),
+        Scenario("POST", "/newspaper/bulk", lambda n: ("/newspaper/bulk", batch(paper_body, n)), share=0.1),
+        Scenario("POST", "/newspaper/<int:paper_id>", lambda n: (f"/newspaper/{papers()}", paper_body(n))),
+        Scenario("POST", "/newspaper/<int:paper_id>/issue",
+                 lambda n: (f"/newspaper/{papers()}/issue", issue_body(n))),
+        Scenario("POST", "/newspaper/<int:paper_id>/issue/bulk",
+                 lambda n: (f"/newspaper/{papers()}/issue/bulk", batch(issue_body, n)), share=0.1),
+        Scenario("POST", "/newspaper/<int:paper_id>/issue/<int:issue_id>/release",
+                 lambda n: ("/newspaper/{}/issue/{}/release".format(*throwaway["issues"][n]), None),
+                 setup=unreleased_issues),
+        Scenario("POST", "/newspaper/<int:paper_id>/issue/<int:issue_id>/editor",
+                 lambda n: (issue_url("/editor")(n)[0] + f"?editor_id={editors()}", None)),
+        Scenario("POST", "/newspaper/<int:paper_id>/issue/<int:issue_id>/deliver", deliver),
+        Scenario("POST", "/editor/", lambda n: ("/editor/", name_body(n))),
+        Scenario("POST", "/editor/bulk", lambda n: ("/editor/bulk", batch(name_body, n)), share=0.1),
+        Scenario("POST", "/editor/<int:editor_id>", lambda n: (f"/editor/{editors()}", name_body(n))),
+        Scenario("POST", "/subscriber/", lambda n: ("/subscriber/", name_body(n))),
+        Scenario("POST", "/subscriber/bulk", lambda n: ("/subscriber/bulk", batch(name_body, n)), share=0.1),
+        Scenario("POST", "/subscriber/<int:subscriber_id>",
+                 lambda n: (f"/subscriber/{subscribers()}", name_body(n))),
+        Scenario("POST", "/subscriber/<int:subscriber_id>/subscribe",
+                 lambda n: (f"/subscriber/{subscribers()}/subscribe?paper_id={papers()}", None)),
+        Scenario("POST", "/subscriber/missingissues", lambda n: ("/subscriber/missingissues", None), share=0.01),
+        # deletes of throwaway objects
+        Scenario("DELETE", "/newspaper/<int:paper_id>",
+                 lambda n: (f"/newspaper/{throwaway['papers'][n]}", None), setup=new_papers),
+        Scenario("DELETE", "/editor/<int:editor_id>",
+                 lambda n: (f"/editor/{throwaway['editors'][n]}", None), setup=new_editors),
+        Scenario("DELETE", "/subscriber/<int:subscriber_id>",
+                 lambda n: (f"/subscriber/{throwaway['subscribers'][n]}", None), setup=new_subscribers),
+    ]
+
+
+def endpoints(app: Flask) -> Set[str]:
+    """Every "METHOD rule" the application serves, without the docs."""
+    return {f"{method} {rule.rule}" for rule in app.url_map.iter_rules() if rule.rule not in _IGNORED_RULES
+            for method in rule.methods - {"HEAD", "OPTIONS"}}
+
+
+def run_scenario(app: Flask, scenario: Scenario, requests: int, threads: int = 1) -> Dict[str, Any]:
+    count = scenario.count(requests)
+    if scenario.setup is not None:
+        scenario.setup(count)
+    built = [scenario.build(number) for number in range(count)]
+    latencies: List[float] = [0.0] * count
+    statuses: collections.Counter = collections.Counter()
+    statuses_lock = threading.Lock()
+
+    def worker(offset: int) -> None:
+        client = app.test_client()
+        send = getattr(client, scenario.method.lower())
+        for number in range(offset, count, threads):
+            url, body = built[number]
+            start = time.perf_counter()
+            response = send(url, json=body) if body is not None else send(url)
+            data = response.get_data()
+            latencies[number] = time.perf_counter() - start
+            # lookups of missing objects answer 200 with a message
+            status = "not found" if data.startswith(b'"') and b"was not found" in data else str(response.status_code)
+            with statuses_lock:
+                statuses[status] += 1
+
+    start = time.perf_counter()
+    if threads == 1:
+        worker(0)
+    else:
+        with ThreadPoolExecutor(threads) as pool:
+            list(pool.map(worker, range(threads)))
+    elapsed = time.perf_counter() - start
+    return dict(percentiles(latencies), requests=count, requests_per_s=count / elapsed,
+                statuses=dict(sorted(statuses.items())))
+
+
+def run(app: Flask, agency: Agency, requests: int = 200, threads: int = 1, only: str = "") -> Dict[str, Any]:
+    """Sends every scenario's requests through the Flask test client and
+    lists the endpoints no scenario covers."""
+    results = {}
+    covered = set()
+    for scenario in scenarios(agency):
+        covered.add(f"{scenario.method} {scenario.rule}")
+        if only in scenario.name:
+            results[scenario.name] = run_scenario(app, scenario, requests, threads)
+    return {"endpoints": results, "uncovered": sorted(endpoints(app) - covered)}
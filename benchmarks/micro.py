@@ -0,0 +1,91 @@
+import itertools
+import json
+import random
+from typing import Any, Callable, Dict, List, Tuple
+
+from flask_restx import marshal
+
+from src.api.newspaperNS import issue_get_model, issue_serializer, paper_get_model, paper_serializer
+from src.model.agency import Agency
+from src.model.query import Query
+
+from .timing import time_calls
+
+Benchmark = Tuple[str, Callable[[], object]]
+
+
+def _cycle(items: List[Any], seed: int = 7) -> Callable[[], Any]:
+    # the items in a fixed random order, over and over
+    items = list(items)
+    random.Random(seed).shuffle(items)
+    return itertools.cycle(items).__next__
+
+
+def benchmarks(agency: Agency) -> List[Benchmark]:
+    """The model operations timed by run(), on a populated agency."""
+    paper_ids = _cycle([paper.paper_id for paper in agency.newspapers])
+    subscriber_ids = _cycle([subscriber.id for subscriber in agency.subscribers])
+    subscribers = _cycle(list(agency.subscribers))
+    released = _cycle([issue for paper in agency.newspapers for issue in paper.issues if issue.released])
+    papers = list(agency.newspapers)[:1000]
+    issues = list(max((paper.issues for paper in agency.newspapers), key=len, default=[]))
+    middle_price = sorted(paper.price for paper in papers)[len(papers) // 2] if papers else 0
+    # subscribers that already received every released issue, so that
+    # deliver_missing_issues() finds nothing to send from the first call on
+    settled = list(agency.subscribers)[:200]
+    for subscriber in settled:
+        subscriber.deliver_missing_issues()
+    settled = _cycle(settled)
+
+    def subscribe_and_unsubscribe():
+        # to a paper the subscriber does not take yet, so that both calls do something
+        subscriber = subscribers()
+        for _ in range(len(agency.newspapers)):
+            paper = agency.get_newspaper(paper_ids())
+            if paper not in subscriber.subscribed_newspapers:
+                subscriber.subscribe(paper)
+                subscriber.unsubscribe(paper)
+                return
+
+    def delivered():
+        issue = released()
+        return issue.deliveries.delivered(issue.id, subscriber_ids())
+
+    def undelivered():
+        issue = released()
+        return issue.deliveries.undelivered(issue.id, [subscriber.id for subscriber in issue.newspaper.subscribers])
+
+    return [
+        ("agency.get_newspaper", lambda: agency.get_newspaper(paper_ids())),
+        ("agency.get_subscriber", lambda: agency.get_subscriber(subscriber_ids())),
+        ("subscribers.page(limit=100)", lambda: agency.subscribers.page(after=subscriber_ids(), limit=100)),
+        ("query price range sorted by price (limit=100)",
+         lambda: Query(agency.newspapers).where("price", None, middle_price).order_by("price").page(limit=100)),
+        ("query released issues by date (limit=100)",
+         lambda: Query(agency.newspapers.get(paper_ids()).issues).equals("released", True)
+         .order_by("releasedate", descending=True).page(limit=100)),
+        ("subscriber.monthly_cost", lambda: subscribers().monthly_cost),
+        ("subscriber.create_stats", lambda: subscribers().create_stats()),
+        ("subscriber.deliver_missing_issues (nothing missing)", lambda: settled().deliver_missing_issues()),
+        ("subscriber.subscribe + unsubscribe", subscribe_and_unsubscribe),
+        ("ledger.delivered", delivered),
+        ("ledger.undelivered (all subscribers of a paper)", undelivered),
+        ("analytics.revenue_per_paper", lambda: agency.analytics.revenue_per_paper()),
+        ("analytics.issues_per_editor", lambda: agency.analytics.issues_per_editor()),
+        (f"serializer.dumps ({len(papers)} papers)", lambda: paper_serializer.dumps(papers)),
+        (f"marshal + json ({len(papers)} papers)", lambda: _marshal_dumps(papers, paper_get_model)),
+        (f"serializer.dumps ({len(issues)} issues)", lambda: issue_serializer.dumps(issues)),
+        (f"marshal + json ({len(issues)} issues)", lambda: _marshal_dumps(issues, issue_get_model)),
+    ]
+
+
+def _marshal_dumps(items, model) -> str:
+    return json.dumps(marshal(items, model))
+
+
+def run(agency: Agency, repeat: int = 5, only: str = "") -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, function in benchmarks(agency):
+        if only in name:
+            results[name] = time_calls(function, repeat=repeat)
+    return results
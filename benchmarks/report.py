@@ -0,0 +1,64 @@
+import datetime
+import json
+import platform
+import subprocess
+from typing import Any, Dict, Iterator, Optional
+
+# the figure runs are compared by, per section; lower is better
+_COMPARED = {"micro": "median_ns", "load": "p50_ms"}
+
+
+def environment() -> Dict[str, Any]:
+    return {"time": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(), "platform": platform.platform(),
+            "processor": platform.processor() or platform.machine(), "commit": _commit()}
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save(results: Dict[str, Any], path: str) -> None:
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2, sort_keys=True)
+
+
+def load(path: str) -> Dict[str, Any]:
+    with open(path) as file:
+        return json.load(file)
+
+
+def _rows(results: Dict[str, Any], section: str) -> Dict[str, Dict[str, Any]]:
+    rows = results.get(section) or {}
+    return rows.get("endpoints", {}) if section == "load" else rows
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any]) -> Iterator[str]:
+    """Lines comparing the benchmarks both runs measured, slowest change first
+    within each section; a ratio above 1 means the current run is slower."""
+    if baseline.get("scale") != current.get("scale"):
+        yield f"warning: the runs used different data, {baseline.get('scale')} and {current.get('scale')}"
+    for section, figure in _COMPARED.items():
+        before, after = _rows(baseline, section), _rows(current, section)
+        common = [name for name in after if name in before and before[name].get(figure)]
+        if not common:
+            continue
+        yield f"{section} ({figure}: baseline -> current)"
+        ratios = {name: after[name][figure] / before[name][figure] for name in common}
+        for name in sorted(common, key=ratios.get, reverse=True):
+            yield f"  {ratios[name]:6.2f}x  {before[name][figure]:12.1f} -> {after[name][figure]:12.1f}  {name}"
+
+
+def summary(results: Dict[str, Any]) -> Iterator[str]:
+    for name, timing in (results.get("micro") or {}).items():
+        yield f"{timing['median_ns'] / 1000:10.1f} us  {name}"
+    load_results = results.get("load") or {}
+    for name, timing in load_results.get("endpoints", {}).items():
+        yield (f"p50 {timing['p50_ms']:8.2f} ms  p99 {timing['p99_ms']:8.2f} ms  "
+               f"{timing['requests_per_s']:8.0f}/s  {name}  {timing['statuses']}")
+    for endpoint in load_results.get("uncovered", []):
+        yield f"not load tested: {endpoint}"
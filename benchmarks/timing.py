@@ -0,0 +1,37 @@
+import statistics
+import time
+from typing import Callable, Dict, List
+
+
+def time_calls(function: Callable[[], object], repeat: int = 5, min_time: float = 0.05) -> Dict[str, float]:
+    """Time a function like timeit: the number of calls per round is raised
+    until a round takes `min_time`, then `repeat` rounds are measured.
+    Reports nanoseconds per call."""
+    number = 1
+    while True:
+        elapsed = _round(function, number)
+        if elapsed >= min_time or number >= 1 << 20:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    rounds = [elapsed] + [_round(function, number) for _ in range(repeat - 1)]
+    per_call = sorted(1e9 * elapsed / number for elapsed in rounds)
+    return {"calls": number, "median_ns": statistics.median(per_call), "min_ns": per_call[0], "max_ns": per_call[-1]}
+
+
+def _round(function: Callable[[], object], number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        function()
+    return time.perf_counter() - start
+
+
+def percentiles(latencies: List[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds of a list of durations in seconds."""
+    ordered = sorted(latencies)
+    if not ordered:
+        return {}
+
+    def at(share: float) -> float:
+        return 1000 * ordered[min(int(share * len(ordered)), len(ordered) - 1)]
+    return {"p50_ms": at(0.5), "p90_ms": at(0.9), "p99_ms": at(0.99), "max_ms": 1000 * ordered[-1],
+            "mean_ms": 1000 * statistics.fmean(ordered)}
@@ -0,0 +1,166 @@
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from flask import request
+from flask_restx import Model, abort, fields
+from flask_restx.fields import MarshallingError
+from jsonschema import Draft4Validator, FormatChecker
+
+BULK_CHUNK_SIZE = 10000
+_READ_SIZE = 1 << 16
+
+# JSON schema types that can be checked with isinstance; bool is an int in
+# Python but not in JSON
+_TYPES = {"string": (str,), "integer": (int,), "number": (int, float), "boolean": (bool,)}
+
+# the formats an item is checked for; a date-time has to be one that the
+# responses can render again
+_FORMATS = FormatChecker()
+_DATE_TIME = fields.DateTime()
+
+
+@_FORMATS.checks("date-time", raises=MarshallingError)
+def _is_date_time(value: Any) -> bool:
+    return not isinstance(value, str) or _DATE_TIME.format(value) is not None
+
+
+# create(payloads) inserts new entities in one go and returns their IDs;
+# update(entity_id, payload) changes an existing one
+Create = Callable[[List[Dict[str, Any]]], List[int]]
+Update = Callable[[int, Dict[str, Any]], None]
+
+
+class _Unreadable(object):
+    # an NDJSON line that is not valid JSON
+    def __init__(self, error: str):
+        self.error = error
+
+
+def read_items() -> Iterator[Any]:
+    """The items of a bulk request body.
+
+    The body is either a JSON array or, with Content-Type
+    application/x-ndjson, one JSON object per line, which is read as a
+    stream and never held in memory as a whole.
+    """
+    if request.mimetype == "application/x-ndjson":
+        rest = b""
+        while True:
+            chunk = request.stream.read(_READ_SIZE)
+            lines = (rest + chunk).split(b"\n")
+            rest = lines.pop() if chunk else b""
+            for line in lines:
+                if line.strip():
+                    try:
+                        yield json.loads(line)
+                    except ValueError as error:
+                        yield _Unreadable(str(error))
+            if not chunk:
+                return
+    payload = request.get_json(silent=True)
+    if not isinstance(payload, list):
+        abort(400, "Expected a JSON array or an application/x-ndjson stream")
+    yield from payload
+
+
+class BulkLoader(object):
+    """Validates and applies the items of a bulk request.
+
+    Every item is validated against the model of the single-item endpoint.
+    Items without `id_key` are created in chunks, each with one block of
+    IDs and one insertion into the agency; items with it update the
+    existing entity if `update` is given. The result lists the outcome of
+    every item, in request order.
+    """
+
+    def __init__(self, model: Model, id_key: str, chunk_size: int = BULK_CHUNK_SIZE):
+        self.model = model
+        self.id_key = id_key
+        self.chunk_size = chunk_size
+        self._validator = Draft4Validator(model.__schema__, format_checker=_FORMATS)
+        self._checks = self._type_checks(model.__schema__)
+
+    @staticmethod
+    def _type_checks(schema: Dict[str, Any]) -> Optional[List[Tuple[str, tuple, bool]]]:
+        # (name, types, required) if the schema only constrains the types
+        # of flat properties; None otherwise, e.g. if it has formats
+        checks = []
+        for name, prop in schema.get("properties", {}).items():
+            if prop.get("type") not in _TYPES or set(prop) - {"type", "description", "readOnly", "example"}:
+                return None
+            checks.append((name, _TYPES[prop["type"]], name in schema.get("required", ())))
+        return checks
+
+    def _valid(self, item: Any) -> bool:
+        # cheap check for the common case; jsonschema explains the rest
+        if self._checks is None or type(item) is not dict:
+            return False
+        for name, types, required in self._checks:
+            value = item.get(name)
+            if value is None:
+                if required or name in item:
+                    return False
+            elif not isinstance(value, types) or (isinstance(value, bool) and bool not in types):
+                return False
+        return True
+
+    def _errors(self, item: Any) -> Optional[Dict[str, str]]:
+        if isinstance(item, _Unreadable):
+            return {"": item.error}
+        if self._valid(item):
+            errors = {}
+        else:
+            errors = dict(self.model.format_error(error) for error in self._validator.iter_errors(item))
+        if not errors and self.id_key in item and type(item[self.id_key]) is not int:
+            errors[self.id_key] = f"{item[self.id_key]!r} is not of type 'integer'"
+        return errors or None
+
+    def load(self, items: Iterator[Any], create: Create, update: Optional[Update] = None) -> Dict[str, Any]:
+        results: List[Dict[str, Any]] = []
+        pending: List[Tuple[int, Dict[str, Any]]] = []
+
+        def create_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> None:
+            try:
+                ids = create([payload for _, payload in chunk])
+            except ValueError as error:
+                if len(chunk) == 1:
+                    results.append({"index": chunk[0][0], "status": "failed", "error": str(error)})
+                    return
+                # a chunk is created all or nothing, so find the items at
+                # fault by creating them one by one
+                for item in chunk:
+                    create_chunk([item])
+            else:
+                results.extend({"index": index, "status": "created", "id": new_id}
+                               for (index, _), new_id in zip(chunk, ids))
+
+        def flush() -> None:
+            if pending:
+                create_chunk(pending)
+                pending.clear()
+
+        for index, item in enumerate(items):
+            errors = self._errors(item)
+            if errors is not None:
+                results.append({"index": index, "status": "failed", "error": "Validation failed", "errors": errors})
+            elif self.id_key not in item:
+                pending.append((index, item))
+                if len(pending) >= self.chunk_size:
+                    flush()
+            elif update is None:
+                results.append({"index": index, "status": "failed",
+                                "error": f"{self.id_key} must not be given, IDs are assigned by the agency"})
+            else:
+                try:
+                    update(item[self.id_key], item)
+                except (LookupError, ValueError) as error:
+                    results.append({"index": index, "status": "failed", "error": str(error.args[0])})
+                else:
+                    results.append({"index": index, "status": "updated", "id": item[self.id_key]})
+        flush()
+
+        results.sort(key=lambda result: result["index"])
+        summary = {status: 0 for status in ("created", "updated", "failed")}
+        for result in results:
+            summary[result["status"]] += 1
+        return dict(summary, results=results)
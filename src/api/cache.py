@@ -0,0 +1,200 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+from ..model.events import ALL_EVENTS, EventBus
+
+
+def cached(*tags: str) -> Callable:
+    """Mark a Resource's get() as cacheable.
+
+    The tags name what the response depends on and may use the URL
+    parameters, e.g. "newspaper:{paper_id}". A model event invalidates
+    every cached response carrying one of the tags it touches.
+    """
+    def decorate(function: Callable) -> Callable:
+        function.cache_tags = tags
+        return function
+    return decorate
+
+
+def tags_of(event: str, payload: Dict[str, Any]) -> List[str]:
+    """The cache tags a model event invalidates."""
+    if event in ("newspaper_added", "newspaper_updated", "newspaper_removed"):
+        paper_id = payload["paper"].paper_id
+        return ["newspapers", f"newspaper:{paper_id}", f"issues:{paper_id}"]
+    if event == "issue_added":
+        return [f"issues:{payload['issue'].newspaper.paper_id}"]
+    if event == "issue_released":
+        issue = payload["issue"]
+        tags = [f"issues:{issue.newspaper.paper_id}"]
+        if issue.editor_id is not None:
+            tags.append(f"editor:{issue.editor_id}")
+        return tags
+    if event == "editor_assigned":
+        # the issue lists of its paper can be filtered by editor
+        return [f"editor:{payload['editor'].id}", f"issues:{payload['issue'].newspaper.paper_id}"]
+    if event in ("editor_added", "editor_updated", "editor_removed"):
+        return ["editors", f"editor:{payload['editor'].id}"]
+    if event in ("subscriber_added", "subscriber_updated", "subscriber_removed"):
+        return ["subscribers", f"subscriber:{payload['subscriber'].id}"]
+    return []
+
+
+class _Entry(object):
+    __slots__ = ("body", "mimetype", "headers", "etag", "tags")
+
+    def __init__(self, body: bytes, mimetype: str, headers: List[Tuple[str, str]], etag: str, tags: Tuple[str, ...]):
+        self.body = body
+        self.mimetype = mimetype
+        self.headers = headers
+        self.etag = etag
+        self.tags = tags
+
+
+class ResponseCache(object):
+    """LRU cache of the bodies of GET responses, with ETags.
+
+    Only the get() methods marked with @cached are cached, keyed by the
+    full path and query string. Entries are dropped when a model event
+    touches one of their tags, or when the cache outgrows `max_entries`
+    or `max_bytes`. Cached and freshly rendered responses carry an ETag,
+    and requests with a matching If-None-Match get 304 Not Modified.
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._size = 0
+        # bumped by every invalidation; a response is only stored if none
+        # of its tags was invalidated while it was rendered
+        self._version = 0
+        self._invalidated_at: Dict[str, int] = {}
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["response_cache"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        # the bus only holds the cache weakly, so it goes away with its app
+        EventBus.get_instance().subscribe(ALL_EVENTS, self._on_event, weak=True)
+
+    def close(self) -> None:
+        EventBus.get_instance().unsubscribe(ALL_EVENTS, self._on_event)
+
+    # -- invalidation ------------------------------------------------------
+
+    def _on_event(self, event: str, payload: Dict[str, Any]) -> None:
+        if event == "agency_restored":
+            self.clear()
+        else:
+            self.invalidate(tags_of(event, payload))
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        tags = list(tags)
+        if not tags:
+            return
+        with self._lock:
+            self._version += 1
+            if len(self._invalidated_at) > 100000:
+                # forget old invalidations; responses in flight are then
+                # simply not stored
+                self._invalidated_at = {"": self._version}
+            for tag in tags:
+                self._invalidated_at[tag] = self._version
+                for key in self._by_tag.pop(tag, ()):
+                    self._drop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._invalidated_at.clear()
+            # everything rendered before now is stale
+            self._invalidated_at[""] = self._version
+            self._entries.clear()
+            self._by_tag.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        # the number of cached responses
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self._size -= len(entry.body)
+        for tag in entry.tags:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    # -- request hooks -----------------------------------------------------
+
+    def _tags_for_request(self) -> Optional[Tuple[str, ...]]:
+        if request.method != "GET" or request.url_rule is None:
+            return None
+        view_class = getattr(current_app.view_functions.get(request.url_rule.endpoint), "view_class", None)
+        tags = getattr(getattr(view_class, "get", None), "cache_tags", None)
+        if tags is None:
+            return None
+        return tuple(tag.format(**(request.view_args or {})) for tag in tags)
+
+    @staticmethod
+    def _key() -> str:
+        # responses differ by field mask too
+        mask = request.headers.get(current_app.config.get("RESTX_MASK_HEADER", "X-Fields"))
+        return request.full_path if mask is None else f"{request.full_path}#{mask}"
+
+    def _before_request(self) -> Optional[Response]:
+        tags = self._tags_for_request()
+        if tags is None:
+            return None
+        key = self._key()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+                g.response_cache = (key, tags, self._version)
+        if entry is None:
+            return None
+        response = Response(entry.body, mimetype=entry.mimetype, headers=entry.headers)
+        response.set_etag(entry.etag)
+        g.response_cache_hit = True
+        return response.make_conditional(request)
+
+    def _after_request(self, response: Response) -> Response:
+        if g.pop("response_cache_hit", False):
+            return response
+        pending = g.pop("response_cache", None)
+        if pending is None or response.status_code != 200 or response.is_streamed:
+            return response
+        key, tags, version = pending
+        body = response.get_data()
+        etag = hashlib.blake2b(body, digest_size=16).hexdigest()
+        response.set_etag(etag)
+        with self._lock:
+            stale = any(self._invalidated_at.get(tag, 0) > version for tag in tags + ("",))
+            if not stale and len(body) <= self.max_bytes:
+                self._drop(key)
+                headers = [(name, value) for name, value in response.headers.items()
+                           if name.lower() not in ("content-length", "content-type", "etag")]
+                self._entries[key] = _Entry(body, response.mimetype, headers, etag, tags)
+                self._size += len(body)
+                for tag in tags:
+                    self._by_tag.setdefault(tag, set()).add(key)
+                while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                    self._drop(next(iter(self._entries)))
+        return response.make_conditional(request)
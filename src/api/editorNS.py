@@ -5,10 +5,14 @@ from ..model.agency import Agency
 from ..model.newspaper import Newspaper
 from ..model.issue import Issue
 from ..model.editor import Editor
+from .bulk import BulkLoader, read_items
+from .cache import cached
+from .filters import issue_query, issue_query_parser
+from .pagination import pagination_parser, paginate, paginate_query
+from .serializer import serializer_for
 
 from typing import List, Union, Optional
 
-import random
 
 editor_ns = Namespace("editor", description = "Editor related operations")
 
@@ -41,23 +45,25 @@ editor_get_model = editor_ns.model("EditorGetModel", {
                           help = "The name of the editor")
 })
 
+editor_serializer = serializer_for(editor_get_model)
+issue_serializer = serializer_for(issue_get_model)
+
 
 @editor_ns.route("/")
 class EditorAPI(Resource):
-    _editors_unique_ids = set()
-
-    @classmethod
-    def _creating_id(cls):
-        while True:
-            new_id = random.randint(10000000, 99999999)
-            if new_id not in cls._editors_unique_ids:
-                cls._editors_unique_ids.add(new_id)
-                return new_id
+
+    @staticmethod
+    def _creating_id():
+        agency = Agency.get_instance()
+        return agency.ids.next_id("editor", agency.get_editor)
     
-    @editor_ns.doc(description = "Get a list of all editors")
-    @editor_ns.marshal_list_with(editor_get_model, envelope = "editor")
+    @cached("editors")
+    @editor_ns.doc(description = "Get a list of all editors. Pass limit and/or after to get a single page")
+    @editor_ns.expect(pagination_parser)
+    @editor_serializer.marshal_with(as_list=True, envelope="editor")
     def get(self):
-        return Agency.get_instance().get_editors()
+        editors, headers = paginate(Agency.get_instance().editors, pagination_parser.parse_args())
+        return editors, 200, headers
     
 
     @editor_ns.doc(editor_post_model, description="Add a new editor")
@@ -69,21 +75,46 @@ class EditorAPI(Resource):
 
         return editor_ns.marshal(new_editor, editor_get_model)
     
+@editor_ns.route("/bulk")
+class EditorBulk(Resource):
+
+    @staticmethod
+    def _create(payloads):
+        agency = Agency.get_instance()
+        editor_ids = agency.ids.next_ids("editor", len(payloads), agency.get_editor)
+        agency.add_editors([Editor(id=editor_id, name=payload["name"])
+                            for editor_id, payload in zip(editor_ids, payloads)])
+        return editor_ids
+
+    @staticmethod
+    def _update(editor_id, payload):
+        targeted_editor = Agency.get_instance().get_editor(editor_id)
+        if not targeted_editor:
+            raise LookupError(f"Editor with ID {editor_id} was not found")
+        targeted_editor.update(name=payload["name"])
+
+    @editor_ns.doc(description = "Create editors from a JSON array or an NDJSON stream; items with an id "
+                                 "update that editor. Returns the outcome of every item")
+    @editor_ns.expect([editor_post_model])
+    def post(self):
+        return BulkLoader(editor_post_model, "id").load(read_items(), self._create, self._update)
+
 @editor_ns.route("/<int:editor_id>")
 class EditorID(Resource):
+    @cached("editor:{editor_id}")
     @editor_ns.doc(description = "Get an editor's information")
     def get(self, editor_id):
         targeted_editor = Agency.get_instance().get_editor(editor_id)
         if not targeted_editor:
             return jsonify(f"Editor with ID {editor_id} was not found")
-        return editor_ns.marshal(targeted_editor, editor_get_model)
+        return editor_serializer.response(targeted_editor)
     @editor_ns.doc(description = "Update an editor's information")
     @editor_ns.expect(editor_post_model, validate = True)
     def post(self, editor_id):
         targeted_editor = Agency.get_instance().get_editor(editor_id)
         if not targeted_editor:
             return jsonify(f"Editor with ID {editor_id} was not found")
-        targeted_editor.name = editor_ns.payload["name"]
+        targeted_editor.update(name=editor_ns.payload["name"])
         return editor_ns.marshal(targeted_editor, editor_get_model)
     @editor_ns.doc(description = "Delete an editor")
     def delete(self, editor_id):
@@ -95,10 +126,14 @@ class EditorID(Resource):
     
 @editor_ns.route("/<int:editor_id>/issues")
 class EditorIssues(Resource):
-    @editor_ns.doc(description = "Return a list of newapaper issues that the editor was responsible for")
-    
+    @cached("editor:{editor_id}")
+    @editor_ns.doc(description = "Return a list of newapaper issues that the editor was responsible for, optionally "
+                                 "filtered by release state and date and sorted. Pass limit and/or after to get a single page")
+    @editor_ns.expect(issue_query_parser)
     def get(self, editor_id) -> List[Issue]:
+        args = issue_query_parser.parse_args()
         targeted_editor = Agency.get_instance().get_editor(editor_id)
         if not targeted_editor:
             return jsonify(f"Editor with ID {editor_id} was not found")
-        return editor_ns.marshal(targeted_editor.get_issues(), issue_get_model)
\ No newline at end of file
+        issues, headers = paginate_query(issue_query(targeted_editor.work_on_issues, args), args)
+        return issue_serializer.response(issues, headers=headers)
\ No newline at end of file
@@ -0,0 +1,26 @@
+from flask import Response
+
+from ..model.registry import Registry
+from .serializer import serializer_for
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def export_ndjson(registry: Registry, model, chunk_size: int = EXPORT_CHUNK_SIZE) -> Response:
+    """Stream a registry as newline-delimited JSON, one record per line.
+
+    Records are read and encoded one page at a time (ordered by ID), so
+    the memory used by an export does not grow with the collection.
+    """
+    serializer = serializer_for(model)
+
+    def generate():
+        after = None
+        while True:
+            items, after = registry.page(after=after, limit=chunk_size)
+            if items:
+                yield "".join(serializer.encode(item) + "\n" for item in items)
+            if after is None:
+                break
+
+    return Response(generate(), mimetype="application/x-ndjson")
@@ -0,0 +1,76 @@
+import datetime
+from typing import List, Optional
+
+from flask_restx import abort, inputs
+
+from ..model.dates import date_value
+from ..model.query import Query
+from .pagination import pagination_parser
+
+
+def sort_choices(*attributes: str) -> List[str]:
+    # "price" sorts ascending, "-price" descending
+    return [choice for attribute in attributes for choice in (attribute, "-" + attribute)]
+
+
+def order(query: Query, sort: Optional[str]) -> Query:
+    if sort:
+        query.order_by(sort.lstrip("-"), descending=sort.startswith("-"))
+    return query
+
+
+def where_dates(query: Query, attribute: str, start: Optional[str], end: Optional[str]) -> Query:
+    # both ends are inclusive; an end without a time covers that whole day
+    low, high = _date(start), _date(end)
+    if high is not None and "T" not in end and " " not in end.strip():
+        return query.where(attribute, low, high + datetime.timedelta(days=1), high_inclusive=False)
+    return query.where(attribute, low, high)
+
+
+def _date(value: Optional[str]) -> Optional[datetime.datetime]:
+    if value is None:
+        return None
+    parsed = date_value(value)
+    if parsed is None:
+        abort(400, f"{value!r} is not an ISO 8601 date")
+    return parsed
+
+
+newspaper_query_parser = pagination_parser.copy()
+newspaper_query_parser.add_argument("price_min", type=float, location="args",
+                                    help="Only newspapers with at least this monthly price")
+newspaper_query_parser.add_argument("price_max", type=float, location="args",
+                                    help="Only newspapers with at most this monthly price")
+newspaper_query_parser.add_argument("frequency_min", type=int, location="args",
+                                    help="Only newspapers published at most this often (in days)")
+newspaper_query_parser.add_argument("frequency_max", type=int, location="args",
+                                    help="Only newspapers published at least this often (in days)")
+newspaper_query_parser.add_argument("sort", choices=sort_choices("price", "frequency"), location="args",
+                                    help="Sort by this attribute, descending with a leading -")
+
+issue_query_parser = pagination_parser.copy()
+issue_query_parser.add_argument("released", type=inputs.boolean, location="args",
+                                help="Only released (true) or unreleased (false) issues")
+issue_query_parser.add_argument("releasedate_from", type=str, location="args",
+                                help="Only issues released on or after this date")
+issue_query_parser.add_argument("releasedate_to", type=str, location="args",
+                                help="Only issues released on or before this date")
+issue_query_parser.add_argument("editor_id", type=int, location="args",
+                                help="Only issues of this editor")
+issue_query_parser.add_argument("sort", choices=sort_choices("releasedate", "editor_id"), location="args",
+                                help="Sort by this attribute, descending with a leading -")
+
+
+def newspaper_query(newspapers, args) -> Query:
+    query = Query(newspapers).where("price", args.get("price_min"), args.get("price_max"))
+    query.where("frequency", args.get("frequency_min"), args.get("frequency_max"))
+    return order(query, args.get("sort"))
+
+
+def issue_query(issues, args) -> Query:
+    query = where_dates(Query(issues), "releasedate", args.get("releasedate_from"), args.get("releasedate_to"))
+    if args.get("released") is not None:
+        query.equals("released", args["released"])
+    if args.get("editor_id") is not None:
+        query.equals("editor_id", args["editor_id"])
+    return order(query, args.get("sort"))
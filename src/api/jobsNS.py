@@ -0,0 +1,29 @@
+from flask import jsonify
+from flask_restx import Namespace, Resource, fields
+
+from ..model.agency import Agency
+
+
+jobs_ns = Namespace("jobs", description = "Background job related operations")
+
+job_get_model = jobs_ns.model("JobGetModel", {
+    "id": fields.Integer(help = "The unique identifier of the job"),
+    "kind": fields.String(help = "The operation the job runs, e.g. deliver"),
+    "status": fields.String(help = "queued, running, finished or failed"),
+    "progress": fields.Raw(help = "The running totals of the operation"),
+    "result": fields.Raw(help = "The result of the operation once it finished"),
+    "error": fields.String(help = "The reason a job failed"),
+    "created": fields.String(help = "When the job was submitted"),
+    "started": fields.String(help = "When the job started running"),
+    "finished": fields.String(help = "When the job finished or failed")
+})
+
+
+@jobs_ns.route("/<int:job_id>")
+class JobID(Resource):
+    @jobs_ns.doc(description = "Get the status, progress and result of a background job")
+    def get(self, job_id):
+        job = Agency.get_instance().jobs.get(job_id)
+        if not job:
+            return jsonify(f"Job with ID {job_id} was not found")
+        return jobs_ns.marshal(job.to_dict(), job_get_model)
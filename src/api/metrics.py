@@ -0,0 +1,274 @@
+import cProfile
+import functools
+import io
+import pstats
+import random
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterator, Optional, Tuple
+
+from flask import Flask, Response, g, request
+
+from ..model.agency import Agency
+from ..model.issue import Issue
+from ..model.newspaper import Newspaper
+from ..model.subscriber import Subscriber
+
+# upper bounds of the latency histogram buckets, in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# the model methods whose calls are counted and timed
+MODEL_METHODS: Dict[type, Tuple[str, ...]] = {
+    Agency: ("get_newspaper", "get_editor", "get_subscriber", "add_newspaper", "add_newspapers", "add_editor",
+             "add_editors", "add_subscriber", "add_subscribers", "remove_newspaper", "delete_editor",
+             "remove_subscriber", "reconcile_deliveries"),
+    Newspaper: ("get_issue", "add_issue", "add_issues", "release_issue", "update"),
+    Issue: ("send_issue", "send_issue_to_all", "set_editor"),
+    Subscriber: ("subscribe", "unsubscribe", "create_stats", "deliver_missing_issues", "check_missing_issues"),
+}
+
+
+class _Timing(object):
+    # calls and total seconds of one model method
+    __slots__ = ("calls", "seconds", "lock")
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+
+# "Class.method" -> timing; shared by every app, as the classes are
+_model_timings: Dict[str, _Timing] = {}
+_originals: Dict[Tuple[type, str], Callable] = {}
+_instrumented = 0
+_instrument_lock = threading.Lock()
+
+
+def _timed(function: Callable, timing: _Timing) -> Callable:
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            with timing.lock:
+                timing.calls += 1
+                timing.seconds += elapsed
+    return wrapper
+
+
+def instrument_model() -> None:
+    """Wrap the MODEL_METHODS with timing wrappers; the classes are left
+    untouched until the first app enables metrics."""
+    global _instrumented
+    with _instrument_lock:
+        _instrumented += 1
+        if _instrumented > 1:
+            return
+        for cls, names in MODEL_METHODS.items():
+            for name in names:
+                timing = _model_timings.setdefault(f"{cls.__name__}.{name}", _Timing())
+                _originals[(cls, name)] = cls.__dict__[name]
+                setattr(cls, name, _timed(cls.__dict__[name], timing))
+
+
+def uninstrument_model() -> None:
+    """Undo instrument_model() once every app that enabled metrics closed them."""
+    global _instrumented
+    with _instrument_lock:
+        if _instrumented == 0:
+            return
+        _instrumented -= 1
+        if _instrumented == 0:
+            for (cls, name), original in _originals.items():
+                setattr(cls, name, original)
+            _originals.clear()
+
+
+class _Histogram(object):
+    __slots__ = ("counts", "sum", "lock")
+
+    def __init__(self, buckets: int):
+        # counts[i] requests took at most buckets[i]; the last one is +Inf
+        self.counts = [0] * (buckets + 1)
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+
+def _labels(**labels: Any) -> str:
+    text = ",".join(f'{name}="{_escape(value)}"' for name, value in labels.items())
+    return "{" + text + "}"
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Metrics(object):
+    """Request, model and object-count metrics in the Prometheus text format.
+
+    Nothing is measured unless an app calls init_app(): it then times
+    every request into a latency histogram per route and method, counts
+    responses per status, and wraps the model methods in MODEL_METHODS
+    to count and time their calls. Object counts are read when /metrics
+    is scraped. With `profile_sample` a share of the requests runs under
+    cProfile, one at a time, and the profiles of those slower than
+    `slow_seconds` are kept for /metrics/profiles.
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, profile_sample: float = 0.0,
+                 slow_seconds: float = 0.1, keep_profiles: int = 20):
+        self.buckets = tuple(sorted(buckets))
+        self.profile_sample = profile_sample
+        self.slow_seconds = slow_seconds
+        self._app: Optional[Flask] = None
+        self._lock = threading.Lock()
+        self._histograms: Dict[Tuple[str, str], _Histogram] = {}
+        self._responses: Dict[Tuple[str, str, int], int] = {}
+        self._profiling = threading.Lock()
+        self.profiles: Deque[Dict[str, Any]] = deque(maxlen=keep_profiles)
+        self.profiled = 0
+
+    def init_app(self, app: Flask) -> None:
+        self._app = app
+        app.extensions["metrics"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        app.add_url_rule("/metrics", "metrics", self.view)
+        app.add_url_rule("/metrics/profiles", "metrics_profiles", self.profiles_view)
+        instrument_model()
+
+    def close(self) -> None:
+        uninstrument_model()
+
+    # -- requests ----------------------------------------------------------
+
+    def _before_request(self) -> None:
+        g.metrics_start = time.perf_counter()
+        if self.profile_sample and random.random() < self.profile_sample and self._profiling.acquire(False):
+            # one profiler at a time, which is all cProfile supports
+            g.metrics_profiler = profiler = cProfile.Profile()
+            profiler.enable()
+
+    def _after_request(self, response: Response) -> Response:
+        start = g.pop("metrics_start", None)
+        if start is not None:
+            g.metrics_elapsed = elapsed = time.perf_counter() - start
+            self.observe(request.method, self._route(), response.status_code, elapsed)
+        return response
+
+    def _teardown_request(self, error: Optional[BaseException]) -> None:
+        profiler = g.pop("metrics_profiler", None)
+        if profiler is None:
+            return
+        try:
+            profiler.disable()
+            elapsed = g.get("metrics_elapsed")
+            if elapsed is not None and elapsed >= self.slow_seconds:
+                self._keep_profile(profiler, elapsed)
+        finally:
+            self._profiling.release()
+
+    @staticmethod
+    def _route() -> str:
+        # the URL rule, so that e.g. every newspaper ID counts as one route
+        return request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        histogram = self._histograms.get((route, method))
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault((route, method), _Histogram(len(self.buckets)))
+        with histogram.lock:
+            histogram.counts[bisect_left(self.buckets, seconds)] += 1
+            histogram.sum += seconds
+        with self._lock:
+            key = (route, method, status)
+            self._responses[key] = self._responses.get(key, 0) + 1
+
+    def _keep_profile(self, profiler: cProfile.Profile, seconds: float) -> None:
+        text = io.StringIO()
+        pstats.Stats(profiler, stream=text).sort_stats("cumulative").print_stats(30)
+        self.profiles.appendleft({"method": request.method, "path": request.full_path.rstrip("?"),
+                                  "route": self._route(), "seconds": seconds,
+                                  "time": time.strftime("%Y-%m-%dT%H:%M:%S"), "stats": text.getvalue()})
+        self.profiled += 1
+
+    # -- exposition --------------------------------------------------------
+
+    def view(self) -> Response:
+        return Response("".join(line + "\n" for line in self.lines()),
+                        mimetype="text/plain", content_type="text/plain; version=0.0.4; charset=utf-8")
+
+    def profiles_view(self) -> Response:
+        text = "".join(f"{profile['time']} {profile['method']} {profile['path']} took {profile['seconds']:.3f}s\n"
+                       f"{profile['stats']}\n" for profile in list(self.profiles))
+        return Response(text or "No slow request was profiled\n", mimetype="text/plain")
+
+    def lines(self) -> Iterator[str]:
+        yield from self._request_lines()
+        yield from self._model_lines()
+        yield from self._gauge_lines()
+
+    def _request_lines(self) -> Iterator[str]:
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            responses = sorted(self._responses.items())
+        yield "# HELP paperback_request_duration_seconds Time to answer a request, per route"
+        yield "# TYPE paperback_request_duration_seconds histogram"
+        bounds = [repr(bound) for bound in self.buckets] + ["+Inf"]
+        for (route, method), histogram in histograms:
+            with histogram.lock:
+                counts, total = list(histogram.counts), histogram.sum
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                yield f"paperback_request_duration_seconds_bucket{_labels(method=method, route=route, le=bound)} {cumulative}"
+            yield f"paperback_request_duration_seconds_sum{_labels(method=method, route=route)} {total!r}"
+            yield f"paperback_request_duration_seconds_count{_labels(method=method, route=route)} {cumulative}"
+        yield "# HELP paperback_responses_total Responses sent, per route and status"
+        yield "# TYPE paperback_responses_total counter"
+        for (route, method, status), count in responses:
+            yield f"paperback_responses_total{_labels(method=method, route=route, status=status)} {count}"
+        yield "# HELP paperback_profiles_total Slow requests whose profile was kept"
+        yield "# TYPE paperback_profiles_total counter"
+        yield f"paperback_profiles_total {self.profiled}"
+
+    def _model_lines(self) -> Iterator[str]:
+        timings = sorted(_model_timings.items())
+        yield "# HELP paperback_model_call_seconds Time spent in model methods, including nested calls"
+        yield "# TYPE paperback_model_call_seconds summary"
+        for name, timing in timings:
+            with timing.lock:
+                calls, seconds = timing.calls, timing.seconds
+            yield f"paperback_model_call_seconds_sum{_labels(method=name)} {seconds!r}"
+            yield f"paperback_model_call_seconds_count{_labels(method=name)} {calls}"
+
+    def _gauge_lines(self) -> Iterator[str]:
+        agency = Agency.get_instance()
+        papers = list(agency.newspapers)
+        yield "# HELP paperback_objects Number of objects held by the agency"
+        yield "# TYPE paperback_objects gauge"
+        for kind, count in (("newspapers", len(papers)), ("issues", sum(len(paper.issues) for paper in papers)),
+                            ("editors", len(agency.editors)), ("subscribers", len(agency.subscribers)),
+                            ("subscriptions", sum(len(paper.subscribers) for paper in papers)),
+                            ("deliveries", sum(len(paper.deliveries) for paper in papers))):
+            yield f"paperback_objects{_labels(kind=kind)} {count}"
+        if agency.release_scheduler is not None:
+            yield "# HELP paperback_scheduled_releases Issues waiting for their release date"
+            yield "# TYPE paperback_scheduled_releases gauge"
+            yield f"paperback_scheduled_releases {len(agency.release_scheduler)}"
+        cache = self._app.extensions.get("response_cache") if self._app is not None else None
+        if cache is not None:
+            yield "# HELP paperback_response_cache_entries Responses held by the response cache"
+            yield "# TYPE paperback_response_cache_entries gauge"
+            yield f"paperback_response_cache_entries {len(cache)}"
+            yield "# HELP paperback_response_cache_requests_total Cacheable requests, per outcome"
+            yield "# TYPE paperback_response_cache_requests_total counter"
+            yield f"paperback_response_cache_requests_total{_labels(result='hit')} {cache.hits}"
+            yield f"paperback_response_cache_requests_total{_labels(result='miss')} {cache.misses}"
@@ -1,14 +1,19 @@
 from flask import jsonify, make_response
-from flask_restx import Namespace, reqparse, Resource, fields
+from flask_restx import Namespace, inputs, reqparse, Resource, fields
 
 from ..model.agency import Agency
 from ..model.newspaper import Newspaper
 from ..model.issue import Issue
 from ..model.editor import Editor
+from .bulk import BulkLoader, read_items
+from .export import export_ndjson
+from .cache import cached
+from .filters import issue_query, issue_query_parser, newspaper_query, newspaper_query_parser
+from .pagination import DEFAULT_LIMIT, pagination_parser, paginate, paginate_query
+from .serializer import serializer_for
 
 from typing import List, Union, Optional
 
-import random
 
 newspaper_ns = Namespace("newspaper", description="Newspaper related operations")
 
@@ -60,20 +65,26 @@ editor_get_model = newspaper_ns.model("EditorGetModel", {
     "name": fields.String(required = True, 
                           help = "The name of the editor")
 })
+subscriber_get_model = newspaper_ns.model("SubscriberGetModel", {
+    "name": fields.String(required = True, 
+                          help = "The name of the editor"),
+    "id": fields.Integer(required = True,
+                         help = "The unique identifier of an editor")
+})
+
+paper_serializer = serializer_for(paper_get_model)
+issue_serializer = serializer_for(issue_get_model)
+subscriber_serializer = serializer_for(subscriber_get_model)
 
 
 
 @newspaper_ns.route('/')
 class NewspaperAPI(Resource):
-    _paper_unique_ids = set()
-
-    @classmethod
-    def _creating_id(cls):
-         while True:
-            new_id = random.randint(10000000, 99999999)
-            if new_id not in cls._paper_unique_ids:
-                cls._paper_unique_ids.add(new_id)
-                return new_id
+
+    @staticmethod
+    def _creating_id():
+        agency = Agency.get_instance()
+        return agency.ids.next_id("newspaper", agency.get_newspaper)
     
     @newspaper_ns.doc(paper_post_model, description="Add a new newspaper")
     @newspaper_ns.expect(paper_post_model, validate=True)
@@ -89,20 +100,61 @@ class NewspaperAPI(Resource):
         # return the new paper
         return newspaper_ns.marshal(new_paper, paper_get_model)
 
-    @newspaper_ns.marshal_list_with(paper_get_model, envelope='newspapers')
+    @cached("newspapers")
+    @newspaper_ns.doc(description="Get a list of all newspapers, optionally filtered by price and frequency "
+                                  "and sorted. Pass limit and/or after to get a single page")
+    @newspaper_ns.expect(newspaper_query_parser)
+    @paper_serializer.marshal_with(as_list=True, envelope='newspapers')
+    def get(self):
+        args = newspaper_query_parser.parse_args()
+        newspapers, headers = paginate_query(newspaper_query(Agency.get_instance().newspapers, args), args)
+        return newspapers, 200, headers
+
+
+@newspaper_ns.route('/bulk')
+class NewspaperBulk(Resource):
+
+    @staticmethod
+    def _create(payloads):
+        agency = Agency.get_instance()
+        paper_ids = agency.ids.next_ids("newspaper", len(payloads), agency.get_newspaper)
+        agency.add_newspapers([Newspaper(paper_id=paper_id, name=payload["name"], frequency=payload["frequency"],
+                                         price=payload["price"])
+                               for paper_id, payload in zip(paper_ids, payloads)])
+        return paper_ids
+
+    @staticmethod
+    def _update(paper_id, payload):
+        targeted_paper = Agency.get_instance().get_newspaper(paper_id)
+        if not targeted_paper:
+            raise LookupError(f"Newspaper with ID {paper_id} was not found")
+        targeted_paper.update(name=payload["name"], frequency=payload["frequency"], price=payload["price"])
+
+    @newspaper_ns.doc(description="Create newspapers from a JSON array or an NDJSON stream; items with a "
+                                  "paper_id update that newspaper. Returns the outcome of every item")
+    @newspaper_ns.expect([paper_post_model])
+    def post(self):
+        return BulkLoader(paper_post_model, "paper_id").load(read_items(), self._create, self._update)
+
+
+@newspaper_ns.route('/export')
+class NewspaperExport(Resource):
+
+    @newspaper_ns.doc(description="Stream all newspapers as newline-delimited JSON")
     def get(self):
-        return Agency.get_instance().all_newspapers()
+        return export_ndjson(Agency.get_instance().newspapers, paper_get_model)
 
 
 @newspaper_ns.route('/<int:paper_id>')
 class NewspaperID(Resource):
 
+    @cached("newspaper:{paper_id}")
     @newspaper_ns.doc(description="Get a newspaper")
     def get(self, paper_id):
         search_result = Agency.get_instance().get_newspaper(paper_id)
         if not search_result:
             return jsonify(f"Newspaper with ID {paper_id} was not found")
-        return newspaper_ns.marshal(search_result, paper_get_model)
+        return paper_serializer.response(search_result)
 
     @newspaper_ns.doc(parser=paper_post_model, description="Update a newspaper")
     @newspaper_ns.expect(paper_post_model, validate=True)
@@ -110,9 +162,9 @@ class NewspaperID(Resource):
         targeted_paper = Agency.get_instance().get_newspaper(paper_id)
         if not targeted_paper:
             return jsonify(f"Newspaper with ID {paper_id} was not found")
-        targeted_paper.name = newspaper_ns.payload["name"]
-        targeted_paper.frequency = newspaper_ns.payload["frequency"]
-        targeted_paper.price = newspaper_ns.payload["price"]
+        targeted_paper.update(name=newspaper_ns.payload["name"],
+                              frequency=newspaper_ns.payload["frequency"],
+                              price=newspaper_ns.payload["price"])
         
         return newspaper_ns.marshal(targeted_paper, paper_get_model)
 
@@ -127,23 +179,22 @@ class NewspaperID(Resource):
 
 @newspaper_ns.route("/<int:paper_id>/issue")
 class NewspaperIssue(Resource):
-    _issues_unique_ids = set()
-    @classmethod
-    def _creating_id(cls):
-        while True:
-            new_id = random.randint(10000000, 99999999)
-            if new_id not in cls._issues_unique_ids:
-                cls._issues_unique_ids.add(new_id)
-                return new_id
+    @staticmethod
+    def _creating_id(paper):
+        # issue IDs come from one sequence for all newspapers
+        return Agency.get_instance().ids.next_id("issue", paper.get_issue)
             
-    @newspaper_ns.doc(description="Get a list of newspaper isssues")
-    
+    @cached("newspaper:{paper_id}", "issues:{paper_id}")
+    @newspaper_ns.doc(description="Get a list of newspaper isssues, optionally filtered by release state, "
+                                  "release date and editor and sorted. Pass limit and/or after to get a single page")
+    @newspaper_ns.expect(issue_query_parser)
     def get(self, paper_id):
+        args = issue_query_parser.parse_args()
         targeted_paper = Agency.get_instance().get_newspaper(paper_id)
         if not targeted_paper:
             return jsonify(f"Newspaper with ID {paper_id} was not found")
-        issues = targeted_paper.get_issues()
-        return newspaper_ns.marshal(issues, issue_get_model)
+        issues, headers = paginate_query(issue_query(targeted_paper.issues, args), args)
+        return issue_serializer.response(issues, headers=headers)
     
         
     @newspaper_ns.doc(parser=issue_post_model, description="Adding new issue")
@@ -153,23 +204,52 @@ class NewspaperIssue(Resource):
         if not targeted_paper:
             return jsonify(f"Newspaper with ID {paper_id} was not found")
         new_issue = Issue(name = newspaper_ns.payload["name"],
-                          id = self._creating_id(),
+                          id = self._creating_id(targeted_paper),
                           releasedate = newspaper_ns.payload["releasedate"],
                           released = newspaper_ns.payload["released"])
         
         targeted_paper.add_issue(new_issue)
         return newspaper_ns.marshal(new_issue, issue_get_model)
     
+@newspaper_ns.route("/<int:paper_id>/issue/bulk")
+class NewspaperIssueBulk(Resource):
+    @newspaper_ns.doc(description="Add issues from a JSON array or an NDJSON stream. Returns the outcome of every item")
+    @newspaper_ns.expect([issue_post_model])
+    def post(self, paper_id):
+        targeted_paper = Agency.get_instance().get_newspaper(paper_id)
+        if not targeted_paper:
+            return jsonify(f"Newspaper with ID {paper_id} was not found")
+
+        def create(payloads):
+            issue_ids = Agency.get_instance().ids.next_ids("issue", len(payloads), targeted_paper.get_issue)
+            targeted_paper.add_issues([Issue(name=payload["name"], id=issue_id, releasedate=payload["releasedate"],
+                                             released=payload["released"])
+                                       for issue_id, payload in zip(issue_ids, payloads)])
+            return issue_ids
+
+        return BulkLoader(issue_post_model, "id").load(read_items(), create)
+
+@newspaper_ns.route("/<int:paper_id>/issue/export")
+class NewspaperIssueExport(Resource):
+    @newspaper_ns.doc(description="Stream all issues of a newspaper as newline-delimited JSON")
+    def get(self, paper_id):
+        targeted_paper = Agency.get_instance().get_newspaper(paper_id)
+        if not targeted_paper:
+            return jsonify(f"Newspaper with ID {paper_id} was not found")
+        return export_ndjson(targeted_paper.issues, issue_get_model)
+
 @newspaper_ns.route("/<int:paper_id>/issue/<int:issue_id>")
 class IssueID(Resource):
+    @cached("newspaper:{paper_id}", "issues:{paper_id}")
     @newspaper_ns.doc(description = "Get information of a newspaper issue")
     def get(self, paper_id, issue_id):
         targeted_paper = Agency.get_instance().get_newspaper(paper_id)
         if not targeted_paper:
             return jsonify(f"Newspaper with ID {paper_id} was not found")
-        if not targeted_paper.get_issue(issue_id):
+        targeted_issue = targeted_paper.get_issue(issue_id)
+        if not targeted_issue:
             return jsonify(f"Issue with ID {issue_id} was not found")
-        return newspaper_ns.marshal(targeted_paper.get_issue(issue_id), issue_get_model)
+        return issue_serializer.response(targeted_issue)
         
 @newspaper_ns.route("/<int:paper_id>/issue/<int:issue_id>/release")
 class ReleaseIssue(Resource):
@@ -208,14 +288,20 @@ class SetIssueEditor(Resource):
 
 @newspaper_ns.route("/<int:paper_id>/issue/<int:issue_id>/deliver")
 class SendIssue(Resource):
-    @newspaper_ns.doc(description = "\"Send\" an issue to a subscriber. This means there should be a record of the subscriber receiving",
-                      params = {"subscriber_id":"Specify the ID of the newspaper"})
+    @newspaper_ns.doc(description = "\"Send\" an issue to a subscriber. This means there should be a record of the subscriber receiving. "
+                                    "Without a subscriber ID a released issue is sent to every subscriber of the newspaper",
+                      params = {"subscriber_id":"Specify the ID of the newspaper",
+                                "background":"Send to every subscriber in a background job and return the job"})
     def post(self, paper_id, issue_id):
         parser = reqparse.RequestParser()
         parser.add_argument("subscriber_id",
                             type = int,
                             help = "ID of the newspaper", 
                             location = "args")
+        parser.add_argument("background",
+                            type = inputs.boolean,
+                            default = False,
+                            location = "args")
         args = parser.parse_args()
         subscriber_id = args["subscriber_id"]
         targeted_paper = Agency.get_instance().get_newspaper(paper_id)
@@ -224,15 +310,31 @@ class SendIssue(Resource):
         targeted_issue = targeted_paper.get_issue(issue_id)
         if not targeted_issue:
             return jsonify(f"Issue with ID {issue_id} was not found")
+        if subscriber_id is None:
+            if not targeted_issue.released:
+                return jsonify(f"Issue with ID {issue_id} was not released")
+            if args["background"]:
+                job = Agency.get_instance().jobs.submit("deliver", lambda progress: targeted_issue.send_issue_to_all(
+                    targeted_paper.subscribers, progress=progress))
+                return job.to_dict(), 202
+            return jsonify(targeted_issue.send_issue_to_all(targeted_paper.subscribers))
         targeted_subscriber = Agency.get_instance().get_subscriber(subscriber_id)
         if not targeted_subscriber:
             return jsonify(f"Subscriber with ID {subscriber_id} was not found")
         if targeted_issue.send_issue(targeted_subscriber) == None:
             return jsonify(f"Issue was sent to a subscriber with ID {subscriber_id}")
         else: return targeted_issue.send_issue(targeted_subscriber)
-    
-
-
 
 
-        
\ No newline at end of file
+@newspaper_ns.route("/<int:paper_id>/subscribers")
+class NewspaperSubscribers(Resource):
+    @newspaper_ns.doc(description = "List the subscribers of a newspaper, one page at a time. "
+                                    "The cursor of the next page is sent in the X-Next-Cursor header")
+    @newspaper_ns.expect(pagination_parser)
+    def get(self, paper_id):
+        args = pagination_parser.parse_args()
+        targeted_paper = Agency.get_instance().get_newspaper(paper_id)
+        if not targeted_paper:
+            return jsonify(f"Newspaper with ID {paper_id} was not found")
+        subscribers, headers = paginate(targeted_paper.subscribers, args, default_limit=DEFAULT_LIMIT)
+        return subscriber_serializer.response(subscribers, headers=headers, envelope="subscribers")
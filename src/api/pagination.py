@@ -0,0 +1,55 @@
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from flask_restx import abort, reqparse
+
+from ..model.query import Query
+from ..model.registry import Registry
+
+
+def cursor(value: str) -> Hashable:
+    # an ID, or the parts of a composite key joined by ":", e.g. an editor's
+    # issues are keyed by paper ID and issue ID
+    parts = tuple(int(part) for part in str(value).split(":"))
+    return parts[0] if len(parts) == 1 else parts
+
+
+def cursor_text(key: Hashable) -> str:
+    return ":".join(str(part) for part in key) if isinstance(key, tuple) else str(key)
+
+
+pagination_parser = reqparse.RequestParser()
+pagination_parser.add_argument("limit", type=int, location="args",
+                               help="The maximum number of items on a page")
+pagination_parser.add_argument("after", type=cursor, location="args",
+                               help="The cursor of the previous page, i.e. the last ID it contained")
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 1000
+
+
+def paginate(registry: Registry, args: Dict, default_limit: Optional[int] = None) -> Tuple[List, Dict[str, str]]:
+    """Return one page of a registry ordered by ID, together with the headers
+    announcing the cursor of the next page.
+
+    Without `limit` and `after` the whole registry is returned in insertion
+    order, unless the endpoint sets a default page size.
+    """
+    return paginate_query(Query(registry), args, default_limit)
+
+
+def paginate_query(query: Query, args: Dict, default_limit: Optional[int] = None) -> Tuple[List, Dict[str, str]]:
+    """Like paginate(), for a filtered or sorted query; the cursor is the ID
+    of the last item of a page in the query's order."""
+    limit, after = args.get("limit"), args.get("after")
+    if limit is None and after is None and default_limit is None:
+        return query.page()[0], {}
+    limit = min(max(limit or default_limit or DEFAULT_LIMIT, 1), MAX_LIMIT)
+    try:
+        items, next_cursor = query.page(after=after, limit=limit)
+    except ValueError as error:
+        abort(400, str(error))
+    except TypeError:
+        # e.g. a plain ID for a list with composite keys
+        abort(400, f"{cursor_text(after)} is not a cursor of this list")
+    headers = {} if next_cursor is None else {"X-Next-Cursor": cursor_text(next_cursor)}
+    return items, headers
@@ -0,0 +1,68 @@
+from flask_restx import Namespace, Resource, fields
+
+from ..model.agency import Agency
+
+
+reports_ns = Namespace("reports", description = "Agency-wide reports")
+
+revenue_model = reports_ns.model("RevenueReportModel", {
+    "paper_id": fields.Integer(help = "The unique identifier of the paper"),
+    "name": fields.String(help = "The name of the newspaper"),
+    "subscribers": fields.Integer(help = "The number of subscribers of the paper"),
+    "monthly_revenue": fields.Float(help = "The monthly revenue of the paper from its subscribers"),
+    "annual_revenue": fields.Float(help = "The annual revenue of the paper from its subscribers")
+})
+
+subscribers_model = reports_ns.model("SubscribersReportModel", {
+    "paper_id": fields.Integer(help = "The unique identifier of the paper"),
+    "name": fields.String(help = "The name of the newspaper"),
+    "subscribers": fields.Integer(help = "The number of subscribers of the paper")
+})
+
+deliveries_model = reports_ns.model("DeliveriesReportModel", {
+    "paper_id": fields.Integer(help = "The unique identifier of the paper"),
+    "issue_id": fields.Integer(help = "The unique identifier of the issue"),
+    "name": fields.String(help = "The name of the issue"),
+    "released": fields.Boolean(help = "Whether the issue was released"),
+    "delivered": fields.Integer(help = "The number of current subscribers that received the issue"),
+    "subscribers": fields.Integer(help = "The number of current subscribers of the paper"),
+    "completeness": fields.Float(help = "The share of current subscribers that received the issue (null without subscribers)")
+})
+
+editors_model = reports_ns.model("EditorsReportModel", {
+    "editor_id": fields.Integer(help = "The unique identifier of the editor"),
+    "name": fields.String(help = "The name of the editor"),
+    "issues": fields.Integer(help = "The number of issues assigned to the editor")
+})
+
+
+@reports_ns.route("/revenue")
+class RevenueReport(Resource):
+    @reports_ns.doc(description = "Get the monthly and annual revenue of every newspaper")
+    @reports_ns.marshal_list_with(revenue_model, envelope = "revenue")
+    def get(self):
+        return Agency.get_instance().analytics.revenue_per_paper()
+
+
+@reports_ns.route("/subscribers")
+class SubscribersReport(Resource):
+    @reports_ns.doc(description = "Get the number of subscribers of every newspaper")
+    @reports_ns.marshal_list_with(subscribers_model, envelope = "subscribers")
+    def get(self):
+        return Agency.get_instance().analytics.subscribers_per_paper()
+
+
+@reports_ns.route("/deliveries")
+class DeliveriesReport(Resource):
+    @reports_ns.doc(description = "Get how many of its newspaper's current subscribers received every issue")
+    @reports_ns.marshal_list_with(deliveries_model, envelope = "deliveries")
+    def get(self):
+        return Agency.get_instance().analytics.delivery_completeness()
+
+
+@reports_ns.route("/editors")
+class EditorsReport(Resource):
+    @reports_ns.doc(description = "Get the number of issues every editor is responsible for")
+    @reports_ns.marshal_list_with(editors_model, envelope = "editors")
+    def get(self):
+        return Agency.get_instance().analytics.issues_per_editor()
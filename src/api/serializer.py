@@ -0,0 +1,165 @@
+import functools
+import json
+from json.encoder import encode_basestring_ascii
+from typing import Any, Callable, Dict, Optional
+
+from flask import Response, current_app, make_response, request
+from flask_restx import Model, fields, marshal
+from flask_restx.inputs import boolean
+from flask_restx.utils import merge, unpack
+from werkzeug.wrappers import Response as BaseResponse
+
+# field types the compiled encoders handle; models with other fields are
+# always marshalled by flask-restx
+_SIMPLE_FIELDS = (fields.String, fields.Integer, fields.Float, fields.Boolean, fields.DateTime)
+_INFINITY = float("inf")
+_ISO_DATE = fields.DateTime()
+
+
+def _int_text(value) -> str:
+    return int.__repr__(int(value))
+
+
+def _float_text(value) -> str:
+    value = float(value)
+    if value != value:
+        return "NaN"
+    if value == _INFINITY:
+        return "Infinity"
+    if value == -_INFINITY:
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+def _str_text(value) -> str:
+    return encode_basestring_ascii(value if type(value) is str else str(value))
+
+
+def _bool_text(value) -> str:
+    return "true" if boolean(value) else "false"
+
+
+class Serializer(object):
+    """JSON encoder compiled from a flask-restx model.
+
+    The model is turned once into a Python function that reads the fields
+    of an object and writes its JSON text directly, instead of marshalling
+    it field by field into a dict that is then dumped. The output is byte
+    for byte what flask-restx would send. Requests the encoder cannot answer
+    the same way (X-Fields masks, RESTX_JSON settings, debug indentation,
+    dicts, values that fail to marshal) go through flask-restx.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+        self._dates: Dict[Any, str] = {}
+        self._encode: Optional[Callable[[Any], str]] = self._compile()
+
+    def _compile(self) -> Optional[Callable[[Any], str]]:
+        if any(type(field) not in _SIMPLE_FIELDS or field.mask or not isinstance(field.attribute, (str, type(None)))
+               or "." in (field.attribute or name) for name, field in self.model.items()):
+            return None
+        if any(isinstance(field, fields.DateTime) and field.dt_format != "iso8601" for field in self.model.values()):
+            return None
+        namespace = {"_int_text": _int_text, "_float_text": _float_text, "_str_text": _str_text,
+                     "_bool_text": _bool_text, "_date_text": self._date_text}
+        lines = ["def encode(obj):"]
+        parts = []
+        for index, (name, field) in enumerate(self.model.items()):
+            # what flask-restx writes for a missing value
+            namespace[f"_null{index}"] = json.dumps(field.output(name, None))
+            value = f"v{index}"
+            lines.append(f"    {value} = obj.{field.attribute or name}")
+            if isinstance(field, fields.Integer):
+                text = f"str({value}) if type({value}) is int else _int_text({value})"
+            elif isinstance(field, fields.Float):
+                text = f"_float_text({value})"
+            elif isinstance(field, fields.Boolean):
+                text = f"'true' if {value} is True else 'false' if {value} is False else _bool_text({value})"
+            elif isinstance(field, fields.DateTime):
+                text = f"_date_text({value})"
+            else:
+                text = f"_str_text({value})"
+            lines.append(f"    t{index} = _null{index} if {value} is None else {text}")
+            parts.append(json.dumps(name).replace("%", "%%") + ": %s")
+        template = "{" + ", ".join(parts) + "}"
+        values = "".join(f"t{index}, " for index in range(len(parts)))
+        lines.append(f"    return {template!r} % ({values})")
+        exec("\n".join(lines), namespace)
+        return namespace["encode"]
+
+    def _date_text(self, value) -> str:
+        # issues share a few release dates, so their formatting is memoized
+        text = self._dates.get(value)
+        if text is None:
+            text = json.dumps(_ISO_DATE.format(value))
+            if len(self._dates) < 65536:
+                self._dates[value] = text
+        return text
+
+    def encode(self, obj) -> str:
+        """The JSON text of one object."""
+        if self._encode is None or isinstance(obj, dict):
+            return json.dumps(marshal(obj, self.model))
+        try:
+            return self._encode(obj)
+        except Exception:
+            return json.dumps(marshal(obj, self.model))
+
+    def dumps(self, data, envelope: Optional[str] = None) -> str:
+        if isinstance(data, (list, tuple)):
+            text = "[" + ", ".join([self.encode(item) for item in data]) + "]"
+        else:
+            text = self.encode(data)
+        return text if envelope is None else "{" + json.dumps(envelope) + ": " + text + "}"
+
+    def response(self, data, code: int = 200, headers: Optional[Dict[str, str]] = None,
+                 envelope: Optional[str] = None, mask=None) -> Response:
+        """A JSON response with the marshalled data, as flask-restx would send it."""
+        if mask is not None or current_app.debug or current_app.config.get("RESTX_JSON"):
+            body = marshal(data, self.model, envelope=envelope, mask=mask)
+            settings = dict(current_app.config.get("RESTX_JSON", {}))
+            if current_app.debug:
+                settings.setdefault("indent", 4)
+            text = json.dumps(body, **settings)
+        else:
+            text = self.dumps(data, envelope)
+        response = make_response(text + "\n", code)
+        response.headers.extend(headers or {})
+        response.headers["Content-Type"] = "application/json"
+        return response
+
+    def marshal_with(self, as_list: bool = False, envelope: Optional[str] = None,
+                     description: Optional[str] = None) -> Callable:
+        """Drop-in for namespace.marshal_with and marshal_list_with.
+
+        The Swagger documentation is registered exactly like flask-restx does,
+        only the encoding of the returned data is faster.
+        """
+        def decorate(function: Callable) -> Callable:
+            options = {} if envelope is None else {"envelope": envelope}
+            doc = {"responses": {"200": (description, [self.model] if as_list else self.model, options)},
+                   "__mask__": True}
+            function.__apidoc__ = merge(getattr(function, "__apidoc__", {}), doc)
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                result = function(*args, **kwargs)
+                if isinstance(result, BaseResponse):
+                    return result
+                data, code, headers = unpack(result)
+                mask = request.headers.get(current_app.config["RESTX_MASK_HEADER"]) or None
+                return self.response(data, code, headers, envelope=envelope, mask=mask)
+            return wrapper
+        return decorate
+
+
+_serializers: Dict[int, Serializer] = {}
+
+
+def serializer_for(model: Model) -> Serializer:
+    """The compiled serializer of a model; models are compiled once."""
+    serializer = _serializers.get(id(model))
+    if serializer is None or serializer.model is not model:
+        serializer = _serializers[id(model)] = Serializer(model)
+    return serializer
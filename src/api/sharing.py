@@ -0,0 +1,38 @@
+from typing import Optional
+
+from flask import Flask, g, request
+
+# requests that do not change the agency
+_READS = ("GET", "HEAD", "OPTIONS")
+
+
+class SharedStateSync(object):
+    """Keeps the agency of a worker process in step with a shared storage.
+
+    Reads first apply what the other workers wrote since the last request.
+    Writes run in a storage transaction, which serializes them with the
+    writes of every other worker and commits them before the response is
+    sent; a client thus reads its own writes, whichever worker serves it.
+    The hooks run before those of the response cache, which the synced
+    records invalidate.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage
+
+    def init_app(self, app: Flask) -> None:
+        app.extensions["shared_state"] = self
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self) -> None:
+        if request.method in _READS:
+            self.storage.sync()
+        else:
+            g.shared_transaction = transaction = self.storage.transaction()
+            transaction.__enter__()
+
+    def _teardown_request(self, error: Optional[BaseException]) -> None:
+        transaction = g.pop("shared_transaction", None)
+        if transaction is not None:
+            transaction.__exit__(None, None, None)
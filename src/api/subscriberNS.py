@@ -1,15 +1,19 @@
 from flask import jsonify, make_response
-from flask_restx import Namespace, reqparse, Resource, fields
+from flask_restx import Namespace, inputs, reqparse, Resource, fields
 
 from ..model.agency import Agency
 from ..model.newspaper import Newspaper
 from ..model.issue import Issue
 from ..model.editor import Editor
 from ..model.subscriber import Subscriber
+from .bulk import BulkLoader, read_items
+from .export import export_ndjson
+from .cache import cached
+from .pagination import pagination_parser, paginate
+from .serializer import serializer_for
 
 from typing import List, Union, Optional
 
-import random
 
 
 subscriber_ns = Namespace("subscriber", description="Subscriber related operations")
@@ -35,22 +39,24 @@ subscriber_get_model = subscriber_ns.model("SubscriberGetModel", {
                          help = "The unique identifier of an editor")
 })
 
+subscriber_serializer = serializer_for(subscriber_get_model)
+
 
 @subscriber_ns.route("/")
 class SubscriberAPI(Resource):
-    _subscribers_unique_ids = set()
-
-    @classmethod
-    def _creating_id(cls):
-        while True:
-            new_id = random.randint(10000000, 99999999)
-            if new_id not in cls._subscribers_unique_ids:
-                cls._subscribers_unique_ids.add(new_id)
-                return new_id
+
+    @staticmethod
+    def _creating_id():
+        agency = Agency.get_instance()
+        return agency.ids.next_id("subscriber", agency.get_subscriber)
     
-    @subscriber_ns.marshal_list_with(subscriber_get_model, envelope = "subscribers")
+    @cached("subscribers")
+    @subscriber_ns.doc(description = "Get a list of all subscribers. Pass limit and/or after to get a single page")
+    @subscriber_ns.expect(pagination_parser)
+    @subscriber_serializer.marshal_with(as_list=True, envelope="subscribers")
     def get(self):
-        return Agency.get_instance().get_subscribers()
+        subscribers, headers = paginate(Agency.get_instance().subscribers, pagination_parser.parse_args())
+        return subscribers, 200, headers
     @subscriber_ns.doc(subscriber_get_model, description = "Add a new subscriber")
     @subscriber_ns.expect(subscriber_post_model, validate = True)
     @subscriber_ns.marshal_with(subscriber_get_model, envelope = "subscriber")
@@ -62,13 +68,44 @@ class SubscriberAPI(Resource):
         # return the new paper
         return new_subscriber
     
+@subscriber_ns.route("/bulk")
+class SubscriberBulk(Resource):
+
+    @staticmethod
+    def _create(payloads):
+        agency = Agency.get_instance()
+        subscriber_ids = agency.ids.next_ids("subscriber", len(payloads), agency.get_subscriber)
+        agency.add_subscribers([Subscriber(id=subscriber_id, name=payload["name"])
+                                for subscriber_id, payload in zip(subscriber_ids, payloads)])
+        return subscriber_ids
+
+    @staticmethod
+    def _update(subscriber_id, payload):
+        targeted_subscriber = Agency.get_instance().get_subscriber(subscriber_id)
+        if not targeted_subscriber:
+            raise LookupError(f"Subscriber with ID {subscriber_id} was not found")
+        targeted_subscriber.update(name=payload["name"])
+
+    @subscriber_ns.doc(description = "Create subscribers from a JSON array or an NDJSON stream; items with an id "
+                                     "update that subscriber. Returns the outcome of every item")
+    @subscriber_ns.expect([subscriber_post_model])
+    def post(self):
+        return BulkLoader(subscriber_post_model, "id").load(read_items(), self._create, self._update)
+
+@subscriber_ns.route("/export")
+class SubscriberExport(Resource):
+    @subscriber_ns.doc(description = "Stream all subscribers as newline-delimited JSON")
+    def get(self):
+        return export_ndjson(Agency.get_instance().subscribers, subscriber_get_model)
+    
 @subscriber_ns.route("/<int:subscriber_id>")
 class SubscriberID(Resource):
+    @cached("subscriber:{subscriber_id}")
     def get(self, subscriber_id):
         targeted_subscriber = Agency.get_instance().get_subscriber(subscriber_id)
         if not targeted_subscriber:
             return jsonify(f"Subscriber with ID {subscriber_id} was not found")
-        return subscriber_ns.marshal(targeted_subscriber, subscriber_get_model)
+        return subscriber_serializer.response(targeted_subscriber)
     
     @subscriber_ns.doc(parser = subscriber_post_model, description = "Update a subscriber information")
     @subscriber_ns.expect(subscriber_post_model, validate = True)
@@ -76,7 +113,7 @@ class SubscriberID(Resource):
         targeted_subscriber = Agency.get_instance().get_subscriber(subscriber_id)
         if not targeted_subscriber:
             return jsonify(f"Subscriber with ID {subscriber_id} was not found")
-        targeted_subscriber.name = subscriber_ns.payload["name"]
+        targeted_subscriber.update(name=subscriber_ns.payload["name"])
         return subscriber_ns.marshal(targeted_subscriber, subscriber_get_model)
     @subscriber_ns.doc(description = "Delete a subscriber")
     def delete(self, subscriber_id):
@@ -118,13 +155,45 @@ class SubscriberStats(Resource):
     
 @subscriber_ns.route("/<int:subscriber_id>/missingissues")
 class SubscriberMissingIssues(Resource):
-    @subscriber_ns.doc(description = "Check if there are any undelivered issues of the subscribed newspapers")
+    @subscriber_ns.doc(description = "Check if there are any undelivered issues of the subscribed newspapers",
+                       params = {"background": "Send the missing issues in a background job and return the job"})
     def get(self, subscriber_id):
+        parser = reqparse.RequestParser()
+        parser.add_argument("background",
+                            type = inputs.boolean,
+                            default = False,
+                            location = "args")
+        args = parser.parse_args()
         targeted_subscriber = Agency.get_instance().get_subscriber(subscriber_id)
         if not targeted_subscriber:
             return jsonify(f"Subscriber with ID {subscriber_id} was not found")
+        if args["background"]:
+            job = Agency.get_instance().jobs.submit("missingissues", lambda progress: {
+                "sent": targeted_subscriber.deliver_missing_issues()})
+            return job.to_dict(), 202
         return targeted_subscriber.check_missing_issues()
 
-
-
-
+@subscriber_ns.route("/missingissues")
+class MissingIssues(Resource):
+    @subscriber_ns.doc(description = "Send every released issue to all subscribers of its newspaper that did not receive it yet",
+                       params = {"batch_size": "Number of subscribers an issue is sent to at a time",
+                                 "background": "Run the reconciliation in a background job and return the job"})
+    def post(self):
+        parser = reqparse.RequestParser()
+        parser.add_argument("batch_size",
+                            type = int,
+                            default = 10000,
+                            help = "Number of subscribers an issue is sent to at a time",
+                            location = "args")
+        parser.add_argument("background",
+                            type = inputs.boolean,
+                            default = False,
+                            location = "args")
+        args = parser.parse_args()
+        batch_size = max(args["batch_size"], 1)
+        if args["background"]:
+            agency = Agency.get_instance()
+            job = agency.jobs.submit("missingissues", lambda progress: agency.reconcile_deliveries(
+                batch_size=batch_size, progress=progress))
+            return job.to_dict(), 202
+        return Agency.get_instance().reconcile_deliveries(batch_size=batch_size)
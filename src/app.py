@@ -1,17 +1,55 @@
+import os
+
 from flask import Flask
 from flask_restx import Api
 
 from .api.newspaperNS import newspaper_ns
 from .api.editorNS import editor_ns
 from .api.subscriberNS import subscriber_ns
+from .api.reportsNS import reports_ns
+from .api.jobsNS import jobs_ns
+from .api.cache import ResponseCache
+from .api.metrics import Metrics
+from .api.sharing import SharedStateSync
 
 
 from .model.agency import Agency
+from .storage import open_storage
 
 agency = Agency()
 
 def create_app():
     paperroute_app = Flask(__name__)
+
+    # e.g. PAPERBACK_STORAGE=sqlite:///var/paperback.db to keep the data across restarts
+    storage_url = os.environ.get("PAPERBACK_STORAGE")
+    if storage_url and Agency.get_instance().storage is None:
+        Agency.get_instance().attach_storage(open_storage(storage_url))
+
+    # PAPERBACK_AUTO_DELIVERY=1 delivers released issues to all subscribers in the background
+    if os.environ.get("PAPERBACK_AUTO_DELIVERY", "").lower() in ("1", "true", "yes"):
+        Agency.get_instance().enable_auto_delivery()
+
+    # PAPERBACK_RELEASE_SCHEDULER=1 releases issues automatically at their release date
+    if os.environ.get("PAPERBACK_RELEASE_SCHEDULER", "").lower() in ("1", "true", "yes"):
+        Agency.get_instance().enable_release_scheduler()
+
+    # PAPERBACK_METRICS=1 serves request, model and object metrics on /metrics; with
+    # PAPERBACK_PROFILE_SAMPLE=0.01 one request in a hundred is profiled and kept on
+    # /metrics/profiles if it took over PAPERBACK_PROFILE_SLOW_MS (default 100)
+    if os.environ.get("PAPERBACK_METRICS", "").lower() in ("1", "true", "yes"):
+        Metrics(profile_sample=float(os.environ.get("PAPERBACK_PROFILE_SAMPLE", 0)),
+                slow_seconds=float(os.environ.get("PAPERBACK_PROFILE_SLOW_MS", 100)) / 1000).init_app(paperroute_app)
+
+    # with a storage shared by several worker processes, e.g.
+    # PAPERBACK_STORAGE=sqlite+shared:///var/paperback.db, every request sees the writes of all workers
+    storage = Agency.get_instance().storage
+    if storage is not None and storage.shared:
+        SharedStateSync(storage).init_app(paperroute_app)
+
+    # GET responses are cached until a model event touches them
+    ResponseCache().init_app(paperroute_app)
+
     # need to extend this class for custom objects, so that they can be jsonified
     paperroute_api = Api(paperroute_app, title="PaperBack: An App for Newspaper Issue and Subscription Management")
 
@@ -19,6 +57,8 @@ def create_app():
     paperroute_api.add_namespace(newspaper_ns)
     paperroute_api.add_namespace(editor_ns)
     paperroute_api.add_namespace(subscriber_ns)
+    paperroute_api.add_namespace(reports_ns)
+    paperroute_api.add_namespace(jobs_ns)
 
     return paperroute_app
 
@@ -1,83 +1,250 @@
-from typing import List, Union, Optional
+import threading
+from typing import Any, Dict, List, Union, Optional
 from flask import jsonify, make_response
 
 from .newspaper import Newspaper
 from .editor import Editor
 from .subscriber import Subscriber
+from .registry import Registry
+from .events import EventBus
+from .locking import write_lock
+from .ids import IdAllocator
+from .analytics import Analytics
+from .jobs import JobQueue
+from .autodelivery import AutoDelivery
+from .scheduler import ReleaseScheduler
+from . import snapshot
 
 class Agency(object):
     singleton_instance = None
+    _instance_lock = threading.Lock()
 
     def __init__(self):
-        self.newspapers: List[Newspaper] = []
-        self.editors: List[Editor] = []
-        self.subscribers: List[Subscriber] = []
+        self.newspapers: Registry[Newspaper] = Registry(key="paper_id")
+        self.editors: Registry[Editor] = Registry(key="id")
+        self.subscribers: Registry[Subscriber] = Registry(key="id")
+        self.storage = None
+        self.ids = IdAllocator()
+        self.jobs = JobQueue(self.ids)
+        self.auto_delivery: Optional[AutoDelivery] = None
+        self.release_scheduler: Optional[ReleaseScheduler] = None
+        self._analytics: Optional[Analytics] = None
+        # keeps the secondary indexes of the registries current
+        EventBus.get_instance().subscribe("newspaper_updated", self._on_newspaper_updated, weak=True)
+        EventBus.get_instance().subscribe("issue_released", self._on_issue_released, weak=True)
+
     @staticmethod
     def get_instance():
         if Agency.singleton_instance is None:
-            Agency.singleton_instance = Agency()
+            with Agency._instance_lock:
+                if Agency.singleton_instance is None:
+                    Agency.singleton_instance = Agency()
 
         return Agency.singleton_instance
 
+    def attach_storage(self, storage) -> None:
+        # recovers the agency from the storage and logs every later mutation
+        storage.open(self)
+        self.reset_analytics()
+        EventBus.get_instance().emit("agency_restored", agency=self)
+        self.storage = storage
+        self.ids.use(storage.reserve_ids)
+        self.jobs.attach_storage(storage)
+
+    def _on_newspaper_updated(self, event: str, payload: Dict[str, Any]) -> None:
+        self.newspapers.refresh(payload["paper"])
+
+    def _on_issue_released(self, event: str, payload: Dict[str, Any]) -> None:
+        issue = payload["issue"]
+        editor = self.editors.get(issue.editor_id)
+        if editor is not None:
+            editor.work_on_issues.refresh(issue)
+
+    def enable_auto_delivery(self, batch_size: int = 10000) -> None:
+        # released issues are then delivered to all subscribers in the background
+        if self.auto_delivery is None:
+            self.auto_delivery = AutoDelivery(self, batch_size=batch_size)
+            self.auto_delivery.start()
+
+    def disable_auto_delivery(self) -> None:
+        if self.auto_delivery is not None:
+            self.auto_delivery.stop()
+            self.auto_delivery = None
+
+    def enable_release_scheduler(self, batch_size: int = 1000) -> None:
+        # unreleased issues are then released at their release date
+        if self.release_scheduler is None:
+            self.release_scheduler = ReleaseScheduler(self, batch_size=batch_size)
+            self.release_scheduler.start()
+
+    def disable_release_scheduler(self) -> None:
+        if self.release_scheduler is not None:
+            self.release_scheduler.stop()
+            self.release_scheduler = None
+
+    @property
+    def analytics(self) -> Analytics:
+        # columnar mirror for the reports, built on first use
+        if self._analytics is None:
+            with write_lock:
+                if self._analytics is None:
+                    self._analytics = Analytics(self)
+        return self._analytics
+
+    def reset_analytics(self) -> None:
+        # needed after changing the registries directly, without events
+        if self._analytics is not None:
+            self._analytics.close()
+            self._analytics = None
+
+    def snapshot(self, path: str) -> None:
+        # compact, columnar binary image of the whole object graph; writers
+        # wait while it is taken, so the image is consistent
+        with write_lock:
+            snapshot.write_snapshot(self, path)
+
+    def restore(self, path: str) -> None:
+        # replaces the agency's data with a snapshot; deliveries stay in the mapped file
+        with write_lock:
+            self.reset_analytics()
+            self.newspapers.clear()
+            self.editors.clear()
+            self.subscribers.clear()
+            snapshot.read_snapshot(self, path)
+            EventBus.get_instance().emit("agency_restored", agency=self)
+
     def add_newspaper(self, new_paper: Newspaper):
-        #TODO: assert that ID does not exist  yet (or create a new one)
-        for newspaper in self.newspapers:
-            if newspaper.paper_id == new_paper.paper_id:
+        with write_lock:
+            if self.newspapers.get(new_paper.paper_id) is not None:
                 raise ValueError(f'A newspaper with ID {new_paper.paper_id} already exists')
-        else:
             self.newspapers.append(new_paper)
+            EventBus.get_instance().emit("newspaper_added", paper=new_paper)
+
+    def add_newspapers(self, new_papers: List[Newspaper]) -> None:
+        # all or nothing: no paper is added if one of the IDs is taken
+        with write_lock:
+            self._check_new(self.newspapers, new_papers, "paper_id", "A newspaper")
+            for new_paper in new_papers:
+                self.newspapers.append(new_paper)
+                EventBus.get_instance().emit("newspaper_added", paper=new_paper)
+
+    @staticmethod
+    def _check_new(registry: Registry, items: List, key: str, kind: str) -> None:
+        seen = set()
+        for item in items:
+            item_id = getattr(item, key)
+            if item_id in seen or registry.get(item_id) is not None:
+                raise ValueError(f'{kind} with ID {item_id} already exists')
+            seen.add(item_id)
 
     def get_newspaper(self, paper_id: Union[int,str]) -> Optional[Newspaper]:
-        for paper in self.newspapers:
-            if paper.paper_id == paper_id:
-                return paper
-        return None
+        return self.newspapers.get(paper_id)
 
     def all_newspapers(self) -> List[Newspaper]:
-        return self.newspapers
+        return list(self.newspapers)
 
     def remove_newspaper(self, paper: Newspaper):
-        if paper in self.newspapers:
-            self.newspapers.remove(paper)
+        with write_lock:
+            if paper not in self.newspapers:
+                return
+            self.newspapers.discard(paper)
+            for subscriber in paper.subscribers:
+                subscriber.subscribed_newspapers.discard(paper)
+                subscriber.refresh_monthly_cost()
+            paper.subscribers.clear()
+            for subscriber_id in paper.deliveries.subscriber_ids():
+                subscriber = self.subscribers.get(subscriber_id)
+                if subscriber is not None:
+                    subscriber.delivered_by.discard(paper)
+                    subscriber.forget_received(paper.paper_id)
+            EventBus.get_instance().emit("newspaper_removed", paper=paper)
                 
 
-    def get_editors(self):
-        return self.editors
+    def get_editors(self) -> List[Editor]:
+        return list(self.editors)
 
-    def get_editor(self, editor_id):
-        for editor in self.editors:
-            if editor.id == editor_id:
-                return editor
-        return None
+    def get_editor(self, editor_id) -> Optional[Editor]:
+        return self.editors.get(editor_id)
     
     def add_editor(self, new_editor: Editor):
-        for editor in self.editors:
-            if editor.id ==  new_editor.id:
+        with write_lock:
+            if self.editors.get(new_editor.id) is not None:
                 raise ValueError(f'An editor with ID {new_editor.id} already exists')
-        else:
             self.editors.append(new_editor)
+            EventBus.get_instance().emit("editor_added", editor=new_editor)
     
+    def add_editors(self, new_editors: List[Editor]) -> None:
+        with write_lock:
+            self._check_new(self.editors, new_editors, "id", "An editor")
+            for new_editor in new_editors:
+                self.editors.append(new_editor)
+                EventBus.get_instance().emit("editor_added", editor=new_editor)
+
     def delete_editor(self, editor:Editor) -> None:
-        self.editors.remove(editor)
+        with write_lock:
+            self.editors.remove(editor)
+            EventBus.get_instance().emit("editor_removed", editor=editor)
 
-    def get_subscribers(self):
-        return self.subscribers
+    def get_subscribers(self) -> List[Subscriber]:
+        return list(self.subscribers)
     
-    def get_subscriber(self, subscriebr_id):
-        for subscruber in self.subscribers:
-            if subscruber.id == subscriebr_id:
-                return subscruber
-        return None
+    def get_subscriber(self, subscriber_id) -> Optional[Subscriber]:
+        return self.subscribers.get(subscriber_id)
     
-    def add_subscriber(self, new_subscriber):
-        for subcriber in self.subscribers:
-            if subcriber.id ==  new_subscriber.id:
+    def add_subscriber(self, new_subscriber: Subscriber):
+        with write_lock:
+            if self.subscribers.get(new_subscriber.id) is not None:
                 raise ValueError(f'A subscriber with ID {new_subscriber.id} already exists')
-        else:
             self.subscribers.append(new_subscriber)
-    def remove_subscriber(self, subscriber):
-        if subscriber in self.subscribers:
-            self.subscribers.remove(subscriber)
+            EventBus.get_instance().emit("subscriber_added", subscriber=new_subscriber)
+
+    def add_subscribers(self, new_subscribers: List[Subscriber]) -> None:
+        with write_lock:
+            self._check_new(self.subscribers, new_subscribers, "id", "A subscriber")
+            for new_subscriber in new_subscribers:
+                self.subscribers.append(new_subscriber)
+                EventBus.get_instance().emit("subscriber_added", subscriber=new_subscriber)
+
+    def remove_subscriber(self, subscriber: Subscriber):
+        with write_lock:
+            if subscriber not in self.subscribers:
+                return
+            self.subscribers.discard(subscriber)
+            for paper in subscriber.subscribed_newspapers:
+                paper.subscribers.discard(subscriber)
+            subscriber.subscribed_newspapers.clear()
+            for paper in subscriber.delivered_by:
+                paper.deliveries.discard_subscriber(subscriber.id)
+            subscriber.delivered_by.clear()
+            EventBus.get_instance().emit("subscriber_removed", subscriber=subscriber)
+
+    def reconcile_deliveries(self, batch_size: int = 10000, progress=None) -> Dict[str, Any]:
+        """Send every released issue to the subscribers of its paper that miss it.
+
+        The gaps are computed per issue as one set difference (subscribers of
+        the paper minus recipients of the issue) and delivered in batches,
+        so other writers get the lock between two batches. `progress` is
+        called with the running totals after every issue.
+        """
+        checked = 0
+        sent = 0
+        deliveries = []
+        for paper in self.newspapers:
+            for issue in paper.issues:
+                if not issue.released:
+                    continue
+                checked += 1
+                with write_lock:
+                    missing = paper.deliveries.undelivered(issue.id, paper.subscribers.keys())
+                    subscribers = [paper.subscribers.get(subscriber_id) for subscriber_id in missing]
+                if subscribers:
+                    result = issue.send_issue_to_all(subscribers, batch_size=batch_size)
+                    if result["sent"]:
+                        sent += result["sent"]
+                        deliveries.append({"paper_id": paper.paper_id, "issue_id": issue.id, "sent": result["sent"]})
+                if progress is not None:
+                    progress({"issues_checked": checked, "sent": sent})
+        return {"issues_checked": checked, "sent": sent, "deliveries": deliveries}
 
     
 
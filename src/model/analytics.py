@@ -0,0 +1,285 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .events import EventBus
+from .locking import read_lock, write_lock
+
+
+class _Table(object):
+    """Growable set of equally long NumPy columns with a liveness mask.
+
+    Rows are only ever appended; removed rows are masked out and dropped by
+    compact() once they make up half of the table.
+    """
+
+    def __init__(self, **dtypes):
+        self._columns = {name: np.empty(1024, dtype) for name, dtype in dtypes.items()}
+        self._columns["alive"] = np.empty(1024, bool)
+        self._size = 0
+        self.dead = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __getattr__(self, name: str) -> np.ndarray:
+        try:
+            return self.__dict__["_columns"][name][:self.__dict__["_size"]]
+        except KeyError:
+            raise AttributeError(name)
+
+    def extend(self, count: int, **values) -> int:
+        # returns the index of the first new row
+        start, end = self._size, self._size + count
+        capacity = len(self._columns["alive"])
+        if end > capacity:
+            capacity = max(2 * capacity, end)
+            for name, column in self._columns.items():
+                grown = np.empty(capacity, column.dtype)
+                grown[:start] = column[:start]
+                self._columns[name] = grown
+        for name, value in values.items():
+            self._columns[name][start:end] = value
+        self._columns["alive"][start:end] = True
+        self._size = end
+        return start
+
+    def kill(self, mask: np.ndarray) -> None:
+        alive = self.alive
+        self.dead += int(np.count_nonzero(alive & mask))
+        alive &= ~mask
+
+    def kill_row(self, row: int) -> None:
+        if self.alive[row]:
+            self.alive[row] = False
+            self.dead += 1
+
+    def needs_compaction(self) -> bool:
+        return self.dead > 1024 and 2 * self.dead > self._size
+
+    def compact(self) -> np.ndarray:
+        # returns the old index of every remaining row
+        kept = np.flatnonzero(self.alive)
+        for name, column in self._columns.items():
+            column[:len(kept)] = column[kept]
+        self._size = len(kept)
+        self.dead = 0
+        return kept
+
+
+class Analytics(object):
+    """Columnar mirror of the agency for agency-wide reports.
+
+    Subscriptions, issues and deliveries are kept as NumPy columns of dense
+    integer codes, fed by the model events, so the reports are vectorized
+    group-bys instead of walks over the object graph. The mirror is built
+    from the agency once and follows it from then on; the agency drops it
+    when its data is replaced wholesale.
+    """
+
+    def __init__(self, agency):
+        self._agency = agency
+        self._paper_codes: Dict[int, int] = {}
+        self._subscriber_codes: Dict[int, int] = {}
+        self._subscription_rows: Dict[Tuple[int, int], int] = {}
+        self._issue_rows: Dict[Tuple[int, int], int] = {}
+        self._subscriptions = _Table(paper=np.int32, subscriber=np.int64)
+        self._issues = _Table(paper=np.int32, id=np.int64, editor=np.int64)
+        self._deliveries = _Table(issue=np.int64, subscriber=np.int64)
+        with write_lock:
+            self._load()
+            EventBus.get_instance().subscribe("subscribed", self._on_subscribed)
+            EventBus.get_instance().subscribe("unsubscribed", self._on_unsubscribed)
+            EventBus.get_instance().subscribe("subscriber_removed", self._on_subscriber_removed)
+            EventBus.get_instance().subscribe("newspaper_removed", self._on_newspaper_removed)
+            EventBus.get_instance().subscribe("issue_added", self._on_issue_added)
+            EventBus.get_instance().subscribe("editor_assigned", self._on_editor_assigned)
+            EventBus.get_instance().subscribe("issue_delivered", self._on_issue_delivered)
+
+    def close(self) -> None:
+        for event, handler in (("subscribed", self._on_subscribed), ("unsubscribed", self._on_unsubscribed),
+                               ("subscriber_removed", self._on_subscriber_removed),
+                               ("newspaper_removed", self._on_newspaper_removed),
+                               ("issue_added", self._on_issue_added),
+                               ("editor_assigned", self._on_editor_assigned),
+                               ("issue_delivered", self._on_issue_delivered)):
+            EventBus.get_instance().unsubscribe(event, handler)
+
+    # -- codes -------------------------------------------------------------
+
+    def _paper_code(self, paper_id: int) -> int:
+        code = self._paper_codes.get(paper_id)
+        if code is None:
+            code = self._paper_codes[paper_id] = len(self._paper_codes)
+        return code
+
+    def _subscriber_code(self, subscriber_id: int) -> int:
+        code = self._subscriber_codes.get(subscriber_id)
+        if code is None:
+            code = self._subscriber_codes[subscriber_id] = len(self._subscriber_codes)
+        return code
+
+    # -- mirroring ---------------------------------------------------------
+
+    def _load(self) -> None:
+        for paper in self._agency.newspapers:
+            for subscriber in paper.subscribers:
+                self._add_subscription(paper.paper_id, subscriber.id)
+            for issue in paper.issues:
+                self._add_issue(issue)
+                recipients = paper.deliveries.recipients(issue.id)
+                if len(recipients):
+                    self._add_deliveries(issue, recipients.tolist())
+
+    def _owns(self, paper) -> bool:
+        # the event bus is shared by every agency in the process
+        return self._agency.newspapers.get(paper.paper_id) is paper
+
+    def _add_subscription(self, paper_id: int, subscriber_id: int) -> None:
+        key = (self._paper_code(paper_id), self._subscriber_code(subscriber_id))
+        self._subscription_rows[key] = self._subscriptions.extend(1, paper=key[0], subscriber=key[1])
+
+    def _add_issue(self, issue) -> int:
+        key = (self._paper_code(issue.newspaper.paper_id), issue.id)
+        editor = -1 if issue.editor_id is None else issue.editor_id
+        row = self._issue_rows[key] = self._issues.extend(1, paper=key[0], id=issue.id, editor=editor)
+        return row
+
+    def _add_deliveries(self, issue, subscriber_ids) -> None:
+        row = self._issue_rows.get((self._paper_code(issue.newspaper.paper_id), issue.id))
+        if row is None:
+            row = self._add_issue(issue)
+        codes = np.fromiter((self._subscriber_code(subscriber_id) for subscriber_id in subscriber_ids),
+                            np.int64, len(subscriber_ids))
+        self._deliveries.extend(len(codes), issue=row, subscriber=codes)
+
+    def _on_subscribed(self, event: str, payload: Dict[str, Any]) -> None:
+        if self._owns(payload["paper"]):
+            self._add_subscription(payload["paper"].paper_id, payload["subscriber"].id)
+
+    def _on_unsubscribed(self, event: str, payload: Dict[str, Any]) -> None:
+        if not self._owns(payload["paper"]):
+            return
+        key = (self._paper_codes.get(payload["paper"].paper_id), self._subscriber_codes.get(payload["subscriber"].id))
+        row = self._subscription_rows.pop(key, None)
+        if row is not None:
+            self._subscriptions.kill_row(row)
+            self._compact()
+
+    def _on_subscriber_removed(self, event: str, payload: Dict[str, Any]) -> None:
+        subscriber = payload["subscriber"]
+        code = self._subscriber_codes.get(subscriber.id)
+        if code is None or self._agency.subscribers.get(subscriber.id) is not None:
+            return
+        self._subscriptions.kill(self._subscriptions.subscriber == code)
+        self._deliveries.kill(self._deliveries.subscriber == code)
+        self._compact()
+
+    def _on_newspaper_removed(self, event: str, payload: Dict[str, Any]) -> None:
+        paper = payload["paper"]
+        code = self._paper_codes.get(paper.paper_id)
+        if code is None or self._agency.newspapers.get(paper.paper_id) is not None:
+            return
+        self._subscriptions.kill(self._subscriptions.paper == code)
+        self._deliveries.kill(self._issues.paper[self._deliveries.issue] == code)
+        self._issues.kill(self._issues.paper == code)
+        self._compact()
+
+    def _on_issue_added(self, event: str, payload: Dict[str, Any]) -> None:
+        if self._owns(payload["issue"].newspaper):
+            self._add_issue(payload["issue"])
+
+    def _on_editor_assigned(self, event: str, payload: Dict[str, Any]) -> None:
+        issue = payload["issue"]
+        if self._owns(issue.newspaper):
+            row = self._issue_rows.get((self._paper_code(issue.newspaper.paper_id), issue.id))
+            if row is not None:
+                self._issues.editor[row] = payload["editor"].id
+
+    def _on_issue_delivered(self, event: str, payload: Dict[str, Any]) -> None:
+        if self._owns(payload["issue"].newspaper):
+            self._add_deliveries(payload["issue"], payload["subscriber_ids"])
+
+    def _compact(self) -> None:
+        if self._subscriptions.needs_compaction():
+            self._subscriptions.compact()
+            self._subscription_rows = dict(zip(zip(self._subscriptions.paper.tolist(),
+                                                   self._subscriptions.subscriber.tolist()),
+                                               range(len(self._subscriptions))))
+        if self._issues.needs_compaction():
+            # deliveries reference issue rows, so they are renumbered too
+            self._deliveries.kill(~self._issues.alive[self._deliveries.issue])
+            renumbered = np.full(len(self._issues), -1, np.int64)
+            kept = self._issues.compact()
+            renumbered[kept] = np.arange(len(kept))
+            self._deliveries.issue[:] = renumbered[self._deliveries.issue]
+            self._issue_rows = dict(zip(zip(self._issues.paper.tolist(), self._issues.id.tolist()),
+                                        range(len(self._issues))))
+        if self._deliveries.needs_compaction():
+            self._deliveries.compact()
+
+    # -- reports -----------------------------------------------------------
+
+    def _papers(self) -> List[Tuple[int, Any]]:
+        # (code, paper) of every newspaper of the agency; reports only read,
+        # so papers the mirror never saw share the code after the last one,
+        # which has no rows
+        unseen = len(self._paper_codes)
+        return [(self._paper_codes.get(paper.paper_id, unseen), paper) for paper in self._agency.newspapers]
+
+    def _subscribers_per_paper(self) -> np.ndarray:
+        subscriptions = self._subscriptions
+        return np.bincount(subscriptions.paper[subscriptions.alive], minlength=len(self._paper_codes) + 1)
+
+    def subscribers_per_paper(self) -> List[Dict[str, Any]]:
+        with read_lock:
+            papers = self._papers()
+            counts = self._subscribers_per_paper()
+            return [{"paper_id": paper.paper_id, "name": paper.name, "subscribers": int(counts[code])}
+                    for code, paper in papers]
+
+    def revenue_per_paper(self) -> List[Dict[str, Any]]:
+        with read_lock:
+            papers = self._papers()
+            counts = self._subscribers_per_paper()
+            prices = np.zeros(len(counts))
+            for code, paper in papers:
+                prices[code] = paper.price
+            monthly = counts * prices
+            return [{"paper_id": paper.paper_id, "name": paper.name, "subscribers": int(counts[code]),
+                     "monthly_revenue": float(monthly[code]), "annual_revenue": float(12 * monthly[code])}
+                    for code, paper in papers]
+
+    def delivery_completeness(self) -> List[Dict[str, Any]]:
+        # share of each issue's current subscribers that received it
+        with read_lock:
+            papers = self._papers()
+            subscriptions, issues, deliveries = self._subscriptions, self._issues, self._deliveries
+            width = max(len(self._subscriber_codes), 1)
+            subscribed = (subscriptions.paper[subscriptions.alive].astype(np.int64) * width
+                          + subscriptions.subscriber[subscriptions.alive])
+            alive = deliveries.alive
+            delivery_issues = deliveries.issue[alive]
+            delivered_to = issues.paper[delivery_issues].astype(np.int64) * width + deliveries.subscriber[alive]
+            received = np.bincount(delivery_issues[np.isin(delivered_to, subscribed)], minlength=len(issues))
+            counts = self._subscribers_per_paper()
+
+            report = []
+            for code, paper in papers:
+                for issue in paper.issues:
+                    row = self._issue_rows.get((code, issue.id))
+                    delivered = int(received[row]) if row is not None else 0
+                    subscribers = int(counts[code])
+                    report.append({"paper_id": paper.paper_id, "issue_id": issue.id, "name": issue.name,
+                                   "released": issue.released, "delivered": delivered,
+                                   "subscribers": subscribers,
+                                   "completeness": delivered / subscribers if subscribers else None})
+            return report
+
+    def issues_per_editor(self) -> List[Dict[str, Any]]:
+        with read_lock:
+            issues = self._issues
+            editor_ids, counts = np.unique(issues.editor[issues.alive & (issues.editor >= 0)], return_counts=True)
+            per_editor = dict(zip(editor_ids.tolist(), counts.tolist()))
+            return [{"editor_id": editor.id, "name": editor.name, "issues": per_editor.get(editor.id, 0)}
+                    for editor in self._agency.editors]
@@ -0,0 +1,33 @@
+from typing import Any, Dict
+
+from .events import EventBus
+from .locking import write_lock
+
+
+class AutoDelivery(object):
+    """Delivers every newly released issue to the current subscribers of its paper.
+
+    The delivery runs as a job of the agency's job queue, which is submitted
+    once the releasing writer has dropped the write lock, so releasing an
+    issue takes the same time whatever the size of the audience.
+    """
+
+    def __init__(self, agency, batch_size: int = 10000):
+        self._agency = agency
+        self.batch_size = batch_size
+
+    def start(self) -> None:
+        EventBus.get_instance().subscribe("issue_released", self._on_released)
+
+    def stop(self) -> None:
+        EventBus.get_instance().unsubscribe("issue_released", self._on_released)
+
+    def _on_released(self, event: str, payload: Dict[str, Any]) -> None:
+        issue = payload["issue"]
+        paper = issue.newspaper
+        # the event bus is shared by every agency in the process; a replayed
+        # release was delivered by the process that released the issue
+        if payload.get("replayed") or self._agency.get_newspaper(paper.paper_id) is not paper:
+            return
+        write_lock.after_release(lambda: self._agency.jobs.submit("autodeliver", lambda progress: (
+            issue.send_issue_to_all(paper.subscribers, batch_size=self.batch_size, progress=progress))))
@@ -0,0 +1,22 @@
+import datetime
+from typing import Any, Optional
+
+
+def date_value(value: Any) -> Optional[datetime.datetime]:
+    """The naive UTC datetime of an ISO 8601 date, or None if it is not one.
+
+    Dates without a time zone are taken to be UTC, wherever they are read.
+    """
+    if isinstance(value, datetime.datetime):
+        parsed = value
+    elif isinstance(value, datetime.date):
+        parsed = datetime.datetime(value.year, value.month, value.day)
+    else:
+        try:
+            parsed = datetime.datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+        except ValueError:
+            return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return parsed
+
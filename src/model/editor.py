@@ -2,15 +2,28 @@ from typing import List, Union, Optional
 from flask import jsonify, make_response
 
 from .issue import Issue
+from .registry import Registry
+from .events import EventBus
+from .locking import write_lock
+from .strings import intern_text
 
 class Editor(object):
+    __slots__ = ("name", "id", "work_on_issues")
+
     def __init__(self, name: str, id: int) -> None:
-        self.name = name
+        self.name = intern_text(name)
         self.id = id
-        self.work_on_issues: List[Issue] = []
+        # issue IDs repeat across newspapers, so the issues are keyed by
+        # (paper ID, issue ID)
+        self.work_on_issues: Registry[Issue] = Registry(key="agency_key")
+
+    def update(self, name: str) -> None:
+        with write_lock:
+            self.name = intern_text(name)
+            EventBus.get_instance().emit("editor_updated", editor=self)
 
-    def get_issues(self):
-        return self.work_on_issues
+    def get_issues(self) -> List[Issue]:
+        return list(self.work_on_issues)
 
     
         
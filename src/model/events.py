@@ -0,0 +1,64 @@
+import threading
+import weakref
+from typing import Any, Callable, Dict, List
+
+Handler = Callable[[str, Dict[str, Any]], None]
+
+ALL_EVENTS = "*"
+
+
+class EventBus(object):
+    """Publishes the mutations of the model layer to whoever listens.
+
+    Handlers are called synchronously with the event name and its payload.
+    Handlers registered for ALL_EVENTS receive every event.
+    """
+    singleton_instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    @staticmethod
+    def get_instance():
+        if EventBus.singleton_instance is None:
+            with EventBus._instance_lock:
+                if EventBus.singleton_instance is None:
+                    EventBus.singleton_instance = EventBus()
+
+        return EventBus.singleton_instance
+
+    def subscribe(self, event: str, handler: Handler, weak: bool = False) -> None:
+        # a weak subscription of a bound method does not keep its object
+        # alive and ends when the object is collected
+        if weak:
+            method = weakref.WeakMethod(handler)
+
+            def forward(event: str, payload: Dict[str, Any]) -> None:
+                target = method()
+                if target is None:
+                    self._remove(subscribed, forward)
+                else:
+                    target(event, payload)
+            forward.weak_target = method
+            subscribed = event
+            handler = forward
+        self._handlers.setdefault(event, []).append(handler)
+
+    def unsubscribe(self, event: str, handler: Handler) -> None:
+        for subscribed in tuple(self._handlers.get(event, ())):
+            target = getattr(subscribed, "weak_target", None)
+            if subscribed == handler or (target is not None and target() == handler):
+                self._remove(event, subscribed)
+                return
+
+    def _remove(self, event: str, handler: Handler) -> None:
+        handlers = self._handlers.get(event, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def emit(self, event: str, **payload) -> None:
+        for handler in tuple(self._handlers.get(event, ())):
+            handler(event, payload)
+        for handler in tuple(self._handlers.get(ALL_EVENTS, ())):
+            handler(event, payload)
@@ -0,0 +1,81 @@
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# reserve(sequence, count, start) -> first ID of a block of `count` IDs that
+# nobody else will hand out; `start` is the first ID of a new sequence
+Reserve = Callable[[str, int, int], int]
+
+FIRST_ID = 10000000
+
+
+class IdAllocator(object):
+    """Hands out the IDs of new entities from monotonic, per-kind sequences.
+
+    IDs are reserved in blocks from a shared source, so allocating one is
+    O(1) and the allocator only remembers the rest of its current block.
+    With the agency's storage as the source, the reservation is atomic across
+    processes and survives restarts; without one, the sequences live in
+    this process only.
+    """
+
+    def __init__(self, reserve: Optional[Reserve] = None, block_size: int = 100):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._reserve = reserve or self._reserve_locally
+        self._blocks: Dict[str, Tuple[int, int]] = {}
+        self._local: Dict[str, int] = {}
+        self._generation = 0
+
+    def use(self, reserve: Optional[Reserve]) -> None:
+        # switches the source; the rest of the current blocks is dropped
+        with self._lock:
+            self._reserve = reserve or self._reserve_locally
+            self._blocks.clear()
+            self._generation += 1
+
+    def next_id(self, sequence: str, lookup: Optional[Callable[[int], Any]] = None) -> int:
+        # lookup(id) returns the entity using an ID, if any; IDs of entities
+        # that were not created through the allocator are skipped
+        while True:
+            with self._lock:
+                new_id, end = self._blocks.get(sequence, (0, 0))
+                if new_id < end:
+                    self._blocks[sequence] = (new_id + 1, end)
+                    if lookup is None or lookup(new_id) is None:
+                        return new_id
+                    continue
+            self._refill(sequence, self.block_size)
+
+    def next_ids(self, sequence: str, count: int, lookup: Optional[Callable[[int], Any]] = None) -> List[int]:
+        # `count` IDs at once, reserving whatever the current block lacks
+        # as one block
+        ids: List[int] = []
+        while len(ids) < count:
+            with self._lock:
+                new_id, end = self._blocks.get(sequence, (0, 0))
+                if new_id < end:
+                    taken = min(end, new_id + count - len(ids))
+                    self._blocks[sequence] = (taken, end)
+                    ids.extend(candidate for candidate in range(new_id, taken)
+                               if lookup is None or lookup(candidate) is None)
+                    continue
+            self._refill(sequence, max(count - len(ids), self.block_size))
+        return ids
+
+    def _refill(self, sequence: str, size: int) -> None:
+        # the reservation runs without the lock: a shared source waits for
+        # the database's write lock, whose holder may be waiting for ours
+        with self._lock:
+            reserve, generation = self._reserve, self._generation
+        first = reserve(sequence, size, FIRST_ID)
+        with self._lock:
+            new_id, end = self._blocks.get(sequence, (0, 0))
+            # unless another thread refilled the block meanwhile; the IDs of
+            # this reservation are then left unused
+            if new_id >= end and generation == self._generation:
+                self._blocks[sequence] = (first, first + size)
+
+    def _reserve_locally(self, sequence: str, count: int, start: int) -> int:
+        first = self._local.get(sequence, start)
+        self._local[sequence] = first + count
+        return first
@@ -0,0 +1,115 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from .dates import date_value
+
+class _Last(object):
+    # sorts after every key, whatever its type, so (value, _LAST) bounds all
+    # entries with that value
+    __slots__ = ()
+
+    def __lt__(self, other: Any) -> bool:
+        return False
+
+    def __gt__(self, other: Any) -> bool:
+        return True
+
+
+_LAST = _Last()
+
+# the sortable form of a missing value; missing values sort first
+MISSING = (0, 0)
+
+
+def sortable(value: Any) -> Tuple:
+    return MISSING if value is None else (1, value)
+
+
+# how the values of an attribute are compared, if not as they are
+NORMALIZERS: Dict[str, Callable[[Any], Any]] = {"releasedate": date_value}
+
+
+class SortedIndex(object):
+    """Sorted (value, key) pairs of one attribute of the entities of a registry.
+
+    Range lookups bisect the pairs, so they take O(log n + k). Inserting,
+    removing or changing an entry shifts the list, which is a memmove and
+    cheap next to the Python work around it. Missing values sort first.
+    """
+    __slots__ = ("attribute", "_normalize", "_entries", "_values")
+
+    def __init__(self, attribute: str, normalize: Optional[Callable[[Any], Any]] = None):
+        self.attribute = attribute
+        self._normalize = normalize or NORMALIZERS.get(attribute)
+        self._entries: List[Tuple[Tuple, Hashable]] = []
+        self._values: Dict[Hashable, Tuple] = {}
+
+    def _value_of(self, item: Any) -> Tuple:
+        value = getattr(item, self.attribute, None)
+        if value is not None and self._normalize is not None:
+            value = self._normalize(value)
+        return sortable(value)
+
+    def build(self, items: Dict[Hashable, Any]) -> None:
+        self._values = {key: self._value_of(item) for key, item in items.items()}
+        self._entries = sorted((value, key) for key, value in self._values.items())
+
+    def add(self, key: Hashable, item: Any) -> None:
+        value = self._value_of(item)
+        old = self._values.get(key)
+        if old == value:
+            return
+        if old is not None:
+            self._remove(old, key)
+        self._values[key] = value
+        insort(self._entries, (value, key))
+
+    def discard(self, key: Hashable) -> None:
+        old = self._values.pop(key, None)
+        if old is not None:
+            self._remove(old, key)
+
+    def _remove(self, value: Tuple, key: Hashable) -> None:
+        position = bisect_left(self._entries, (value, key))
+        del self._entries[position]
+
+    def bounds(self, low: Any = None, high: Any = None, high_inclusive: bool = True) -> Tuple[int, int]:
+        # positions of the entries with low <= value <= high (or < high);
+        # None leaves that side open, but missing values are never included
+        start = bisect_right(self._entries, (MISSING, _LAST)) if low is None \
+            else bisect_left(self._entries, (sortable(self.normalize(low)),))
+        if high is None:
+            end = len(self._entries)
+        elif high_inclusive:
+            end = bisect_right(self._entries, (sortable(self.normalize(high)), _LAST))
+        else:
+            end = bisect_left(self._entries, (sortable(self.normalize(high)),))
+        return start, max(start, end)
+
+    def normalize(self, value: Any) -> Any:
+        return value if value is None or self._normalize is None else self._normalize(value)
+
+    def count(self, low: Any = None, high: Any = None, high_inclusive: bool = True) -> int:
+        start, end = self.bounds(low, high, high_inclusive)
+        return end - start
+
+    def keys(self, start: int = 0, end: Optional[int] = None, descending: bool = False) -> Iterator[Hashable]:
+        entries = self._entries
+        end = len(entries) if end is None else end
+        positions = range(end - 1, start - 1, -1) if descending else range(start, end)
+        return (entries[position][1] for position in positions)
+
+    def position(self, key: Hashable, descending: bool = False) -> int:
+        # where a scan continues after `key`: the position of the next entry,
+        # or, descending, one past it
+        entry = (self._values[key], key)
+        return bisect_left(self._entries, entry) if descending else bisect_right(self._entries, entry)
+
+    def sort_key(self, key: Hashable) -> Tuple:
+        return self._values[key]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._values
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,29 +1,77 @@
-from typing import List, Union, Optional
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, List, Union, Optional
 from flask import jsonify, make_response
 
 from .subscriber import Subscriber
+from .ledger import DeliveryLedger, Recipients
+from .events import EventBus
+from .locking import write_lock
+from .strings import intern_text
 class Issue(object):
+    __slots__ = ("name", "id", "releasedate", "released", "editor_id", "newspaper")
 
     def __init__(self, name, id,  releasedate, released: bool = False):
-        self.name = name
+        self.name = intern_text(name)
         self.id = id
-        self.releasedate = releasedate
+        self.releasedate = intern_text(releasedate)
         self.released: bool = released
         self.editor_id = None
-        self.send_to: List[Subscriber] = []
         self.newspaper = None
 
+    @property
+    def agency_key(self):
+        # issue IDs are only unique within their newspaper
+        return (None if self.newspaper is None else self.newspaper.paper_id, self.id)
+
+    @property
+    def deliveries(self) -> DeliveryLedger:
+        if self.newspaper is None:
+            raise ValueError(f"Issue with ID {self.id} does not belong to a newspaper")
+        return self.newspaper.deliveries
+
+    @property
+    def send_to(self) -> Recipients:
+        return Recipients(self.deliveries, self.id)
+
     def set_editor(self, editor) -> None:
-        self.editor_id = editor.id
-        if self not in editor.work_on_issues:
-            editor.work_on_issues.append(self)
+        with write_lock:
+            self.editor_id = editor.id
+            if self.newspaper is not None:
+                self.newspaper.issues.refresh(self)
+            if self not in editor.work_on_issues:
+                editor.work_on_issues.append(self)
+            EventBus.get_instance().emit("editor_assigned", issue=self, editor=editor)
 
     def send_issue(self, new_subscriber: Subscriber):
-        for subscriber in self.send_to:
-            if subscriber.id == new_subscriber.id:
-                return jsonify(f"Issue was alredy sent to subscriber with ID{subscriber.id}")
-        self.send_to.append(new_subscriber)
-        new_subscriber.recieved_issues.append(self)
+        with write_lock:
+            if not self.deliveries.record(self.id, new_subscriber.id):
+                return jsonify(f"Issue was alredy sent to subscriber with ID{new_subscriber.id}")
+            new_subscriber.received_from(self.newspaper)
+            EventBus.get_instance().emit("issue_delivered", issue=self, subscriber_ids=[new_subscriber.id])
+
+    def send_issue_to_all(self, subscribers: Iterable[Subscriber], batch_size: int = 10000,
+                          progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+        sent = 0
+        already_delivered = 0
+        remaining = iter(subscribers)
+        while True:
+            batch = {subscriber.id: subscriber for subscriber in islice(remaining, batch_size)}
+            if not batch:
+                break
+            # other writers may run between two batches
+            with write_lock:
+                new_ids = self.deliveries.record_many(self.id, batch.keys())
+                for subscriber_id in new_ids:
+                    batch[subscriber_id].received_from(self.newspaper)
+                if new_ids:
+                    EventBus.get_instance().emit("issue_delivered", issue=self, subscriber_ids=list(new_ids))
+            sent += len(new_ids)
+            already_delivered += len(batch) - len(new_ids)
+            if progress is not None:
+                progress({"sent": sent, "already_delivered": already_delivered})
+        if sent:
+            self.deliveries.compact(self.id)
+        return {"sent": sent, "already_delivered": already_delivered}
 
 
         
@@ -0,0 +1,151 @@
+import datetime
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+QUEUED = "queued"
+RUNNING = "running"
+FINISHED = "finished"
+FAILED = "failed"
+
+Progress = Callable[[Dict[str, Any]], None]
+
+
+def _now() -> str:
+    return datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+class Job(object):
+    def __init__(self, id: int, kind: str, status: str = QUEUED, progress: Optional[Dict[str, Any]] = None,
+                 result: Any = None, error: Optional[str] = None, created: Optional[str] = None,
+                 started: Optional[str] = None, finished: Optional[str] = None):
+        self.id = id
+        self.kind = kind
+        self.status = status
+        self.progress = progress or {}
+        self.result = result
+        self.error = error
+        self.created = created or _now()
+        self.started = started
+        self.finished = finished
+        self._done = threading.Event()
+        if status in (FINISHED, FAILED):
+            self._done.set()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"id": self.id, "kind": self.kind, "status": self.status, "progress": dict(self.progress),
+                "result": self.result, "error": self.error, "created": self.created,
+                "started": self.started, "finished": self.finished}
+
+
+class JobQueue(object):
+    """Runs long operations on a pool of worker threads.
+
+    A job is a function that gets a progress callback and returns a plain,
+    JSON-serializable result. The status of every job is kept in memory and,
+    once a storage is attached, in the storage too (progress at most once per
+    `save_interval` seconds), so it can still be looked up after a restart.
+    Jobs that were queued or running when the process stopped are marked as
+    failed when the storage is attached again, unless other processes share
+    the storage.
+    """
+
+    def __init__(self, ids, workers: int = 4, keep: int = 1000, save_interval: float = 1.0):
+        self.workers = workers
+        self.keep = keep
+        self.save_interval = save_interval
+        self.storage = None
+        self._ids = ids
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Job] = {}
+        self._saved_at: Dict[int, float] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def attach_storage(self, storage) -> None:
+        self.storage = storage
+        if storage.shared:
+            # unfinished jobs may be running in another process
+            return
+        for fields in storage.load_jobs():
+            if fields["status"] in (QUEUED, RUNNING):
+                job = Job(**dict(fields, status=FAILED, error="The job was interrupted by a restart",
+                                 finished=_now()))
+                storage.save_job(job.to_dict())
+
+    def submit(self, kind: str, function: Callable[[Progress], Any]) -> Job:
+        job = Job(id=self._ids.next_id("job"), kind=kind)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._forget_finished()
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="job")
+        self._save(job, force=True)
+        self._executor.submit(self._run, job, function)
+        return job
+
+    def get(self, job_id: int) -> Optional[Job]:
+        job = self._jobs.get(job_id)
+        if job is None and self.storage is not None:
+            fields = self.storage.load_job(job_id)
+            if fields is not None:
+                job = Job(**fields)
+        return job
+
+    def join(self, timeout: Optional[float] = None) -> bool:
+        # waits for every job submitted so far; False on timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for job in list(self._jobs.values()):
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            if not job.wait(remaining):
+                return False
+        return True
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def _run(self, job: Job, function: Callable[[Progress], Any]) -> None:
+        job.status = RUNNING
+        job.started = _now()
+        self._save(job, force=True)
+
+        def report(progress: Dict[str, Any]) -> None:
+            job.progress = dict(progress)
+            self._save(job)
+
+        try:
+            job.result = function(report)
+            job.status = FINISHED
+        except Exception as error:
+            job.error = f"{type(error).__name__}: {error}"
+            job.status = FAILED
+        job.finished = _now()
+        self._save(job, force=True)
+        job._done.set()
+
+    def _save(self, job: Job, force: bool = False) -> None:
+        if self.storage is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job.id, 0) < self.save_interval:
+            return
+        self._saved_at[job.id] = now
+        self.storage.save_job(job.to_dict())
+
+    def _forget_finished(self) -> None:
+        # finished jobs stay in memory up to `keep`; older ones are only
+        # kept in the storage
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(len(finished) - self.keep, 0)]:
+            del self._jobs[job_id]
+            self._saved_at.pop(job_id, None)
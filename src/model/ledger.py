@@ -0,0 +1,217 @@
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+
+from .locking import write_lock
+
+_NO_IDS = np.empty(0, np.int64)
+_NO_IDS.flags.writeable = False
+
+
+class _IssueRecipients(object):
+    """The subscriber IDs one issue was delivered to.
+
+    Most IDs live in a sorted int64 array (8 bytes per delivery). Deliveries
+    and removals since the last compaction are kept in two small sets and
+    folded into the array once they grow, so single updates stay O(1)
+    amortized. The array may be a read-only view into a memory-mapped
+    snapshot.
+    """
+    __slots__ = ("ids", "added", "removed")
+
+    def __init__(self, ids: np.ndarray = _NO_IDS):
+        self.ids = ids
+        self.added: Set[int] = set()
+        self.removed: Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.ids) + len(self.added) - len(self.removed)
+
+    def _in_array(self, subscriber_id: int) -> bool:
+        ids = self.ids
+        position = ids.searchsorted(subscriber_id)
+        return position < len(ids) and ids[position] == subscriber_id
+
+    def __contains__(self, subscriber_id: int) -> bool:
+        if subscriber_id in self.added:
+            return True
+        return subscriber_id not in self.removed and self._in_array(subscriber_id)
+
+    def add(self, subscriber_id: int) -> bool:
+        if subscriber_id in self:
+            return False
+        if subscriber_id in self.removed:
+            self.removed.discard(subscriber_id)
+        else:
+            self.added.add(subscriber_id)
+        self._maybe_compact()
+        return True
+
+    def add_many(self, subscriber_ids: Iterable[int]) -> Set[int]:
+        candidates = set(subscriber_ids)
+        candidates -= self.added
+        resurrected: Set[int] = set()
+        if len(self.ids) and candidates:
+            probe = np.fromiter(candidates, np.int64, len(candidates))
+            in_array = set(probe[np.isin(probe, self.ids)].tolist())
+            if in_array:
+                resurrected = in_array & self.removed
+                self.removed -= resurrected
+                candidates -= in_array
+        self.added |= candidates
+        self._maybe_compact()
+        return candidates | resurrected
+
+    def discard(self, subscriber_id: int) -> bool:
+        if subscriber_id in self.added:
+            self.added.discard(subscriber_id)
+            return True
+        if subscriber_id not in self.removed and self._in_array(subscriber_id):
+            self.removed.add(subscriber_id)
+            self._maybe_compact()
+            return True
+        return False
+
+    def _maybe_compact(self) -> None:
+        # the sets may grow to half the array, so compactions are rare
+        # enough to cost O(log n) amortized per delivery
+        if len(self.added) + len(self.removed) > max(65536, len(self.ids) >> 1):
+            self.compact()
+
+    def compact(self) -> np.ndarray:
+        ids = self.ids
+        if self.removed:
+            removed = np.fromiter(self.removed, np.int64, len(self.removed))
+            ids = ids[~np.isin(ids, removed)]
+        if self.added:
+            ids = np.union1d(ids, np.fromiter(self.added, np.int64, len(self.added)))
+        # readers that run without the lock always see a consistent state:
+        # the new array holds everything the sets held
+        self.ids = ids
+        self.added = set()
+        self.removed = set()
+        return ids
+
+    def sorted_ids(self) -> np.ndarray:
+        if self.added or self.removed:
+            with write_lock:
+                return self.compact()
+        return self.ids
+
+
+class DeliveryLedger(object):
+    """Records which subscribers received which issues of one newspaper.
+
+    Every delivery is a single (issue ID, subscriber ID) pair, kept as an ID
+    array per issue. Issue and Subscriber both read from the same ledger, so
+    recording and checking a delivery stay cheap while a delivery takes
+    about 8 bytes.
+    """
+    __slots__ = ("_issues", "_count")
+
+    def __init__(self):
+        self._issues: Dict[int, _IssueRecipients] = {}
+        self._count = 0
+
+    def load(self, issue_id: int, subscriber_ids) -> None:
+        # subscriber_ids may be a buffer into a snapshot, which is used in
+        # place if it is sorted; it must not contain duplicates
+        ids = np.frombuffer(subscriber_ids, np.int64) if isinstance(subscriber_ids, memoryview) \
+            else np.asarray(subscriber_ids, np.int64)
+        if len(ids) > 1 and not (ids[:-1] < ids[1:]).all():
+            ids = np.unique(ids)
+        recipients = self._issues.get(issue_id)
+        if recipients is None:
+            self._issues[issue_id] = _IssueRecipients(ids)
+            self._count += len(ids)
+        else:
+            self._count += len(recipients.add_many(ids.tolist()))
+
+    def record(self, issue_id: int, subscriber_id: int) -> bool:
+        recipients = self._issues.get(issue_id)
+        if recipients is None:
+            recipients = self._issues[issue_id] = _IssueRecipients()
+        if not recipients.add(subscriber_id):
+            return False
+        self._count += 1
+        return True
+
+    def record_many(self, issue_id: int, subscriber_ids: Iterable[int]) -> Set[int]:
+        # returns the IDs that had not received the issue before
+        recipients = self._issues.get(issue_id)
+        if recipients is None:
+            recipients = self._issues[issue_id] = _IssueRecipients()
+        new_ids = recipients.add_many(subscriber_ids)
+        self._count += len(new_ids)
+        return new_ids
+
+    def delivered(self, issue_id: int, subscriber_id: int) -> bool:
+        recipients = self._issues.get(issue_id)
+        return recipients is not None and subscriber_id in recipients
+
+    def recipients(self, issue_id: int) -> np.ndarray:
+        # sorted subscriber IDs; the array must not be modified
+        recipients = self._issues.get(issue_id)
+        return _NO_IDS if recipients is None else recipients.sorted_ids()
+
+    def compact(self, issue_id: int) -> None:
+        # folds the recent deliveries of an issue into its array, e.g. after
+        # a bulk delivery
+        recipients = self._issues.get(issue_id)
+        if recipients is not None and (recipients.added or recipients.removed):
+            with write_lock:
+                recipients.compact()
+
+    def count(self, issue_id: int) -> int:
+        recipients = self._issues.get(issue_id)
+        return 0 if recipients is None else len(recipients)
+
+    def undelivered(self, issue_id: int, subscriber_ids: Iterable[int]) -> List[int]:
+        # the given subscribers that did not receive the issue
+        probe = np.fromiter(subscriber_ids, np.int64)
+        return probe[~np.isin(probe, self.recipients(issue_id))].tolist()
+
+    def issues_of(self, subscriber_id: int) -> List[int]:
+        return [issue_id for issue_id, recipients in list(self._issues.items())
+                if subscriber_id in recipients]
+
+    def subscriber_ids(self) -> List[int]:
+        arrays = [self.recipients(issue_id) for issue_id in list(self._issues)]
+        return np.unique(np.concatenate(arrays)).tolist() if arrays else []
+
+    def discard_issue(self, issue_id: int) -> None:
+        recipients = self._issues.pop(issue_id, None)
+        if recipients is not None:
+            self._count -= len(recipients)
+
+    def discard_subscriber(self, subscriber_id: int) -> None:
+        for recipients in list(self._issues.values()):
+            if recipients.discard(subscriber_id):
+                self._count -= 1
+
+    def pairs(self) -> Iterator[Tuple[int, int]]:
+        for issue_id in list(self._issues):
+            for subscriber_id in self.recipients(issue_id).tolist():
+                yield issue_id, subscriber_id
+
+    def __len__(self) -> int:
+        return self._count
+
+
+class Recipients(object):
+    """Read-only view of the subscribers an issue was delivered to."""
+    __slots__ = ("_ledger", "_issue_id")
+
+    def __init__(self, ledger: DeliveryLedger, issue_id: int):
+        self._ledger = ledger
+        self._issue_id = issue_id
+
+    def __contains__(self, subscriber) -> bool:
+        subscriber_id = getattr(subscriber, "id", subscriber)
+        return self._ledger.delivered(self._issue_id, subscriber_id)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._ledger.recipients(self._issue_id).tolist())
+
+    def __len__(self) -> int:
+        return self._ledger.count(self._issue_id)
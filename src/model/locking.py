@@ -0,0 +1,104 @@
+import threading
+from typing import Callable
+
+
+class WriteLock(object):
+    """The single-writer lock of the model layer.
+
+    Every mutation of the agency's object graph runs under this (reentrant)
+    lock, so writers never interleave. Single lookups do not lock: they are
+    one dict or set operation, and collections are iterated over snapshots,
+    both of which are atomic under the GIL. Reads that take several steps
+    over the same structures, such as pages and reports, hold the shared
+    ReadLock instead, which keeps writers out but not other readers.
+
+    Work that may block, such as waiting for a log record to become durable,
+    is registered with after_release() and runs once the outermost `with`
+    block of the current thread has released the lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._state = threading.Condition(threading.Lock())
+        self._readers = 0
+        # set from the moment a writer holds the lock, so that new readers
+        # wait and a stream of readers cannot starve the writers
+        self._writing = False
+
+    def __enter__(self) -> "WriteLock":
+        depth = getattr(self._local, "depth", 0)
+        if depth == 0 and getattr(self._local, "reading", 0):
+            raise RuntimeError("A thread holding the read lock cannot start writing")
+        self._lock.acquire()
+        self._local.depth = depth + 1
+        if depth == 0:
+            with self._state:
+                self._writing = True
+                while self._readers:
+                    self._state.wait()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._local.depth -= 1
+        callbacks = []
+        if self._local.depth == 0:
+            callbacks = getattr(self._local, "callbacks", [])
+            self._local.callbacks = []
+            with self._state:
+                self._writing = False
+                self._state.notify_all()
+        self._lock.release()
+        for callback in callbacks:
+            callback()
+
+    def _acquire_shared(self) -> None:
+        # a writer may read what it writes, and a reader may nest its reads
+        reading = getattr(self._local, "reading", 0)
+        self._local.reading = reading + 1
+        if reading or getattr(self._local, "depth", 0):
+            return
+        with self._state:
+            while self._writing:
+                self._state.wait()
+            self._readers += 1
+
+    def _release_shared(self) -> None:
+        self._local.reading -= 1
+        if self._local.reading or getattr(self._local, "depth", 0):
+            return
+        with self._state:
+            self._readers -= 1
+            if not self._readers:
+                self._state.notify_all()
+
+    def after_release(self, callback: Callable[[], None]) -> None:
+        if getattr(self._local, "depth", 0):
+            if not hasattr(self._local, "callbacks"):
+                self._local.callbacks = []
+            self._local.callbacks.append(callback)
+        else:
+            callback()
+
+
+class ReadLock(object):
+    """The shared side of a WriteLock.
+
+    Any number of threads hold it at once while no writer is inside, so a
+    read that spans several steps sees one consistent state. A read section
+    must not write, not even to build something lazily: build it first.
+    """
+
+    def __init__(self, writer: WriteLock):
+        self._writer = writer
+
+    def __enter__(self) -> "ReadLock":
+        self._writer._acquire_shared()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._writer._release_shared()
+
+
+write_lock = WriteLock()
+read_lock = ReadLock(write_lock)
@@ -9,46 +9,96 @@ from flask import jsonify
 from typing import List, Union, Optional
 
 from .subscriber import Subscriber
+from .registry import Registry
+from .ledger import DeliveryLedger
+from .events import EventBus
+from .locking import write_lock
+from .strings import intern_text
 
 import datetime
 
 
+class IssueRegistry(Registry[Issue]):
+    # attaches every issue to its newspaper, however it is inserted
+    __slots__ = ("_newspaper",)
+
+    def __init__(self, newspaper: "Newspaper"):
+        super().__init__(key="id")
+        self._newspaper = newspaper
+
+    def append(self, issue: Issue) -> None:
+        super().append(issue)
+        issue.newspaper = self._newspaper
+
+
 class Newspaper(object):
+    __slots__ = ("paper_id", "name", "frequency", "price", "issues", "deliveries", "subscribers")
 
     def __init__(self, paper_id: int, name: str, frequency: int, price: float):
         self.paper_id: int = paper_id
-        self.name: str = name
+        self.name: str = intern_text(name)
         self.frequency: int = frequency  # the issue frequency (in days)
         self.price: float = price  # the monthly price
-        self.issues: List[Issue] = []
+        self.issues: Registry[Issue] = IssueRegistry(self)
+        self.deliveries = DeliveryLedger()
+        self.subscribers: Registry[Subscriber] = Registry(key="id")
+
+
+    def update(self, name: str, frequency: int, price: float) -> None:
+        with write_lock:
+            self.name = intern_text(name)
+            self.frequency = frequency
+            if price != self.price:
+                self.price = price
+                for subscriber in self.subscribers:
+                    subscriber.refresh_monthly_cost()
+            EventBus.get_instance().emit("newspaper_updated", paper=self)
 
 
     def get_issues(self) -> List[Issue]:
-        return self.issues
+        return list(self.issues)
+
+
+    def get_subscribers(self) -> List[Subscriber]:
+        return list(self.subscribers)
 
 
     def add_issue(self, new_issue: Issue) -> None:
-        for issue in self.issues:
-            if issue.id == new_issue.id:
+        with write_lock:
+            if self.issues.get(new_issue.id) is not None:
                 raise ValueError(f"Newspaper with ID {new_issue.id} already exists")
-        else: 
             self.issues.append(new_issue)
-            new_issue.newspaper = self
+            EventBus.get_instance().emit("issue_added", issue=new_issue)
+
+    def add_issues(self, new_issues: List[Issue]) -> None:
+        # all or nothing: no issue is added if one of the IDs is taken
+        with write_lock:
+            seen = set()
+            for new_issue in new_issues:
+                if new_issue.id in seen or self.issues.get(new_issue.id) is not None:
+                    raise ValueError(f"Issue with ID {new_issue.id} already exists")
+                seen.add(new_issue.id)
+            for new_issue in new_issues:
+                self.issues.append(new_issue)
+                EventBus.get_instance().emit("issue_added", issue=new_issue)
 
     def get_issue(self, issue_id:int) -> Optional[Issue]:
-        for issue in self.issues:
-            if issue.id == issue_id:
-                return issue
-        return None
+        return self.issues.get(issue_id)
     
-    def release_issue(self, issue_id: int) -> None:
-        for issue in self.issues:
-            if issue.id == issue_id:
-                if issue.released == False:
-                    issue.released = True
-                    issue.releasedate = datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
-                else: 
-                    return jsonify(f"Issue was released {issue.releasedate}")
+    def release_issue(self, issue_id: int, releasedate: Optional[str] = None) -> None:
+        # the release date becomes the current time unless one is given
+        with write_lock:
+            issue = self.issues.get(issue_id)
+            if issue is None:
+                return None
+            if issue.released == False:
+                issue.released = True
+                issue.releasedate = intern_text(releasedate) if releasedate is not None \
+                    else datetime.datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+                self.issues.refresh(issue)
+                EventBus.get_instance().emit("issue_released", issue=issue)
+            else: 
+                return jsonify(f"Issue was released {issue.releasedate}")
                 
     def __str__(self) -> str:
         return self.name
@@ -0,0 +1,141 @@
+from heapq import nsmallest
+from typing import Any, Callable, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+from .index import MISSING, SortedIndex, sortable
+from .locking import read_lock
+from .registry import Registry
+
+T = TypeVar("T")
+
+
+class _Range(object):
+    __slots__ = ("attribute", "low", "high", "high_inclusive")
+
+    def __init__(self, attribute: str, low: Any, high: Any, high_inclusive: bool):
+        self.attribute = attribute
+        self.low = low
+        self.high = high
+        self.high_inclusive = high_inclusive
+
+    def bounds(self, index: SortedIndex) -> Tuple[int, int]:
+        return index.bounds(self.low, self.high, self.high_inclusive)
+
+    def predicate(self, index: SortedIndex) -> Callable[[Hashable], bool]:
+        low = None if self.low is None else sortable(index.normalize(self.low))
+        high = None if self.high is None else sortable(index.normalize(self.high))
+        inclusive = self.high_inclusive
+
+        def matches(key: Hashable) -> bool:
+            value = index.sort_key(key)
+            if value == MISSING:
+                return False
+            if low is not None and value < low:
+                return False
+            return high is None or value < high or (inclusive and value == high)
+        return matches
+
+
+class Query(Generic[T]):
+    """Filtered and sorted pages of a registry, served by its secondary indexes.
+
+    With a sort order the index of that attribute is scanned from the cursor
+    on, skipping entities that fail the other filters. Without one a page is
+    in key order: sparse matches are taken from the most selective filter's
+    range and the smallest keys after the cursor kept, dense ones are found
+    by walking the registry's keys from the cursor on.
+    """
+
+    def __init__(self, registry: Registry[T]):
+        self.registry = registry
+        self._ranges: List[_Range] = []
+        self._order: Optional[str] = None
+        self._descending = False
+
+    def where(self, attribute: str, low: Any = None, high: Any = None, high_inclusive: bool = True) -> "Query[T]":
+        # keeps the entities with low <= attribute <= high (or < high)
+        if low is not None or high is not None:
+            self._ranges.append(_Range(attribute, low, high, high_inclusive))
+        return self
+
+    def equals(self, attribute: str, value: Any) -> "Query[T]":
+        return self.where(attribute, value, value)
+
+    def order_by(self, attribute: str, descending: bool = False) -> "Query[T]":
+        self._order = attribute
+        self._descending = descending
+        return self
+
+    def page(self, after: Optional[Hashable] = None, limit: Optional[int] = None) -> Tuple[List[T], Optional[Hashable]]:
+        """Up to `limit` entities following the one with the key `after`,
+        together with the cursor of the next page (None on the last page).
+
+        Raises ValueError if a sorted query's cursor was removed meanwhile."""
+        if self._order is None and not self._ranges:
+            if after is None and limit is None:
+                return list(self.registry), None
+            return self.registry.page(after=after, limit=limit or len(self.registry) or 1)
+        self._prepare()
+        with read_lock:
+            keys = self._ordered_keys(after, limit) if self._order is not None else self._filtered_keys(after, limit)
+            more = limit is not None and len(keys) > limit
+            if more:
+                keys = keys[:limit]
+            return [self.registry.get(key) for key in keys], (keys[-1] if more else None)
+
+    def _prepare(self) -> None:
+        # a read section must not write, so build what is built lazily first
+        for range_ in self._ranges:
+            self.registry.index(range_.attribute)
+        if self._order is not None:
+            self.registry.index(self._order)
+        else:
+            self.registry.sorted_keys()
+
+    def _ordered_keys(self, after: Optional[Hashable], limit: Optional[int]) -> List[Hashable]:
+        index = self.registry.index(self._order)
+        ranges = list(self._ranges)
+        driver = next((r for r in ranges if r.attribute == self._order), None)
+        if driver is not None:
+            ranges.remove(driver)
+            start, end = driver.bounds(index)
+        else:
+            start, end = 0, len(index)
+        if after is not None:
+            # the cursor's position comes from its value; without one the scan
+            # could only start over, so a removed entity ends the paging
+            if after not in index:
+                raise ValueError(f"{after!r} is no longer in the list, so its page cannot be continued")
+            if self._descending:
+                end = min(end, index.position(after, descending=True))
+            else:
+                start = max(start, index.position(after))
+        predicates = [r.predicate(self.registry.index(r.attribute)) for r in ranges]
+        keys = []
+        for key in index.keys(start, end, self._descending):
+            if all(matches(key) for matches in predicates):
+                keys.append(key)
+                if limit is not None and len(keys) > limit:
+                    break
+        return keys
+
+    def _filtered_keys(self, after: Optional[Hashable], limit: Optional[int]) -> List[Hashable]:
+        indexed = [(r, self.registry.index(r.attribute)) for r in self._ranges]
+        bounds = [r.bounds(index) for r, index in indexed]
+        driver = min(range(len(indexed)), key=lambda position: bounds[position][1] - bounds[position][0])
+        predicates = [r.predicate(index) for position, (r, index) in enumerate(indexed) if position != driver]
+        start, end = bounds[driver]
+        if limit is not None and (limit + 1) * len(self.registry) < (end - start) ** 2:
+            # matches are dense enough that walking the keys in order from the
+            # cursor (about n / (end - start) per match) beats collecting them all
+            range_, index = indexed[driver]
+            predicates.append(range_.predicate(index))
+            keys = []
+            for key in self.registry.sorted_keys(after):
+                if all(matches(key) for matches in predicates):
+                    keys.append(key)
+                    if len(keys) > limit:
+                        break
+            return keys
+        keys = (key for key in indexed[driver][1].keys(start, end)
+                if (after is None or key > after) and all(matches(key) for matches in predicates))
+        return sorted(keys) if limit is None else nsmallest(limit + 1, keys)
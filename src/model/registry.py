@@ -0,0 +1,242 @@
+from bisect import bisect_right, insort
+from operator import attrgetter
+from .locking import read_lock, write_lock
+from .index import SortedIndex
+
+from typing import Dict, Generic, Hashable, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+_key_getters: Dict[str, attrgetter] = {}
+
+
+class Registry(Generic[T]):
+    """An insertion-ordered collection of entities indexed by their ID.
+
+    Lookup, insert, membership and removal are O(1). The registry keeps the
+    list operations the model and the tests rely on (append, extend, remove,
+    len, iteration, positional indexing), so it can stand in for a plain list.
+
+    For keyset pagination the registry also keeps its keys sorted. That index
+    is only built on the first call to page() and maintained from then on.
+    Secondary indexes on attributes of the entities (see index()) are built
+    the same way; whoever changes an indexed attribute calls refresh().
+    """
+    __slots__ = ("_key", "_items", "_sorted_keys", "_indexes")
+
+    def __init__(self, key: str = "id", items: Iterable[T] = ()):
+        # every entity carries a few registries, so share the key getters
+        self._key = _key_getters.get(key) or _key_getters.setdefault(key, attrgetter(key))
+        self._items: Dict[Hashable, T] = {}
+        self._sorted_keys: Optional[List[Hashable]] = None
+        self._indexes: Optional[Dict[str, SortedIndex]] = None
+        if items:
+            self.extend(items)
+
+    def key_of(self, item: T) -> Hashable:
+        return self._key(item)
+
+    def get(self, key: Hashable, default: Optional[T] = None) -> Optional[T]:
+        return self._items.get(key, default)
+
+    def append(self, item: T) -> None:
+        # an item with an already known ID replaces the stored one in place
+        key = self._key(item)
+        if self._sorted_keys is not None and key not in self._items:
+            insort(self._sorted_keys, key)
+        self._items[key] = item
+        if self._indexes is not None:
+            for index in self._indexes.values():
+                index.add(key, item)
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.append(item)
+
+    def remove(self, item: T) -> None:
+        if item not in self:
+            raise ValueError(f"{item!r} is not in the registry")
+        self.pop(self._key(item))
+
+    def discard(self, item: T) -> None:
+        if item in self:
+            self.pop(self._key(item))
+
+    def pop(self, key: Hashable, default: Optional[T] = None) -> Optional[T]:
+        if key not in self._items:
+            return default
+        if self._sorted_keys is not None:
+            del self._sorted_keys[bisect_right(self._sorted_keys, key) - 1]
+        if self._indexes is not None:
+            for index in self._indexes.values():
+                index.discard(key)
+        return self._items.pop(key)
+
+    def clear(self) -> None:
+        # the sorted keys and indexes stay, empty, so readers never rebuild them
+        self._items.clear()
+        if self._sorted_keys is not None:
+            self._sorted_keys.clear()
+        if self._indexes is not None:
+            for index in self._indexes.values():
+                index.build({})
+
+    def index(self, attribute: str) -> SortedIndex:
+        """The sorted index of an attribute of the entities, built on first use."""
+        index = None if self._indexes is None else self._indexes.get(attribute)
+        if index is None:
+            with write_lock:
+                indexes = self._indexes if self._indexes is not None else {}
+                index = indexes.get(attribute)
+                if index is None:
+                    index = SortedIndex(attribute)
+                    index.build(self._items)
+                    indexes[attribute] = index
+                    self._indexes = indexes
+        return index
+
+    def refresh(self, item: T) -> None:
+        # re-sorts an entity after an indexed attribute of it changed
+        key = self._key(item)
+        if self._indexes is not None and self._items.get(key) is item:
+            for index in self._indexes.values():
+                index.add(key, item)
+
+    def page(self, after: Optional[Hashable] = None, limit: int = 100) -> Tuple[List[T], Optional[Hashable]]:
+        """Return up to `limit` items with a key greater than `after`, ordered by
+        key, together with the cursor for the next page (None on the last page)."""
+        sorted_keys = self._ordered_keys()
+        # the sorted keys must not shift between the search and the slice
+        with read_lock:
+            start = 0 if after is None else bisect_right(sorted_keys, after)
+            keys = sorted_keys[start:start + limit]
+            items = [self._items[key] for key in keys]
+            next_cursor = keys[-1] if keys and start + limit < len(sorted_keys) else None
+        return items, next_cursor
+
+    def sorted_keys(self, after: Optional[Hashable] = None) -> Iterator[Hashable]:
+        """The keys greater than `after`, in ascending order; iterate it under
+        read_lock, having called this once before taking the lock."""
+        keys = self._ordered_keys()
+        start = 0 if after is None else bisect_right(keys, after)
+        return (keys[position] for position in range(start, len(keys)))
+
+    def _ordered_keys(self) -> List[Hashable]:
+        if self._sorted_keys is None:
+            with write_lock:
+                if self._sorted_keys is None:
+                    self._sorted_keys = sorted(self._items)
+        return self._sorted_keys
+
+    def keys(self) -> List[Hashable]:
+        return list(self._items)
+
+    def __contains__(self, item: object) -> bool:
+        try:
+            stored = self._items.get(self._key(item))
+        except AttributeError:
+            return False
+        return stored is not None and (stored is item or stored == item)
+
+    def __iter__(self) -> Iterator[T]:
+        # iterate over a snapshot, so callers may add or remove while looping
+        return iter(list(self._items.values()))
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __getitem__(self, index):
+        return list(self._items.values())[index]
+
+    def __repr__(self) -> str:
+        return f"Registry({list(self._items.values())!r})"
+
+
+class TupleRegistry(Generic[T]):
+    """The Registry interface over a tuple kept in an attribute of its owner.
+
+    Meant for the few newspapers a single subscriber refers to: the owner
+    stores nothing but the tuple (and all empty ones are the same object),
+    lookups scan it. The registry itself is a short-lived view without data.
+    """
+    __slots__ = ("_owner", "_attribute", "_key")
+
+    def __init__(self, owner: object, attribute: str, key: str = "id"):
+        self._owner = owner
+        self._attribute = attribute
+        self._key = _key_getters.get(key) or _key_getters.setdefault(key, attrgetter(key))
+
+    def _items(self) -> Tuple[T, ...]:
+        return getattr(self._owner, self._attribute)
+
+    def _position(self, key: Hashable) -> int:
+        for position, item in enumerate(self._items()):
+            if self._key(item) == key:
+                return position
+        return -1
+
+    def key_of(self, item: T) -> Hashable:
+        return self._key(item)
+
+    def get(self, key: Hashable, default: Optional[T] = None) -> Optional[T]:
+        position = self._position(key)
+        return default if position < 0 else self._items()[position]
+
+    def append(self, item: T) -> None:
+        # an item with an already known ID replaces the stored one in place
+        items = self._items()
+        position = self._position(self._key(item))
+        if position < 0:
+            items += (item,)
+        elif items[position] is item:
+            return
+        else:
+            items = items[:position] + (item,) + items[position + 1:]
+        setattr(self._owner, self._attribute, items)
+
+    def extend(self, items: Iterable[T]) -> None:
+        for item in items:
+            self.append(item)
+
+    def remove(self, item: T) -> None:
+        if item not in self:
+            raise ValueError(f"{item!r} is not in the registry")
+        self.pop(self._key(item))
+
+    def discard(self, item: T) -> None:
+        if item in self:
+            self.pop(self._key(item))
+
+    def pop(self, key: Hashable, default: Optional[T] = None) -> Optional[T]:
+        items = self._items()
+        position = self._position(key)
+        if position < 0:
+            return default
+        setattr(self._owner, self._attribute, items[:position] + items[position + 1:])
+        return items[position]
+
+    def clear(self) -> None:
+        setattr(self._owner, self._attribute, ())
+
+    def keys(self) -> List[Hashable]:
+        return [self._key(item) for item in self._items()]
+
+    def __contains__(self, item: object) -> bool:
+        try:
+            stored = self.get(self._key(item))
+        except AttributeError:
+            return False
+        return stored is not None and (stored is item or stored == item)
+
+    def __iter__(self) -> Iterator[T]:
+        # tuples are immutable, so this already iterates over a snapshot
+        return iter(self._items())
+
+    def __len__(self) -> int:
+        return len(self._items())
+
+    def __getitem__(self, index):
+        return self._items()[index]
+
+    def __repr__(self) -> str:
+        return f"TupleRegistry({list(self._items())!r})"
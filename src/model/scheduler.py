@@ -0,0 +1,140 @@
+import datetime
+import heapq
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .dates import date_value
+from .events import EventBus
+from .locking import write_lock
+
+# (due timestamp, paper ID, issue ID)
+_Entry = Tuple[float, int, int]
+
+
+def release_time(releasedate: Any) -> Optional[float]:
+    """The POSIX timestamp of a release date; dates without a time zone are UTC."""
+    parsed = date_value(releasedate)
+    return None if parsed is None else parsed.replace(tzinfo=datetime.timezone.utc).timestamp()
+
+
+class ReleaseScheduler(object):
+    """Releases unreleased issues when their release date arrives.
+
+    The issues wait in a heap ordered by release time, so scheduling one
+    costs O(log n). A worker thread sleeps until the earliest release date
+    and then releases all issues that are due, `batch_size` at a time per
+    hold of the write lock. The heap is built from the unreleased issues of
+    the agency when the scheduler starts and whenever the agency's data is
+    replaced, so nothing is lost over a restart; issues that became due in
+    the meantime are released right away. Entries are not removed when an
+    issue is released or deleted by other means, they are skipped when due.
+    """
+
+    def __init__(self, agency, batch_size: int = 1000, clock: Callable[[], float] = time.time):
+        self._agency = agency
+        self.batch_size = batch_size
+        self._clock = clock
+        self._heap: List[_Entry] = []
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+        self.released = 0
+
+    def start(self) -> None:
+        EventBus.get_instance().subscribe("issue_added", self._on_issue_added)
+        EventBus.get_instance().subscribe("agency_restored", self._on_agency_restored)
+        self.rebuild()
+        with self._condition:
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name="release-scheduler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        EventBus.get_instance().unsubscribe("issue_added", self._on_issue_added)
+        EventBus.get_instance().unsubscribe("agency_restored", self._on_agency_restored)
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def next_release(self) -> Optional[float]:
+        with self._condition:
+            return self._heap[0][0] if self._heap else None
+
+    def rebuild(self) -> None:
+        entries = []
+        with write_lock:
+            for paper in self._agency.newspapers:
+                for issue in paper.issues:
+                    due = None if issue.released else release_time(issue.releasedate)
+                    if due is not None:
+                        entries.append((due, paper.paper_id, issue.id))
+        heapq.heapify(entries)
+        with self._condition:
+            self._heap = entries
+            self._condition.notify_all()
+
+    def schedule(self, issue) -> None:
+        due = None if issue.released or issue.newspaper is None else release_time(issue.releasedate)
+        if due is None:
+            return
+        entry = (due, issue.newspaper.paper_id, issue.id)
+        with self._condition:
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] == entry:
+                # the worker may sleep until a later release
+                self._condition.notify_all()
+
+    def _on_issue_added(self, event: str, payload: Dict[str, Any]) -> None:
+        issue = payload["issue"]
+        # the event bus is shared by every agency in the process
+        if self._agency.get_newspaper(issue.newspaper.paper_id) is issue.newspaper:
+            self.schedule(issue)
+
+    def _on_agency_restored(self, event: str, payload: Dict[str, Any]) -> None:
+        if payload.get("agency") is self._agency:
+            self.rebuild()
+
+    def _due(self, now: float) -> List[_Entry]:
+        with self._condition:
+            due = []
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._heap))
+            return due
+
+    def release_due(self, now: Optional[float] = None) -> int:
+        """Release every issue due at `now`, in batches; returns how many were released."""
+        now = self._clock() if now is None else now
+        released = 0
+        while True:
+            batch = self._due(now)
+            if not batch:
+                self.released += released
+                return released
+            with write_lock:
+                for due, paper_id, issue_id in batch:
+                    paper = self._agency.get_newspaper(paper_id)
+                    issue = None if paper is None else paper.get_issue(issue_id)
+                    # skip entries whose issue was released, removed or moved
+                    if issue is None or issue.released or release_time(issue.releasedate) != due:
+                        continue
+                    paper.release_issue(issue_id, releasedate=issue.releasedate)
+                    released += 1
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if not self._running:
+                    return
+                wait = None if not self._heap else self._heap[0][0] - self._clock()
+                if wait is None or wait > 0:
+                    # wake up at least once a minute, in case the clock jumps
+                    self._condition.wait(60 if wait is None else min(wait, 60))
+                    continue
+            self.release_due()
@@ -0,0 +1,197 @@
+import gc
+import mmap
+import os
+import struct
+from array import array
+from typing import Dict, List, Optional
+
+from .newspaper import Newspaper
+from .issue import Issue
+from .editor import Editor
+from .subscriber import Subscriber
+
+# Binary snapshot of the agency's object graph.
+#
+# The file is a set of named, 8-byte aligned columns. Entities reference each
+# other by ID only; all strings live in one deduplicated string table. The
+# deliveries of every issue are a sorted, contiguous run of the
+# delivery_subscriber column, so a restored ledger uses that run in place,
+# as a read-only array over the mapped file.
+#
+#   header:  magic (8 bytes) | column count (u32) | 4 bytes padding
+#   index:   per column: name (24 bytes) | typecode (1 byte) | 7 bytes padding
+#            | offset (u64) | item count (u64)
+#   data:    the columns, little endian
+
+MAGIC = b"PBSNAP01"
+_HEADER = struct.Struct("<8sI4x")
+_COLUMN = struct.Struct("<24sc7xQQ")
+
+NO_STRING = -1
+
+
+class _StringTable(object):
+    def __init__(self):
+        self.index: Dict[str, int] = {}
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        position = self.index.get(value)
+        if position is None:
+            position = self.index[value] = len(self.index)
+        return position
+
+    def columns(self) -> Dict[str, array]:
+        blob = bytearray()
+        offsets = array("q", [0])
+        for value in self.index:
+            blob += value.encode("utf-8")
+            offsets.append(len(blob))
+        return {"string_offsets": offsets, "string_blob": array("B", bytes(blob))}
+
+
+def write_snapshot(agency, path: str) -> None:
+    strings = _StringTable()
+    columns: Dict[str, array] = {name: array(typecode) for name, typecode in (
+        ("paper_id", "q"), ("paper_name", "q"), ("paper_frequency", "q"), ("paper_price", "d"),
+        ("issue_paper", "q"), ("issue_id", "q"), ("issue_name", "q"), ("issue_releasedate", "q"),
+        ("issue_released", "b"), ("issue_editor", "q"), ("issue_has_editor", "b"),
+        ("editor_id", "q"), ("editor_name", "q"),
+        ("subscriber_id", "q"), ("subscriber_name", "q"),
+        ("subscription_subscriber", "q"), ("subscription_paper", "q"),
+        ("run_paper", "q"), ("run_issue", "q"), ("run_end", "q"), ("delivery_subscriber", "q"),
+        ("receipt_subscriber", "q"), ("receipt_paper", "q"),
+    )}
+
+    for editor in agency.editors:
+        columns["editor_id"].append(editor.id)
+        columns["editor_name"].append(strings.add(editor.name))
+    for subscriber in agency.subscribers:
+        columns["subscriber_id"].append(subscriber.id)
+        columns["subscriber_name"].append(strings.add(subscriber.name))
+        for paper_id in subscriber.subscribed_newspapers.keys():
+            columns["subscription_subscriber"].append(subscriber.id)
+            columns["subscription_paper"].append(paper_id)
+        for paper_id in subscriber.delivered_by.keys():
+            columns["receipt_subscriber"].append(subscriber.id)
+            columns["receipt_paper"].append(paper_id)
+    for paper in agency.newspapers:
+        columns["paper_id"].append(paper.paper_id)
+        columns["paper_name"].append(strings.add(paper.name))
+        columns["paper_frequency"].append(paper.frequency)
+        columns["paper_price"].append(paper.price)
+        for issue in paper.issues:
+            columns["issue_paper"].append(paper.paper_id)
+            columns["issue_id"].append(issue.id)
+            columns["issue_name"].append(strings.add(issue.name))
+            columns["issue_releasedate"].append(strings.add(issue.releasedate))
+            columns["issue_released"].append(bool(issue.released))
+            columns["issue_has_editor"].append(issue.editor_id is not None)
+            columns["issue_editor"].append(issue.editor_id if issue.editor_id is not None else 0)
+            recipients = paper.deliveries.recipients(issue.id)
+            if len(recipients):
+                # sorted, so the restored ledger can use the run in place
+                columns["delivery_subscriber"].frombytes(recipients.astype("<i8").tobytes())
+                columns["run_paper"].append(paper.paper_id)
+                columns["run_issue"].append(issue.id)
+                columns["run_end"].append(len(columns["delivery_subscriber"]))
+    columns.update(strings.columns())
+
+    index = []
+    offset = _HEADER.size + _COLUMN.size * len(columns)
+    for name, column in columns.items():
+        offset += -offset % 8
+        index.append(_COLUMN.pack(name.encode("ascii"), column.typecode.encode("ascii"), offset, len(column)))
+        offset += len(column) * column.itemsize
+
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as snapshot:
+        snapshot.write(_HEADER.pack(MAGIC, len(columns)))
+        snapshot.write(b"".join(index))
+        for column in columns.values():
+            snapshot.write(b"\0" * (-snapshot.tell() % 8))
+            snapshot.write(column.tobytes())
+        snapshot.flush()
+        os.fsync(snapshot.fileno())
+    os.replace(temporary, path)
+
+
+def _read_columns(path: str) -> Dict[str, memoryview]:
+    with open(path, "rb") as snapshot:
+        mapped = mmap.mmap(snapshot.fileno(), 0, access=mmap.ACCESS_READ)
+    data = memoryview(mapped)
+    magic, count = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an agency snapshot")
+    columns = {}
+    for position in range(count):
+        name, typecode, offset, length = _COLUMN.unpack_from(data, _HEADER.size + position * _COLUMN.size)
+        typecode = typecode.decode("ascii")
+        itemsize = array(typecode).itemsize
+        columns[name.rstrip(b"\0").decode("ascii")] = data[offset:offset + length * itemsize].cast(typecode)
+    return columns
+
+
+def read_snapshot(agency, path: str) -> None:
+    """Load a snapshot into an empty agency.
+
+    Entities are created eagerly; the delivery ledgers stay backed by the
+    memory-mapped file until they are changed.
+    """
+    columns = _read_columns(path)
+    offsets = columns["string_offsets"].tolist()
+    blob = columns["string_blob"].tobytes()
+    strings: List[Optional[str]] = [blob[start:end].decode("utf-8") for start, end in zip(offsets, offsets[1:])]
+
+    def text(position: int) -> Optional[str]:
+        return None if position == NO_STRING else strings[position]
+
+    # the restore only creates objects that stay alive, so the cyclic
+    # garbage collector would just rescan the growing heap over and over
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        editors = agency.editors
+        for editor_id, name in zip(columns["editor_id"].tolist(), columns["editor_name"].tolist()):
+            editors.append(Editor(name=text(name), id=editor_id))
+        subscribers = agency.subscribers
+        for subscriber_id, name in zip(columns["subscriber_id"].tolist(), columns["subscriber_name"].tolist()):
+            subscribers.append(Subscriber(name=text(name), id=subscriber_id))
+        newspapers = agency.newspapers
+        for paper_id, name, frequency, price in zip(columns["paper_id"].tolist(), columns["paper_name"].tolist(),
+                                                    columns["paper_frequency"].tolist(),
+                                                    columns["paper_price"].tolist()):
+            newspapers.append(Newspaper(paper_id=paper_id, name=text(name), frequency=frequency, price=price))
+
+        for paper_id, issue_id, name, releasedate, released, editor_id, has_editor in zip(
+                columns["issue_paper"].tolist(), columns["issue_id"].tolist(), columns["issue_name"].tolist(),
+                columns["issue_releasedate"].tolist(), columns["issue_released"].tolist(),
+                columns["issue_editor"].tolist(), columns["issue_has_editor"].tolist()):
+            issue = Issue(name=text(name), id=issue_id, releasedate=text(releasedate), released=bool(released))
+            newspapers.get(paper_id).issues.append(issue)
+            if has_editor:
+                issue.editor_id = editor_id
+                editor = editors.get(editor_id)
+                if editor is not None:
+                    editor.work_on_issues.append(issue)
+
+        get_subscriber, get_paper = subscribers.get, newspapers.get
+        for subscriber_id, paper_id in zip(columns["subscription_subscriber"].tolist(),
+                                           columns["subscription_paper"].tolist()):
+            subscriber, paper = get_subscriber(subscriber_id), get_paper(paper_id)
+            subscriber.subscribed_newspapers.append(paper)
+            paper.subscribers.append(subscriber)
+        for subscriber_id, paper_id in zip(columns["receipt_subscriber"].tolist(),
+                                           columns["receipt_paper"].tolist()):
+            get_subscriber(subscriber_id).delivered_by.append(get_paper(paper_id))
+
+        deliveries = columns["delivery_subscriber"]
+        start = 0
+        for paper_id, issue_id, end in zip(columns["run_paper"].tolist(), columns["run_issue"].tolist(),
+                                           columns["run_end"].tolist()):
+            newspapers.get(paper_id).deliveries.load(issue_id, deliveries[start:end])
+            start = end
+    finally:
+        if gc_was_enabled:
+            gc.enable()
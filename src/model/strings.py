@@ -0,0 +1,8 @@
+import sys
+from typing import Optional
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    # names and dates repeat across millions of entities; interned, equal
+    # strings share one object
+    return sys.intern(value) if type(value) is str else value
@@ -1,33 +1,121 @@
-from typing import List, Union, Optional
+from typing import Dict, List, Union, Optional
 from flask import jsonify, make_response
 
+from .registry import TupleRegistry
+from .events import EventBus
+from .locking import write_lock
+from .strings import intern_text
 
 
 class Subscriber(object):
+    # there are millions of subscribers: no instance dict, and the papers
+    # they refer to are plain tuples behind the registry interface
+    __slots__ = ("name", "id", "_subscriptions", "_deliverers", "_monthly_cost", "_received_counts")
+
     def __init__(self, name, id) -> None:
-        self.name = name
+        self.name = intern_text(name)
         self.id = id
-        self.subscribed_newspapers = []
-        self.recieved_issues = []
+        self._subscriptions = ()
+        self._deliverers = ()
+        # billing counters for create_stats; they are built on first use and
+        # from then on kept up to date by the mutations (None until then)
+        self._monthly_cost: Optional[float] = None
+        self._received_counts: Optional[Dict[int, int]] = None
+
+    @property
+    def subscribed_newspapers(self) -> TupleRegistry:
+        return TupleRegistry(self, "_subscriptions", key="paper_id")
+
+    @property
+    def delivered_by(self) -> TupleRegistry:
+        # newspapers that delivered at least one issue; the deliveries
+        # themselves live in each newspaper's ledger
+        return TupleRegistry(self, "_deliverers", key="paper_id")
+
+    def update(self, name: str) -> None:
+        with write_lock:
+            self.name = intern_text(name)
+            EventBus.get_instance().emit("subscriber_updated", subscriber=self)
+
+    @property
+    def recieved_issues(self):
+        issues = []
+        for paper in self.delivered_by:
+            for issue_id in paper.deliveries.issues_of(self.id):
+                issues.append(paper.get_issue(issue_id))
+        return issues
+
+    def has_received(self, issue) -> bool:
+        return issue.newspaper is not None and issue.newspaper.deliveries.delivered(issue.id, self.id)
+
+    @property
+    def monthly_cost(self) -> float:
+        if self._monthly_cost is None:
+            with write_lock:
+                if self._monthly_cost is None:
+                    self._monthly_cost = self._sum_prices()
+        return self._monthly_cost
+
+    def _sum_prices(self) -> float:
+        return sum(paper.price for paper in self.subscribed_newspapers)
+
+    def refresh_monthly_cost(self) -> None:
+        # summed over the subscriptions again (instead of subtracting) so
+        # the cost never drifts through float rounding
+        if self._monthly_cost is not None:
+            self._monthly_cost = self._sum_prices()
+
+    @property
+    def received_counts(self) -> Dict[int, int]:
+        # number of received issues per paper ID
+        if self._received_counts is None:
+            with write_lock:
+                if self._received_counts is None:
+                    counts = {}
+                    for paper in self.delivered_by:
+                        received = len(paper.deliveries.issues_of(self.id))
+                        if received:
+                            counts[paper.paper_id] = received
+                    self._received_counts = counts
+        return dict(self._received_counts)
+
+    def received_from(self, paper) -> None:
+        # called for every delivery of an issue of the paper
+        if paper not in self._deliverers:
+            self._deliverers += (paper,)
+        if self._received_counts is not None:
+            self._received_counts[paper.paper_id] = self._received_counts.get(paper.paper_id, 0) + 1
+
+    def forget_received(self, paper_id: int) -> None:
+        if self._received_counts is not None:
+            self._received_counts.pop(paper_id, None)
 
     def subscribe(self, newspaper):
-        if newspaper not in self.subscribed_newspapers:
-            self.subscribed_newspapers.append(newspaper)
-        else: 
-            return jsonify(f"Subscriber already have the subscription on this newspaper.")
+        with write_lock:
+            if newspaper not in self.subscribed_newspapers:
+                # keep both sides of the subscription index in step
+                self.subscribed_newspapers.append(newspaper)
+                newspaper.subscribers.append(self)
+                if self._monthly_cost is not None:
+                    self._monthly_cost += newspaper.price
+                EventBus.get_instance().emit("subscribed", subscriber=self, paper=newspaper)
+            else: 
+                return jsonify(f"Subscriber already have the subscription on this newspaper.")
+
+    def unsubscribe(self, newspaper):
+        with write_lock:
+            if newspaper not in self.subscribed_newspapers:
+                return
+            self.subscribed_newspapers.discard(newspaper)
+            newspaper.subscribers.discard(self)
+            self.refresh_monthly_cost()
+            EventBus.get_instance().emit("unsubscribed", subscriber=self, paper=newspaper)
 
     def create_stats(self):
         newspapers = len(self.subscribed_newspapers)
-        monthly_cost = 0
-        for paper in self.subscribed_newspapers:
-            monthly_cost += paper.price
+        monthly_cost = self.monthly_cost
         annual_cost = 12 * monthly_cost
-        num_of_issues = {}
-        for issue in  self.recieved_issues:
-            if issue.newspaper not in num_of_issues.keys():
-                num_of_issues[issue.newspaper] = 1
-            else:
-                num_of_issues[issue.newspaper] += 1
+        num_of_issues = self.received_counts
         return {
             "Number of subscribed newspapers": newspapers,
             "Monthly cost": monthly_cost,
@@ -35,18 +123,20 @@ class Subscriber(object):
             "Number of issues that the subscriber received for each paper":num_of_issues
         }
     
-    def check_missing_issues(self):
+    def deliver_missing_issues(self) -> List[str]:
+        # sends every released issue of the subscribed papers that the
+        # subscriber did not receive yet and returns their names
         missing_issues = []
         for newspaper in self.subscribed_newspapers:
             for issue in newspaper.issues:
-                if issue not in self.recieved_issues and issue.released == True:
+                if issue.released == True and not self.has_received(issue):
                     missing_issues.append(issue.name)
                     issue.send_issue(self)
+        return missing_issues
+
+    def check_missing_issues(self):
+        missing_issues = self.deliver_missing_issues()
         if len(missing_issues) != 0:
             return jsonify(f"Issues {missing_issues} were sent to a subscriber")
         else:
             return jsonify(f"There are no missing issues")
-        
-
-
-    
\ No newline at end of file
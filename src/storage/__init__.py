@@ -0,0 +1,20 @@
+from urllib.parse import urlparse
+
+from .base import Storage
+from .file import FileStorage
+from .sqlite import SQLiteStorage
+from .shared import SharedSQLiteStorage
+
+
+def open_storage(url: str, **kwargs) -> Storage:
+    """Create a storage backend from a URL such as sqlite:///var/paperback.db
+    or file:///var/paperback; sqlite+shared:///var/paperback.db is shared by
+    several processes."""
+    parsed = urlparse(url)
+    if parsed.scheme == "sqlite+shared":
+        return SharedSQLiteStorage(parsed.path, **kwargs)
+    if parsed.scheme == "sqlite":
+        return SQLiteStorage(parsed.path, **kwargs)
+    if parsed.scheme == "file":
+        return FileStorage(parsed.path, **kwargs)
+    raise ValueError(f"Unsupported storage URL {url}")
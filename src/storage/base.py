@@ -0,0 +1,231 @@
+import gc
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..model.agency import Agency
+from ..model.events import ALL_EVENTS, EventBus
+from ..model.locking import write_lock
+from .records import apply_record, dump_state, event_to_record, load_state
+
+LogEntry = Tuple[int, str, Dict[str, Any]]
+
+
+class Storage(object):
+    """Durable storage for the agency: a write-ahead log plus compacted snapshots.
+
+    Every model event is turned into a log record with a sequence number and
+    handed to a background writer. The writer takes everything that queued up
+    while it was busy and commits it as one batch (group commit), so many
+    writers share one fsync. With `synchronous=True` a writer returns only
+    once its record is durable; otherwise it returns immediately and loses at
+    most the records of the batch in flight on a crash.
+
+    After `checkpoint_every` records a snapshot of the whole agency is written
+    in the background and the log up to that point is dropped. Recovery loads
+    the latest snapshot and replays the log records that follow it.
+
+    The storage also keeps the ID sequences of the agency (see reserve_ids)
+    and the status of background jobs (see save_job).
+
+    Backends implement the `_read_*`, `_write_*` and `_reserve_ids` methods
+    below.
+    """
+
+    # whether several processes use the storage at the same time
+    shared = False
+
+    def __init__(self, synchronous: bool = True, checkpoint_every: int = 100000):
+        self.synchronous = synchronous
+        self.checkpoint_every = checkpoint_every
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()
+        self._buffer: List[LogEntry] = []
+        self._last_seq = 0
+        self._durable_seq = 0
+        self._since_checkpoint = 0
+        self._checkpointing = False
+        self._closed = True
+        self._error: Optional[BaseException] = None
+        self._agency: Optional[Agency] = None
+        self._writer: Optional[threading.Thread] = None
+
+    # -- backend interface -------------------------------------------------
+
+    def _read_snapshot(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        raise NotImplementedError
+
+    def _read_log(self, after_seq: int) -> Iterator[LogEntry]:
+        raise NotImplementedError
+
+    def _write_log(self, entries: List[LogEntry]) -> None:
+        raise NotImplementedError
+
+    def _rotate_log(self) -> None:
+        # called before a checkpoint; everything written so far may be
+        # dropped once the snapshot is stored
+        pass
+
+    def _write_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _reserve_ids(self, sequence: str, count: int, start: int) -> int:
+        raise NotImplementedError
+
+    def _write_job(self, job_id: int, fields: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def _read_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _read_jobs(self) -> Iterator[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def _close(self) -> None:
+        pass
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def open(self, agency: Agency) -> None:
+        """Recover the agency from storage and start logging its mutations."""
+        # recovery only allocates objects that stay alive, so the cyclic
+        # garbage collector would just rescan the growing heap over and over
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            state, seq = self._read_snapshot()
+            if state is not None:
+                load_state(agency, state)
+            for seq, op, data in self._read_log(seq):
+                apply_record(agency, op, data)
+                self._since_checkpoint += 1
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+        self._last_seq = self._durable_seq = seq
+        self._agency = agency
+        self._closed = False
+        self._writer = threading.Thread(target=self._run_writer, name="storage-writer", daemon=True)
+        self._writer.start()
+        EventBus.get_instance().subscribe(ALL_EVENTS, self._on_event)
+
+    def close(self) -> None:
+        EventBus.get_instance().unsubscribe(ALL_EVENTS, self._on_event)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._writer is not None:
+            self._writer.join()
+        with self._io_lock:
+            self._close()
+
+    # -- ID sequences ------------------------------------------------------
+
+    def reserve_ids(self, sequence: str, count: int, start: int) -> int:
+        """Atomically reserve `count` IDs of a sequence and return the first one.
+
+        Sequences are kept apart from the log, so every process sharing the
+        storage draws disjoint blocks and a restart never reuses an ID.
+        """
+        with self._io_lock:
+            return self._reserve_ids(sequence, count, start)
+
+    # -- jobs --------------------------------------------------------------
+
+    def save_job(self, fields: Dict[str, Any]) -> None:
+        """Store the status of a background job, replacing the previous one."""
+        with self._io_lock:
+            self._write_job(fields["id"], fields)
+
+    def load_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._io_lock:
+            return self._read_job(job_id)
+
+    def load_jobs(self) -> List[Dict[str, Any]]:
+        with self._io_lock:
+            return list(self._read_jobs())
+
+    # -- logging -----------------------------------------------------------
+
+    def _on_event(self, event: str, payload: Dict[str, Any]) -> None:
+        # events are emitted under the model's write lock, which orders the
+        # records like the mutations; waiting for durability happens after
+        # the lock is released, so other writers can join the same batch
+        record = event_to_record(event, payload)
+        if record is not None:
+            seq = self._enqueue(*record)
+            if self.synchronous:
+                write_lock.after_release(lambda: self.wait_durable(seq))
+
+    def append(self, op: str, data: Dict[str, Any]) -> int:
+        seq = self._enqueue(op, data)
+        if self.synchronous:
+            self.wait_durable(seq)
+        return seq
+
+    def _enqueue(self, op: str, data: Dict[str, Any]) -> int:
+        with self._cond:
+            if self._error is not None:
+                raise IOError("The storage writer failed") from self._error
+            self._last_seq += 1
+            self._buffer.append((self._last_seq, op, data))
+            self._cond.notify_all()
+            return self._last_seq
+
+    def wait_durable(self, seq: int) -> None:
+        with self._cond:
+            self._wait_durable(seq)
+
+    def flush(self) -> None:
+        """Block until every record logged so far is durable."""
+        with self._cond:
+            self._wait_durable(self._last_seq)
+
+    def _wait_durable(self, seq: int) -> None:
+        while self._durable_seq < seq and self._error is None and self._writer is not None:
+            self._cond.wait()
+        if self._durable_seq < seq and self._error is not None:
+            raise IOError("The storage writer failed") from self._error
+
+    def _run_writer(self) -> None:
+        while True:
+            with self._cond:
+                while not self._buffer and not self._closed:
+                    self._cond.wait()
+                if not self._buffer:
+                    return
+                batch, self._buffer = self._buffer, []
+            try:
+                with self._io_lock:
+                    self._write_log(batch)
+            except BaseException as error:
+                with self._cond:
+                    self._error = error
+                    self._cond.notify_all()
+                return
+            with self._cond:
+                self._durable_seq = batch[-1][0]
+                self._since_checkpoint += len(batch)
+                start_checkpoint = (self.checkpoint_every and not self._checkpointing
+                                    and self._since_checkpoint >= self.checkpoint_every)
+                if start_checkpoint:
+                    self._checkpointing = True
+                self._cond.notify_all()
+            if start_checkpoint:
+                threading.Thread(target=self.checkpoint, name="storage-checkpoint", daemon=True).start()
+
+    def checkpoint(self) -> None:
+        """Write a snapshot of the agency and drop the log it makes redundant."""
+        try:
+            with self._io_lock:
+                self._rotate_log()
+                with self._cond:
+                    # every record up to seq was written before the rotation,
+                    # and its mutation happened before the state is dumped
+                    seq = self._durable_seq
+                    self._since_checkpoint = 0
+            state = dump_state(self._agency)
+            with self._io_lock:
+                self._write_snapshot(seq, state)
+        finally:
+            with self._cond:
+                self._checkpointing = False
@@ -0,0 +1,137 @@
+import json
+import os
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import LogEntry, Storage
+
+
+class FileStorage(Storage):
+    """Keeps the log and the snapshots as files in a local directory.
+
+    The log is split into numbered segments of JSON lines; a checkpoint
+    starts a new segment and deletes the older ones once the snapshot is on
+    disk. Snapshots are replaced atomically.
+
+    ID sequences are kept in their own file, which is only changed while
+    holding an exclusive lock on a lock file (where the platform has flock).
+    The status of every background job is a JSON file in the jobs directory.
+    """
+
+    SNAPSHOT = "snapshot.json"
+    SEQUENCES = "sequences.json"
+    SEQUENCES_LOCK = "sequences.lock"
+    JOBS = "jobs"
+    SEGMENT_PREFIX = "wal-"
+
+    def __init__(self, directory: str, **kwargs):
+        super().__init__(**kwargs)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._segment = None
+        self._segment_number = max(self._segment_numbers(), default=0)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_numbers(self) -> List[int]:
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith(self.SEGMENT_PREFIX) and name.endswith(".log"):
+                numbers.append(int(name[len(self.SEGMENT_PREFIX):-len(".log")]))
+        return sorted(numbers)
+
+    def _segment_path(self, number: int) -> str:
+        return self._path(f"{self.SEGMENT_PREFIX}{number:08d}.log")
+
+    def _read_snapshot(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        if not os.path.exists(self._path(self.SNAPSHOT)):
+            return None, 0
+        with open(self._path(self.SNAPSHOT)) as snapshot:
+            content = json.load(snapshot)
+        return content["state"], content["seq"]
+
+    def _read_log(self, after_seq: int) -> Iterator[LogEntry]:
+        for number in self._segment_numbers():
+            with open(self._segment_path(number)) as segment:
+                for line in segment:
+                    try:
+                        seq, op, data = json.loads(line)
+                    except ValueError:
+                        # a record torn by a crash ends the segment
+                        break
+                    if seq > after_seq:
+                        yield seq, op, data
+
+    def _write_log(self, entries: List[LogEntry]) -> None:
+        if self._segment is None:
+            self._segment_number += 1
+            self._segment = open(self._segment_path(self._segment_number), "a")
+        self._segment.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self._segment.flush()
+        os.fsync(self._segment.fileno())
+
+    def _rotate_log(self) -> None:
+        if self._segment is not None:
+            self._segment.close()
+            self._segment = None
+
+    def _write_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        temporary = self._path(self.SNAPSHOT + ".tmp")
+        with open(temporary, "w") as snapshot:
+            json.dump({"seq": seq, "state": state}, snapshot)
+            snapshot.flush()
+            os.fsync(snapshot.fileno())
+        os.replace(temporary, self._path(self.SNAPSHOT))
+        for number in self._segment_numbers():
+            if self._segment is None or number < self._segment_number:
+                os.remove(self._segment_path(number))
+
+    def _reserve_ids(self, sequence: str, count: int, start: int) -> int:
+        with open(self._path(self.SEQUENCES_LOCK), "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            sequences = {}
+            if os.path.exists(self._path(self.SEQUENCES)):
+                with open(self._path(self.SEQUENCES)) as stored:
+                    sequences = json.load(stored)
+            first = sequences.get(sequence, start)
+            sequences[sequence] = first + count
+            temporary = self._path(self.SEQUENCES + ".tmp")
+            with open(temporary, "w") as stored:
+                json.dump(sequences, stored)
+                stored.flush()
+                os.fsync(stored.fileno())
+            os.replace(temporary, self._path(self.SEQUENCES))
+        # closing the lock file releases the lock
+        return first
+
+    def _job_path(self, job_id: int) -> str:
+        return os.path.join(self._path(self.JOBS), f"{job_id}.json")
+
+    def _write_job(self, job_id: int, fields: Dict[str, Any]) -> None:
+        os.makedirs(self._path(self.JOBS), exist_ok=True)
+        temporary = self._job_path(job_id) + ".tmp"
+        with open(temporary, "w") as job:
+            json.dump(fields, job)
+        os.replace(temporary, self._job_path(job_id))
+
+    def _read_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        if not os.path.exists(self._job_path(job_id)):
+            return None
+        with open(self._job_path(job_id)) as job:
+            return json.load(job)
+
+    def _read_jobs(self) -> Iterator[Dict[str, Any]]:
+        if not os.path.isdir(self._path(self.JOBS)):
+            return
+        names = [name for name in os.listdir(self._path(self.JOBS)) if name.endswith(".json")]
+        for name in sorted(names, key=lambda name: int(name[:-len(".json")])):
+            with open(os.path.join(self._path(self.JOBS), name)) as job:
+                yield json.load(job)
+
+    def _close(self) -> None:
+        self._rotate_log()
@@ -0,0 +1,184 @@
+from typing import Any, Dict, Optional, Tuple
+
+from ..model.agency import Agency
+from ..model.events import EventBus
+from ..model.newspaper import Newspaper
+from ..model.issue import Issue
+from ..model.editor import Editor
+from ..model.subscriber import Subscriber
+
+Record = Tuple[str, Dict[str, Any]]
+
+
+def _paper_fields(paper: Newspaper) -> Dict[str, Any]:
+    return {"paper_id": paper.paper_id, "name": paper.name,
+            "frequency": paper.frequency, "price": paper.price}
+
+
+def _issue_fields(issue: Issue) -> Dict[str, Any]:
+    return {"paper_id": issue.newspaper.paper_id, "id": issue.id, "name": issue.name,
+            "releasedate": issue.releasedate, "released": issue.released}
+
+
+def event_to_record(event: str, payload: Dict[str, Any]) -> Optional[Record]:
+    """Translate a model event into the log record that replays it."""
+    if event in ("newspaper_added", "newspaper_updated"):
+        return event, _paper_fields(payload["paper"])
+    if event == "newspaper_removed":
+        return event, {"paper_id": payload["paper"].paper_id}
+    if event == "issue_added":
+        return event, _issue_fields(payload["issue"])
+    if event == "issue_released":
+        issue = payload["issue"]
+        return event, {"paper_id": issue.newspaper.paper_id, "id": issue.id,
+                       "releasedate": issue.releasedate}
+    if event == "editor_assigned":
+        issue = payload["issue"]
+        return event, {"paper_id": issue.newspaper.paper_id, "id": issue.id,
+                       "editor_id": payload["editor"].id}
+    if event == "issue_delivered":
+        issue = payload["issue"]
+        return event, {"paper_id": issue.newspaper.paper_id, "id": issue.id,
+                       "subscriber_ids": list(payload["subscriber_ids"])}
+    if event in ("editor_added", "editor_updated"):
+        return event, {"id": payload["editor"].id, "name": payload["editor"].name}
+    if event == "editor_removed":
+        return event, {"id": payload["editor"].id}
+    if event in ("subscriber_added", "subscriber_updated"):
+        return event, {"id": payload["subscriber"].id, "name": payload["subscriber"].name}
+    if event == "subscriber_removed":
+        return event, {"id": payload["subscriber"].id}
+    if event in ("subscribed", "unsubscribed"):
+        return event, {"id": payload["subscriber"].id, "paper_id": payload["paper"].paper_id}
+    return None
+
+
+def apply_record(agency: Agency, op: str, data: Dict[str, Any]) -> None:
+    """Replay a log record against the agency.
+
+    Replaying is idempotent: a record whose effect is already part of the
+    agency (e.g. because it was also captured by a snapshot) changes nothing.
+    """
+    if op == "newspaper_added":
+        if agency.get_newspaper(data["paper_id"]) is None:
+            agency.add_newspaper(Newspaper(**data))
+    elif op == "newspaper_updated":
+        paper = agency.get_newspaper(data["paper_id"])
+        if paper is not None:
+            paper.update(name=data["name"], frequency=data["frequency"], price=data["price"])
+    elif op == "newspaper_removed":
+        paper = agency.get_newspaper(data["paper_id"])
+        if paper is not None:
+            agency.remove_newspaper(paper)
+    elif op == "issue_added":
+        paper = agency.get_newspaper(data["paper_id"])
+        if paper is not None and paper.get_issue(data["id"]) is None:
+            paper.add_issue(Issue(name=data["name"], id=data["id"],
+                                  releasedate=data["releasedate"], released=data["released"]))
+    elif op == "issue_released":
+        issue = _get_issue(agency, data)
+        if issue is not None and not (issue.released and issue.releasedate == data["releasedate"]):
+            issue.released = True
+            issue.releasedate = data["releasedate"]
+            issue.newspaper.issues.refresh(issue)
+            # caches and indexes follow the event; the release was already
+            # acted on where it happened, so nothing delivers it again
+            EventBus.get_instance().emit("issue_released", issue=issue, replayed=True)
+    elif op == "editor_assigned":
+        issue = _get_issue(agency, data)
+        editor = agency.get_editor(data["editor_id"])
+        if issue is not None and editor is not None:
+            issue.set_editor(editor)
+    elif op == "issue_delivered":
+        issue = _get_issue(agency, data)
+        if issue is not None:
+            subscribers = (agency.get_subscriber(subscriber_id) for subscriber_id in data["subscriber_ids"])
+            issue.send_issue_to_all(subscriber for subscriber in subscribers if subscriber is not None)
+    elif op == "editor_added":
+        if agency.get_editor(data["id"]) is None:
+            agency.add_editor(Editor(**data))
+    elif op == "editor_updated":
+        editor = agency.get_editor(data["id"])
+        if editor is not None:
+            editor.update(name=data["name"])
+    elif op == "editor_removed":
+        editor = agency.get_editor(data["id"])
+        if editor is not None:
+            agency.delete_editor(editor)
+    elif op == "subscriber_added":
+        if agency.get_subscriber(data["id"]) is None:
+            agency.add_subscriber(Subscriber(**data))
+    elif op == "subscriber_updated":
+        subscriber = agency.get_subscriber(data["id"])
+        if subscriber is not None:
+            subscriber.update(name=data["name"])
+    elif op == "subscriber_removed":
+        subscriber = agency.get_subscriber(data["id"])
+        if subscriber is not None:
+            agency.remove_subscriber(subscriber)
+    elif op in ("subscribed", "unsubscribed"):
+        subscriber = agency.get_subscriber(data["id"])
+        paper = agency.get_newspaper(data["paper_id"])
+        if subscriber is not None and paper is not None:
+            if op == "subscribed":
+                if paper not in subscriber.subscribed_newspapers:
+                    subscriber.subscribe(paper)
+            else:
+                subscriber.unsubscribe(paper)
+    else:
+        raise ValueError(f"Unknown log record {op}")
+
+
+def _get_issue(agency: Agency, data: Dict[str, Any]) -> Optional[Issue]:
+    paper = agency.get_newspaper(data["paper_id"])
+    return None if paper is None else paper.get_issue(data["id"])
+
+
+def dump_state(agency: Agency) -> Dict[str, Any]:
+    """Capture the whole agency as plain, ID-referenced data."""
+    newspapers = []
+    for paper in agency.newspapers:
+        fields = _paper_fields(paper)
+        fields["issues"] = [dict(_issue_fields(issue), editor_id=issue.editor_id)
+                            for issue in paper.issues]
+        fields["subscribers"] = paper.subscribers.keys()
+        fields["deliveries"] = [[issue_id, paper.deliveries.recipients(issue_id).tolist()]
+                                for issue_id in paper.issues.keys()
+                                if paper.deliveries.count(issue_id)]
+        newspapers.append(fields)
+    return {
+        "newspapers": newspapers,
+        "editors": [{"id": editor.id, "name": editor.name} for editor in agency.editors],
+        "subscribers": [{"id": subscriber.id, "name": subscriber.name} for subscriber in agency.subscribers],
+    }
+
+
+def load_state(agency: Agency, state: Dict[str, Any]) -> None:
+    """Rebuild the agency from the output of dump_state, without emitting events."""
+    for fields in state["editors"]:
+        agency.editors.append(Editor(**fields))
+    for fields in state["subscribers"]:
+        agency.subscribers.append(Subscriber(**fields))
+    for fields in state["newspapers"]:
+        paper = Newspaper(paper_id=fields["paper_id"], name=fields["name"],
+                          frequency=fields["frequency"], price=fields["price"])
+        agency.newspapers.append(paper)
+        for issue_fields in fields["issues"]:
+            issue = Issue(name=issue_fields["name"], id=issue_fields["id"],
+                          releasedate=issue_fields["releasedate"], released=issue_fields["released"])
+            paper.issues.append(issue)
+            issue.editor_id = issue_fields["editor_id"]
+            editor = agency.editors.get(issue.editor_id)
+            if editor is not None:
+                editor.work_on_issues.append(issue)
+        for subscriber_id in fields["subscribers"]:
+            subscriber = agency.subscribers.get(subscriber_id)
+            if subscriber is not None:
+                subscriber.subscribed_newspapers.append(paper)
+                paper.subscribers.append(subscriber)
+        for issue_id, subscriber_ids in fields["deliveries"]:
+            paper.deliveries.record_many(issue_id, subscriber_ids)
+            for subscriber_id in subscriber_ids:
+                subscriber = agency.subscribers.get(subscriber_id)
+                if subscriber is not None:
+                    subscriber.delivered_by.append(paper)
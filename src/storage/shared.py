@@ -0,0 +1,370 @@
+import contextlib
+import json
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ..model.agency import Agency
+from ..model.events import ALL_EVENTS, EventBus
+from ..model.locking import write_lock
+from .base import Storage
+from .records import apply_record, dump_state, event_to_record, load_state
+
+# (op, data) of a record that is not in the log yet
+_Pending = Tuple[str, Dict[str, Any]]
+
+
+class ConnectionPool(object):
+    """A bounded set of SQLite connections shared by the threads of a process.
+
+    Connections are opened on demand, up to `size`; a thread that finds all
+    of them in use waits for one to be returned.
+    """
+
+    def __init__(self, path: str, size: int = 8, busy_timeout: float = 30.0):
+        self.path = path
+        self.size = size
+        self.busy_timeout = busy_timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None,
+                                     timeout=self.busy_timeout)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=FULL")
+        return connection
+
+    @contextlib.contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            connection = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            connection = self._open() if can_open else self._idle.get()
+        try:
+            yield connection
+        finally:
+            self._idle.put(connection)
+
+    def close(self) -> None:
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                return
+
+
+class _Transaction(object):
+    __slots__ = ("connection", "records")
+
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+        self.records: List[_Pending] = []
+
+
+class SharedSQLiteStorage(Storage):
+    """A SQLite database (WAL mode) shared by several processes, each with
+    its own copy of the agency.
+
+    The log is the common history: every record gets the next global
+    sequence number and the ID of the process that wrote it. A process
+    applies the records of the others in sequence order with sync(), so
+    every copy goes through the same mutations in the same order.
+
+    Writes that must see the latest state run in a transaction(): it takes
+    the database's write lock, syncs, and commits the records of the
+    mutations made inside it at the end, so writers of all processes are
+    serialized and no two copies ever apply conflicting mutations in a
+    different order. Mutations outside a transaction (background jobs,
+    the release scheduler) are logged in a short transaction of their own
+    once the model's write lock is released; those are deliveries and
+    releases, which give the same result in any order.
+
+    A write is committed before its request is answered, and every request
+    syncs first, so a client always reads its own writes, whichever process
+    serves it. Each thread borrows a connection from a pool; a thread in a
+    transaction uses its connection for everything, IDs and jobs included.
+
+    Checkpoints store a snapshot, but the log is kept for `log_retention`
+    seconds, so processes that were idle for a while can still catch up
+    record by record; a process that fell further behind reloads the
+    snapshot.
+    """
+
+    shared = True
+
+    def __init__(self, path: str, pool_size: int = 8, busy_timeout: float = 30.0,
+                 checkpoint_every: int = 100000, log_retention: float = 24 * 3600, **kwargs):
+        super().__init__(checkpoint_every=checkpoint_every, **kwargs)
+        self.path = path
+        self.log_retention = log_retention
+        self.origin = uuid.uuid4().hex
+        self.pool = ConnectionPool(path, pool_size, busy_timeout)
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._pending: List[_Pending] = []
+        self._pending_lock = threading.Lock()
+        self._applied_seq = 0
+        self._snapshot_seq = 0
+        with self.pool.connection() as connection:
+            connection.execute("CREATE TABLE IF NOT EXISTS shared_log (seq INTEGER PRIMARY KEY AUTOINCREMENT, "
+                               "origin TEXT NOT NULL, created REAL NOT NULL, op TEXT NOT NULL, data TEXT NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS snapshot "
+                               "(id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL, state TEXT NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS sequences "
+                               "(name TEXT PRIMARY KEY, next_id INTEGER NOT NULL)")
+            connection.execute("CREATE TABLE IF NOT EXISTS jobs "
+                               "(id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+
+    @contextlib.contextmanager
+    def _connection(self) -> Iterator[sqlite3.Connection]:
+        # the connection of the thread's transaction; another connection
+        # would wait for the lock that transaction holds
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None:
+            yield transaction.connection
+        else:
+            with self.pool.connection() as connection:
+                yield connection
+
+    @contextlib.contextmanager
+    def _writing(self, connection: sqlite3.Connection) -> Iterator[None]:
+        # a write transaction, unless the thread is in one already
+        if getattr(self._local, "transaction", None) is not None:
+            yield
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    # -- lifecycle ---------------------------------------------------------
+
+    def open(self, agency: Agency) -> None:
+        self._agency = agency
+        with self.pool.connection() as connection:
+            # one read transaction, so the snapshot and the log match
+            connection.execute("BEGIN")
+            try:
+                self._load(connection)
+            finally:
+                connection.execute("COMMIT")
+        self._closed = False
+        EventBus.get_instance().subscribe(ALL_EVENTS, self._on_event)
+
+    def _load(self, connection: sqlite3.Connection) -> None:
+        row = connection.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+        last = self._last_seq_in(connection)
+        self._snapshot_seq = self._applied_seq = 0 if row is None else row[0]
+        if row is not None:
+            with write_lock:
+                load_state(self._agency, json.loads(row[1]))
+        self._apply(connection.execute("SELECT seq, op, data FROM shared_log WHERE seq > ? AND seq <= ? "
+                                       "ORDER BY seq", (self._snapshot_seq, last)).fetchall())
+        self._applied_seq = max(self._applied_seq, last)
+
+    def close(self) -> None:
+        EventBus.get_instance().unsubscribe(ALL_EVENTS, self._on_event)
+        self.flush()
+        self._closed = True
+        self.pool.close()
+
+    # -- keeping up with the other processes -------------------------------
+
+    @staticmethod
+    def _last_seq_in(connection: sqlite3.Connection) -> int:
+        # AUTOINCREMENT never reuses a sequence number, even once the log
+        # is trimmed
+        row = connection.execute("SELECT seq FROM sqlite_sequence WHERE name = 'shared_log'").fetchone()
+        return 0 if row is None else row[0]
+
+    def sync(self) -> int:
+        """Apply the records the other processes logged since the last sync;
+        returns how many were applied."""
+        with self._connection() as connection:
+            return self._sync(connection)
+
+    def _sync(self, connection: sqlite3.Connection) -> int:
+        if self._last_seq_in(connection) <= self._applied_seq:
+            return 0
+        with self._sync_lock:
+            oldest = connection.execute("SELECT MIN(seq) FROM shared_log").fetchone()[0]
+            if (oldest is None or oldest > self._applied_seq + 1) and self._is_trimmed(connection):
+                self._reload(connection)
+                return 0
+            # outside a transaction every statement may see a later state,
+            # so the rows are read up to the sequence number read first
+            last = self._last_seq_in(connection)
+            rows = connection.execute("SELECT seq, op, data FROM shared_log WHERE seq > ? AND seq <= ? "
+                                      "AND origin != ? ORDER BY seq",
+                                      (self._applied_seq, last, self.origin)).fetchall()
+            self._apply(rows)
+            self._applied_seq = max(self._applied_seq, last)
+            return len(rows)
+
+    def _is_trimmed(self, connection: sqlite3.Connection) -> bool:
+        # records this process has not applied were dropped by a checkpoint
+        row = connection.execute("SELECT seq FROM snapshot WHERE id = 1").fetchone()
+        return row is not None and row[0] > self._applied_seq
+
+    def _reload(self, connection: sqlite3.Connection) -> None:
+        with write_lock:
+            self._agency.reset_analytics()
+            self._agency.newspapers.clear()
+            self._agency.editors.clear()
+            self._agency.subscribers.clear()
+            self._load(connection)
+            EventBus.get_instance().emit("agency_restored", agency=self._agency)
+
+    def _apply(self, rows: List[Tuple[int, str, str]]) -> None:
+        if not rows:
+            return
+        # the events of replayed records are not logged again
+        self._local.replaying = True
+        try:
+            with write_lock:
+                for seq, op, data in rows:
+                    apply_record(self._agency, op, json.loads(data))
+        finally:
+            self._local.replaying = False
+
+    @contextlib.contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run mutations that must be based on the latest state of every
+        process: holds the database's write lock from the sync before them
+        to the commit of their records. Transactions nest."""
+        if getattr(self._local, "transaction", None) is not None:
+            yield
+            return
+        with self.pool.connection() as connection:
+            # BEGIN IMMEDIATE waits (up to the busy timeout) for the writers
+            # of the other processes
+            connection.execute("BEGIN IMMEDIATE")
+            self._local.transaction = transaction = _Transaction(connection)
+            try:
+                self._sync(connection)
+                yield
+            finally:
+                self._local.transaction = None
+                try:
+                    # the mutations happened in memory, so their records are
+                    # committed even if the request failed later on
+                    last_seq = self._insert(connection, transaction.records)
+                    connection.execute("COMMIT")
+                except BaseException:
+                    connection.execute("ROLLBACK")
+                    raise
+        self._after_commit(last_seq)
+
+    # -- logging -----------------------------------------------------------
+
+    def _on_event(self, event: str, payload: Dict[str, Any]) -> None:
+        if getattr(self._local, "replaying", False):
+            return
+        record = event_to_record(event, payload)
+        if record is None:
+            return
+        transaction = getattr(self._local, "transaction", None)
+        if transaction is not None:
+            transaction.records.append(record)
+            return
+        with self._pending_lock:
+            self._pending.append(record)
+        write_lock.after_release(self.flush)
+
+    def append(self, op: str, data: Dict[str, Any]) -> int:
+        with self._pending_lock:
+            self._pending.append((op, data))
+        return self.flush()
+
+    def flush(self) -> int:
+        """Commit the records logged outside of transactions; returns the
+        sequence number of the last one."""
+        with self._pending_lock:
+            records, self._pending = self._pending, []
+        if not records:
+            return 0
+        with self._connection() as connection:
+            with self._writing(connection):
+                last_seq = self._insert(connection, records)
+        self._after_commit(last_seq)
+        return last_seq
+
+    def wait_durable(self, seq: int) -> None:
+        # records are durable once flush() or their transaction returned
+        pass
+
+    def _insert(self, connection: sqlite3.Connection, records: List[_Pending]) -> int:
+        now = time.time()
+        last_seq = 0
+        for op, data in records:
+            last_seq = connection.execute("INSERT INTO shared_log (origin, created, op, data) VALUES (?, ?, ?, ?)",
+                                          (self.origin, now, op, json.dumps(data))).lastrowid
+        return last_seq
+
+    def _after_commit(self, last_seq: int) -> None:
+        if not (self.checkpoint_every and last_seq - self._snapshot_seq >= self.checkpoint_every):
+            return
+        with self._cond:
+            if self._checkpointing:
+                return
+            self._checkpointing = True
+        threading.Thread(target=self.checkpoint, name="storage-checkpoint", daemon=True).start()
+
+    def checkpoint(self) -> None:
+        """Store a snapshot of the agency and drop the log records that are
+        part of it and older than `log_retention`."""
+        try:
+            with self.pool.connection() as connection:
+                # the state then contains every record up to seq; later
+                # ones are replayed over it, which changes nothing twice
+                self._sync(connection)
+                seq = self._applied_seq
+                state = dump_state(self._agency)
+                with self._writing(connection):
+                    # another process may have stored a later snapshot meanwhile
+                    connection.execute("INSERT INTO snapshot (id, seq, state) VALUES (1, ?, ?) "
+                                       "ON CONFLICT (id) DO UPDATE SET seq = excluded.seq, state = excluded.state "
+                                       "WHERE excluded.seq > snapshot.seq", (seq, json.dumps(state)))
+                    connection.execute("DELETE FROM shared_log WHERE seq <= ? AND created < ?",
+                                       (seq, time.time() - self.log_retention))
+                self._snapshot_seq = seq
+        finally:
+            with self._cond:
+                self._checkpointing = False
+
+    # -- ID sequences and jobs ---------------------------------------------
+
+    def reserve_ids(self, sequence: str, count: int, start: int) -> int:
+        with self._connection() as connection:
+            with self._writing(connection):
+                row = connection.execute("SELECT next_id FROM sequences WHERE name = ?", (sequence,)).fetchone()
+                first = start if row is None else row[0]
+                connection.execute("INSERT OR REPLACE INTO sequences (name, next_id) VALUES (?, ?)",
+                                   (sequence, first + count))
+        return first
+
+    def save_job(self, fields: Dict[str, Any]) -> None:
+        with self._connection() as connection:
+            connection.execute("INSERT OR REPLACE INTO jobs (id, data) VALUES (?, ?)",
+                               (fields["id"], json.dumps(fields)))
+
+    def load_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        with self._connection() as connection:
+            row = connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def load_jobs(self) -> List[Dict[str, Any]]:
+        with self._connection() as connection:
+            return [json.loads(data) for data, in connection.execute("SELECT data FROM jobs ORDER BY id").fetchall()]
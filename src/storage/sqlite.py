@@ -0,0 +1,73 @@
+import json
+import sqlite3
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .base import LogEntry, Storage
+
+
+class SQLiteStorage(Storage):
+    """Keeps the log and the latest snapshot in a SQLite database (WAL mode)."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute("PRAGMA synchronous=FULL")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS wal "
+                                 "(seq INTEGER PRIMARY KEY, op TEXT NOT NULL, data TEXT NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS snapshot "
+                                 "(id INTEGER PRIMARY KEY CHECK (id = 1), seq INTEGER NOT NULL, state TEXT NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS sequences "
+                                 "(name TEXT PRIMARY KEY, next_id INTEGER NOT NULL)")
+        self._connection.execute("CREATE TABLE IF NOT EXISTS jobs "
+                                 "(id INTEGER PRIMARY KEY, data TEXT NOT NULL)")
+
+    def _read_snapshot(self) -> Tuple[Optional[Dict[str, Any]], int]:
+        row = self._connection.execute("SELECT seq, state FROM snapshot WHERE id = 1").fetchone()
+        if row is None:
+            return None, 0
+        return json.loads(row[1]), row[0]
+
+    def _read_log(self, after_seq: int) -> Iterator[LogEntry]:
+        rows = self._connection.execute("SELECT seq, op, data FROM wal WHERE seq > ? ORDER BY seq", (after_seq,))
+        for seq, op, data in rows:
+            yield seq, op, json.loads(data)
+
+    def _write_log(self, entries: List[LogEntry]) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.executemany("INSERT OR REPLACE INTO wal (seq, op, data) VALUES (?, ?, ?)",
+                                         [(seq, op, json.dumps(data)) for seq, op, data in entries])
+
+    def _write_snapshot(self, seq: int, state: Dict[str, Any]) -> None:
+        with self._connection:
+            self._connection.execute("BEGIN")
+            self._connection.execute("INSERT OR REPLACE INTO snapshot (id, seq, state) VALUES (1, ?, ?)",
+                                     (seq, json.dumps(state)))
+            self._connection.execute("DELETE FROM wal WHERE seq <= ?", (seq,))
+
+    def _reserve_ids(self, sequence: str, count: int, start: int) -> int:
+        # BEGIN IMMEDIATE takes the database's write lock, which serializes
+        # reservations of all processes using the same file
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            row = self._connection.execute("SELECT next_id FROM sequences WHERE name = ?", (sequence,)).fetchone()
+            first = start if row is None else row[0]
+            self._connection.execute("INSERT OR REPLACE INTO sequences (name, next_id) VALUES (?, ?)",
+                                     (sequence, first + count))
+        return first
+
+    def _write_job(self, job_id: int, fields: Dict[str, Any]) -> None:
+        self._connection.execute("INSERT OR REPLACE INTO jobs (id, data) VALUES (?, ?)", (job_id, json.dumps(fields)))
+
+    def _read_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connection.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _read_jobs(self) -> Iterator[Dict[str, Any]]:
+        for data, in self._connection.execute("SELECT data FROM jobs ORDER BY id").fetchall():
+            yield json.loads(data)
+
+    def _close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,102 @@
+import json
+
+# import the fixtures (this is necessary!)
+from ..fixtures import app, client, agency
+from ...src.api.bulk import BulkLoader
+from ...src.api.editorNS import editor_post_model
+
+
+def test_bulk_create_newspapers(client, agency):
+    count_before = len(agency.newspapers)
+    response = client.post("/newspaper/bulk", json=[
+        {"name": "Paper A", "frequency": 1, "price": 1.5},
+        {"name": "Paper B", "frequency": "weekly", "price": 2.5},
+        {"name": "Paper C", "frequency": 7, "price": 3.5},
+    ])
+    assert response.status_code == 200
+    parsed = response.get_json()
+
+    assert (parsed["created"], parsed["updated"], parsed["failed"]) == (2, 0, 1)
+    assert [result["status"] for result in parsed["results"]] == ["created", "failed", "created"]
+    assert "frequency" in parsed["results"][1]["errors"]
+    assert len(agency.newspapers) == count_before + 2
+    first, third = parsed["results"][0]["id"], parsed["results"][2]["id"]
+    assert third == first + 1
+    assert agency.get_newspaper(third).name == "Paper C"
+
+
+def test_bulk_updates_items_with_an_id(client, agency):
+    response = client.post("/newspaper/bulk", json=[
+        {"paper_id": 100, "name": "Renamed", "frequency": 7, "price": 9.99},
+        {"paper_id": 999, "name": "Missing", "frequency": 7, "price": 9.99},
+    ])
+    results = response.get_json()["results"]
+
+    assert results[0] == {"index": 0, "status": "updated", "id": 100}
+    assert results[1]["status"] == "failed"
+    assert results[1]["error"] == "Newspaper with ID 999 was not found"
+    assert agency.get_newspaper(100).name == "Renamed"
+
+
+def test_bulk_create_subscribers_from_ndjson(client, agency):
+    count_before = len(agency.subscribers)
+    lines = [json.dumps({"name": f"Subscriber {number}"}) for number in range(250)] + ["{not json"]
+    response = client.post("/subscriber/bulk", data="\n".join(lines) + "\n",
+                           content_type="application/x-ndjson")
+    parsed = response.get_json()
+
+    assert parsed["created"] == 250
+    assert parsed["failed"] == 1
+    assert len(agency.subscribers) == count_before + 250
+    assert len({result["id"] for result in parsed["results"][:250]}) == 250
+
+    for result in parsed["results"][:250]:
+        agency.remove_subscriber(agency.get_subscriber(result["id"]))
+
+
+def test_bulk_create_issues_and_editors(client, agency):
+    issue_count = len(agency.get_newspaper(100).issues)
+    response = client.post("/newspaper/100/issue/bulk", json=[
+        {"name": "Vol. 1", "releasedate": "2024-05-01", "released": False},
+        {"id": 5, "name": "Vol. 2", "releasedate": "2024-05-02", "released": False},
+    ])
+    parsed = response.get_json()
+    assert (parsed["created"], parsed["failed"]) == (1, 1)
+    assert len(agency.get_newspaper(100).issues) == issue_count + 1
+
+    response = client.post("/editor/bulk", json=[{"name": "Editor A"}, {"id": 100, "name": "Editor B"}])
+    assert response.get_json()["created"] == 1
+    assert agency.get_editor(100).name == "Editor B"
+
+
+def test_bulk_checks_the_format_of_release_dates(client, agency):
+    response = client.post("/newspaper/100/issue/bulk", json=[
+        {"name": "Vol. 1", "releasedate": "garbage", "released": False},
+        {"name": "Vol. 2", "releasedate": "2024-05-02T08:00:00", "released": False},
+    ])
+    results = response.get_json()["results"]
+    assert [result["status"] for result in results] == ["failed", "created"]
+    assert "releasedate" in results[0]["errors"]
+    assert client.get("/newspaper/100/issue").status_code == 200
+
+
+def test_a_failing_chunk_only_fails_the_offending_items():
+    created = []
+
+    def create(payloads):
+        if any(payload["name"] == "Taken" for payload in payloads):
+            raise ValueError("Editor Taken already exists")
+        created.extend(payload["name"] for payload in payloads)
+        return list(range(len(created) - len(payloads), len(created)))
+
+    items = [{"name": "A"}, {"name": "Taken"}, {"name": "B"}, {"name": "C"}]
+    parsed = BulkLoader(editor_post_model, "id", chunk_size=3).load(iter(items), create)
+
+    assert [result["status"] for result in parsed["results"]] == ["created", "failed", "created", "created"]
+    assert parsed["results"][1]["error"] == "Editor Taken already exists"
+    assert created == ["A", "B", "C"]
+
+
+def test_bulk_rejects_a_body_that_is_not_a_list(client, agency):
+    response = client.post("/editor/bulk", json={"name": "Editor A"})
+    assert response.status_code == 400
@@ -0,0 +1,70 @@
+# import the fixtures (this is necessary!)
+from ..fixtures import app, client, agency
+
+
+def cache_of(app):
+    return app.extensions["response_cache"]
+
+
+def test_second_get_is_served_from_the_cache(app, client, agency):
+    first = client.get("/newspaper/")
+    second = client.get("/newspaper/")
+
+    assert second.status_code == 200
+    assert second.get_data() == first.get_data()
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert cache_of(app).hits == 1
+
+
+def test_matching_etag_gives_not_modified(client, agency):
+    etag = client.get("/newspaper/100").headers["ETag"]
+
+    response = client.get("/newspaper/100", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.get_data() == b""
+
+
+def test_update_invalidates_the_cached_paper(client, agency):
+    before = client.get("/newspaper/100")
+    client.post("/newspaper/100", json={"name": "Renamed", "frequency": 7, "price": 2.5})
+
+    response = client.get("/newspaper/100", headers={"If-None-Match": before.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.get_json()["name"] == "Renamed"
+    assert client.get("/newspaper/").get_json()["newspapers"][0]["name"] == "Renamed"
+
+
+def test_release_invalidates_only_the_papers_issues(app, client, agency):
+    client.get("/newspaper/100/issue/102")
+    client.get("/newspaper/101/issue")
+    client.post("/newspaper/100/issue/102/release")
+
+    assert client.get("/newspaper/100/issue/102").get_json()["released"] is True
+    client.get("/newspaper/101/issue")
+    assert cache_of(app).hits == 1
+
+
+def test_assigning_an_editor_invalidates_the_issues_filtered_by_editor(client, agency):
+    assert client.get("/newspaper/100/issue?editor_id=103").get_json() == []
+    client.post("/newspaper/100/issue/100/editor?editor_id=103")
+
+    issues = client.get("/newspaper/100/issue?editor_id=103").get_json()
+    assert [issue["id"] for issue in issues] == [100]
+
+
+def test_query_strings_are_cached_separately(client, agency):
+    first_page = client.get("/newspaper/?limit=1").get_json()
+    everything = client.get("/newspaper/").get_json()
+    assert len(first_page["newspapers"]) == 1
+    assert len(everything["newspapers"]) == len(agency.newspapers)
+
+
+def test_lru_bound_evicts_old_entries(app, client, agency):
+    cache = cache_of(app)
+    cache.max_entries = 2
+    client.get("/newspaper/100")
+    client.get("/newspaper/101")
+    client.get("/newspaper/102")
+    client.get("/newspaper/100")
+    assert cache.hits == 0
+    assert len(cache) == 2
@@ -59,7 +59,14 @@ def test_get_editor_issues(agency, client):
     response = client.get("editor/100/issues")
     assert response.status_code == 200
     parsed = response.get_json()
-    assert len(parsed) == len(agency.get_editor(100).work_on_issues)
+    # all three share the issue ID 100
+    assert len(parsed) == len(agency.get_editor(100).work_on_issues) == 3
+
+    response = client.get("editor/100/issues?limit=2")
+    assert response.headers["X-Next-Cursor"] == "101:100"
+    response = client.get("editor/100/issues?limit=2&after=101:100")
+    assert len(response.get_json()) == 1
+    assert client.get("editor/100/issues?limit=2&after=101").status_code == 400
 
 
 
@@ -68,4 +75,10 @@ def test_get_editor_issues(agency, client):
 
 
 
-    
\ No newline at end of file
+    
+def test_get_editors_page(agency, client):
+    response = client.get("/editor/?after=100&limit=2")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    assert [editor["id"] for editor in parsed["editor"]] == [101, 102]
+    assert response.headers["X-Next-Cursor"] == "102"
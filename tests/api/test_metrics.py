@@ -0,0 +1,76 @@
+import pytest
+from flask import Flask
+
+# import the fixtures (this is necessary!)
+from ..fixtures import app, client, agency
+from ...src.api.metrics import Metrics
+from ...src.app import create_app
+from ...src.model.agency import Agency
+
+
+@pytest.fixture()
+def metrics(monkeypatch, agency):
+    # after the agency fixture, so that only this app measures
+    monkeypatch.setenv("PAPERBACK_METRICS", "1")
+    app = create_app()
+    yield app.extensions["metrics"], app.test_client()
+    app.extensions["metrics"].close()
+
+
+def sample(text, name):
+    # the value of one sample line, e.g. 'paperback_objects{kind="newspapers"}'
+    for line in text.splitlines():
+        if line.startswith(name + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_metrics_are_off_by_default(app, client):
+    assert "metrics" not in app.extensions
+    assert client.get("/metrics").status_code == 404
+    assert not hasattr(Agency.get_newspaper, "__wrapped__")
+
+
+def test_requests_are_counted_per_route(metrics, agency):
+    _, client = metrics
+    client.get("/newspaper/100")
+    client.get("/newspaper/101")
+    client.get("/newspaper/999")
+
+    text = client.get("/metrics").get_data(as_text=True)
+    route = 'method="GET",route="/newspaper/<int:paper_id>"'
+    assert sample(text, f"paperback_request_duration_seconds_count{{{route}}}") == 3
+    assert sample(text, f'paperback_request_duration_seconds_bucket{{{route},le="+Inf"}}') == 3
+    assert sample(text, f'paperback_responses_total{{{route},status="200"}}') == 3
+
+
+def test_model_calls_and_objects(metrics, agency):
+    _, client = metrics
+    before = sample(client.get("/metrics").get_data(as_text=True),
+                    'paperback_model_call_seconds_count{method="Agency.get_newspaper"}')
+    client.get("/newspaper/100/issue/102")
+
+    text = client.get("/metrics").get_data(as_text=True)
+    assert sample(text, 'paperback_model_call_seconds_count{method="Agency.get_newspaper"}') == before + 1
+    assert sample(text, 'paperback_objects{kind="newspapers"}') == len(agency.newspapers)
+    assert sample(text, 'paperback_objects{kind="subscribers"}') == len(agency.subscribers)
+
+
+def test_model_is_restored_when_closed():
+    metrics = Metrics()
+    metrics.init_app(Flask(__name__))
+    assert hasattr(Agency.get_newspaper, "__wrapped__")
+    metrics.close()
+    assert not hasattr(Agency.get_newspaper, "__wrapped__")
+
+
+def test_slow_requests_are_profiled(metrics, agency):
+    collector, client = metrics
+    collector.profile_sample = 1.0
+    collector.slow_seconds = 0.0
+    client.get("/newspaper/100")
+
+    assert collector.profiled == 1
+    profiles = client.get("/metrics/profiles").get_data(as_text=True)
+    assert "GET /newspaper/100" in profiles
+    assert "cumulative" in profiles
@@ -152,3 +152,98 @@ def test_send_issue(client, agency):
 
 
 
+
+def test_send_issue_to_all_subscribers(client, agency):
+    paper = agency.get_newspaper(101)
+    for subscriber in agency.subscribers:
+        subscriber.subscribe(paper)
+    agency.get_newspaper(101).get_issue(100).send_issue(agency.get_subscriber(100))
+    response = client.post("/newspaper/101/issue/100/deliver")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    assert parsed == {"sent": len(agency.subscribers) - 1, "already_delivered": 1}
+    issue = paper.get_issue(100)
+    assert all(subscriber in issue.send_to for subscriber in agency.subscribers)
+
+def test_send_unreleased_issue_to_all_subscribers(client, agency):
+    response = client.post("/newspaper/101/issue/102/deliver")
+    assert response.status_code == 200
+    assert response.get_json() == "Issue with ID 102 was not released"
+
+def test_get_newspaper_subscribers(client, agency):
+    paper = agency.get_newspaper(115)
+    for subscriber in agency.subscribers:
+        subscriber.subscribe(paper)
+    response = client.get("/newspaper/115/subscribers?limit=3")
+    assert response.status_code == 200
+    first_page = response.get_json()["subscribers"]
+    assert [subscriber["id"] for subscriber in first_page] == [100, 101, 102]
+    cursor = response.headers["X-Next-Cursor"]
+    response = client.get(f"/newspaper/115/subscribers?limit=3&after={cursor}")
+    second_page = response.get_json()["subscribers"]
+    assert len(first_page) + len(second_page) == len(paper.subscribers)
+    assert "X-Next-Cursor" not in response.headers
+
+def test_get_issues_page(client, agency):
+    response = client.get("/newspaper/100/issue?limit=1")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    assert [issue["id"] for issue in parsed] == [100]
+    assert response.headers["X-Next-Cursor"] == "100"
+
+def test_export_newspapers(client, agency):
+    response = client.get("/newspaper/export")
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == len(agency.newspapers)
+    assert [record["paper_id"] for record in records] == sorted(paper.paper_id for paper in agency.newspapers)
+
+def test_export_issues(client, agency):
+    response = client.get("/newspaper/100/issue/export")
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(records) == len(agency.get_newspaper(100).issues)
+    assert records[0]["name"] == "Vol. 1"
+
+def test_deliver_issue_in_background(agency, client):
+    paper = agency.get_newspaper(100)
+    for subscriber in agency.subscribers:
+        subscriber.subscribe(paper)
+    response = client.post(f"/newspaper/100/issue/100/deliver?background=true")
+    assert response.status_code == 202
+    job_id = response.get_json()["id"]
+    assert agency.jobs.get(job_id).wait(5)
+    response = client.get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    assert parsed["status"] == "finished"
+    assert parsed["result"]["sent"] + parsed["result"]["already_delivered"] == len(paper.subscribers)
+    assert client.get("/jobs/1").get_json() == "Job with ID 1 was not found"
+
+
+def test_filter_and_sort_newspapers(client, agency):
+    response = client.get("/newspaper/?price_min=2&price_max=20&sort=-price")
+    prices = [paper["price"] for paper in response.get_json()["newspapers"]]
+    expected = sorted((paper.price for paper in agency.newspapers if 2 <= paper.price <= 20), reverse=True)
+    assert prices == expected
+
+
+def test_sorted_page_after_a_removed_paper(client, agency):
+    response = client.get("/newspaper/?sort=price&limit=2")
+    cursor = response.headers["X-Next-Cursor"]
+    client.delete(f"/newspaper/{cursor}")
+
+    response = client.get(f"/newspaper/?sort=price&limit=2&after={cursor}")
+    assert response.status_code == 400
+
+
+def test_filter_issues_by_release(client, agency):
+    response = client.get("/newspaper/100/issue?released=false&releasedate_from=2025-01-01&releasedate_to=2025-05-05")
+    assert [issue["id"] for issue in response.get_json()] == [102]
+
+    response = client.get("/newspaper/100/issue?releasedate_to=2025-05-04")
+    assert [issue["id"] for issue in response.get_json()] == [100]
+
+    response = client.get("/newspaper/100/issue?releasedate_from=soon")
+    assert response.status_code == 400
@@ -0,0 +1,33 @@
+from ..fixtures import app, client, agency
+
+
+def test_subscribers_report(agency, client):
+    agency.reset_analytics()
+    agency.get_subscriber(100).subscribe(agency.get_newspaper(100))
+    response = client.get("/reports/subscribers")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    assert [row["paper_id"] for row in parsed["subscribers"]] == [paper.paper_id for paper in agency.newspapers]
+    assert parsed["subscribers"][0]["subscribers"] == len(agency.get_newspaper(100).subscribers)
+    agency.reset_analytics()
+
+
+def test_revenue_report(agency, client):
+    agency.reset_analytics()
+    response = client.get("/reports/revenue")
+    assert response.status_code == 200
+    for row in response.get_json()["revenue"]:
+        paper = agency.get_newspaper(row["paper_id"])
+        assert row["monthly_revenue"] == len(paper.subscribers) * paper.price
+    agency.reset_analytics()
+
+
+def test_deliveries_and_editors_report(agency, client):
+    agency.reset_analytics()
+    response = client.get("/reports/deliveries")
+    assert response.status_code == 200
+    assert len(response.get_json()["deliveries"]) == sum(len(paper.issues) for paper in agency.newspapers)
+    response = client.get("/reports/editors")
+    assert response.status_code == 200
+    assert [row["editor_id"] for row in response.get_json()["editors"]] == agency.editors.keys()
+    agency.reset_analytics()
@@ -0,0 +1,61 @@
+import json
+
+from flask_restx import marshal
+
+# import the fixtures (this is necessary!)
+from ..fixtures import app, client, agency
+from ...src.api.newspaperNS import issue_get_model, paper_get_model
+from ...src.api.serializer import serializer_for
+from ...src.model.issue import Issue
+from ...src.model.newspaper import Newspaper
+
+
+def restx_json(data, model, envelope=None):
+    # what flask-restx sends for the same data
+    return json.dumps(marshal(data, model, envelope=envelope)) + "\n"
+
+
+def test_encoding_matches_flask_restx():
+    papers = [Newspaper(paper_id=1, name="Die Zeit ä€ \"quoted\" 100%", frequency=7, price=4.5),
+              Newspaper(paper_id=2, name=None, frequency=None, price=float("inf")),
+              Newspaper(paper_id=3, name=12, frequency=True, price=3)]
+    issues = [Issue(name="Vol. 1", id=1, releasedate="2024-03-01", released=False),
+              Issue(name="Vol. 2", id=2, releasedate="2024-03-01T12:30:00+01:00", released=True),
+              Issue(name="Vol. 3", id=3, releasedate=None, released=None)]
+
+    for data, model in ((papers, paper_get_model), (issues, issue_get_model)):
+        serializer = serializer_for(model)
+        assert serializer.dumps(data, "items") + "\n" == restx_json(data, model, "items")
+        assert serializer.dumps(data[0]) + "\n" == restx_json(data[0], model)
+        assert serializer.dumps([]) == "[]"
+
+
+def test_models_are_compiled_once():
+    assert serializer_for(paper_get_model) is serializer_for(paper_get_model)
+
+
+def test_list_endpoint_sends_the_same_bytes(client, agency):
+    response = client.get("/newspaper/")
+    assert response.content_type == "application/json"
+    assert response.get_data(as_text=True) == restx_json(list(agency.newspapers), paper_get_model, "newspapers")
+
+    response = client.get("/newspaper/100/issue")
+    assert response.get_data(as_text=True) == restx_json(list(agency.newspapers.get(100).issues), issue_get_model)
+
+
+def test_field_mask_falls_back_to_flask_restx(client, agency):
+    response = client.get("/newspaper/", headers={"X-Fields": "name"})
+    assert response.get_json()["newspapers"][0] == {"name": agency.newspapers.get(100).name}
+
+
+def test_swagger_documents_the_envelope(client):
+    schema = client.get("/swagger.json").get_json()["paths"]["/newspaper/"]["get"]["responses"]["200"]["schema"]
+    assert schema["properties"]["newspapers"]["items"]["$ref"] == "#/definitions/NewspaperGetModel"
+
+
+def test_masked_and_full_responses_are_cached_apart(client, agency):
+    client.get("/newspaper/")
+    masked = client.get("/newspaper/", headers={"X-Fields": "name"}).get_json()
+    full = client.get("/newspaper/").get_json()
+    assert set(masked["newspapers"][0]) == {"name"}
+    assert set(full["newspapers"][0]) == {"paper_id", "name", "frequency", "price"}
@@ -55,4 +55,30 @@ def test_subscriber_stats(client, agency):
 
 
 
-    
\ No newline at end of file
+    
+def test_get_subscribers_page(agency, client):
+    response = client.get("/subscriber/?limit=2")
+    assert response.status_code == 200
+    parsed = response.get_json()
+    ids = sorted(subscriber.id for subscriber in agency.get_subscribers())
+    assert [subscriber["id"] for subscriber in parsed["subscribers"]] == ids[:2]
+    response = client.get(f"/subscriber/?limit=2&after={response.headers['X-Next-Cursor']}")
+    parsed = response.get_json()
+    assert [subscriber["id"] for subscriber in parsed["subscribers"]] == ids[2:4]
+
+def test_export_subscribers(agency, client):
+    response = client.get("/subscriber/export")
+    assert response.status_code == 200
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == len(agency.get_subscribers())
+
+def test_reconcile_missing_issues(agency, client):
+    for subscriber in agency.subscribers:
+        subscriber.subscribe(agency.get_newspaper(100))
+    response = client.post("/subscriber/missingissues?batch_size=2")
+    assert response.status_code == 200
+    for paper in agency.newspapers:
+        for issue in paper.issues:
+            if issue.released:
+                assert all(subscriber in issue.send_to for subscriber in paper.subscribers)
+    assert client.post("/subscriber/missingissues").get_json()["sent"] == 0
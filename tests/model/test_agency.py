@@ -4,6 +4,7 @@ from ...src.model.newspaper import Newspaper
 from ...src.model.agency import Agency
 from ...src.model.editor import Editor
 from ...src.model.subscriber import Subscriber
+from ...src.model.issue import Issue
 from ..fixtures import app, client, agency
 from ..testdata import populate
 
@@ -134,3 +135,59 @@ def test_remove_subscriber(agency):
     after = len(agency.subscribers)
     assert(before == after + 1)
 
+
+def test_remove_newspaper_cancels_subscriptions():
+    agency = Agency()
+    paper = Newspaper(paper_id=999, name="Simpsons Comic", frequency=7, price=3.14)
+    subscriber = Subscriber(id=999, name="Hlib Tereshchenko")
+    agency.add_newspaper(paper)
+    agency.add_subscriber(subscriber)
+    subscriber.subscribe(paper)
+    assert subscriber in paper.subscribers
+    agency.remove_newspaper(paper)
+    assert paper not in subscriber.subscribed_newspapers
+
+def test_remove_subscriber_cancels_subscriptions():
+    agency = Agency()
+    paper = Newspaper(paper_id=999, name="Simpsons Comic", frequency=7, price=3.14)
+    subscriber = Subscriber(id=999, name="Hlib Tereshchenko")
+    agency.add_newspaper(paper)
+    agency.add_subscriber(subscriber)
+    subscriber.subscribe(paper)
+    agency.remove_subscriber(subscriber)
+    assert subscriber not in paper.subscribers
+
+def test_reconcile_deliveries():
+    agency = Agency()
+    paper = Newspaper(paper_id=999, name="Simpsons Comic", frequency=7, price=3.14)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=1, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    paper.add_issue(Issue(id=2, name="Vol. 2", released=False, releasedate="2025-05-05T00:00:00"))
+    for subscriber_id in range(10):
+        subscriber = Subscriber(id=subscriber_id, name="Hlib Tereshchenko")
+        agency.add_subscriber(subscriber)
+        subscriber.subscribe(paper)
+    paper.get_issue(1).send_issue(agency.get_subscriber(0))
+
+    report = agency.reconcile_deliveries(batch_size=4)
+    assert report == {"issues_checked": 1, "sent": 9,
+                      "deliveries": [{"paper_id": 999, "issue_id": 1, "sent": 9}]}
+    assert len(paper.get_issue(1).send_to) == 10
+    assert len(paper.get_issue(2).send_to) == 0
+    assert agency.reconcile_deliveries()["sent"] == 0
+
+def test_auto_delivery_of_released_issues():
+    agency = Agency()
+    agency.enable_auto_delivery(batch_size=3)
+    paper = Newspaper(paper_id=999, name="Simpsons Comic", frequency=7, price=3.14)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=1, name="Vol. 1", released=False, releasedate="2022-04-04T00:00:00"))
+    for subscriber_id in range(10):
+        subscriber = Subscriber(id=subscriber_id, name="Hlib Tereshchenko")
+        agency.add_subscriber(subscriber)
+        subscriber.subscribe(paper)
+    paper.release_issue(1)
+    assert agency.jobs.join(5)
+    assert len(paper.get_issue(1).send_to) == 10
+    agency.disable_auto_delivery()
+    agency.jobs.shutdown()
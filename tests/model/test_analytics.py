@@ -0,0 +1,80 @@
+from ...src.model.agency import Agency
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.editor import Editor
+from ...src.model.subscriber import Subscriber
+
+
+def build():
+    agency = Agency()
+    for paper_id, price in ((100, 13.14), (101, 1.12)):
+        paper = Newspaper(paper_id=paper_id, name=f"Paper {paper_id}", frequency=7, price=price)
+        agency.add_newspaper(paper)
+        paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    editor = Editor(id=100, name="William Shakespeare")
+    agency.add_editor(editor)
+    agency.add_editor(Editor(id=101, name="Agatha Christie"))
+    agency.get_newspaper(100).get_issue(100).set_editor(editor)
+    for subscriber_id in range(100, 110):
+        subscriber = Subscriber(id=subscriber_id, name="x")
+        agency.add_subscriber(subscriber)
+        subscriber.subscribe(agency.get_newspaper(100))
+        if subscriber_id % 2:
+            subscriber.subscribe(agency.get_newspaper(101))
+    agency.get_newspaper(100).get_issue(100).send_issue_to_all(agency.get_newspaper(100).subscribers)
+    return agency
+
+
+def test_reports_of_an_existing_agency():
+    agency = build()
+    analytics = agency.analytics
+    assert analytics.subscribers_per_paper() == [
+        {"paper_id": 100, "name": "Paper 100", "subscribers": 10},
+        {"paper_id": 101, "name": "Paper 101", "subscribers": 5}]
+    assert [row["monthly_revenue"] for row in analytics.revenue_per_paper()] == [10 * 13.14, 5 * 1.12]
+    assert [(row["paper_id"], row["delivered"], row["completeness"])
+            for row in analytics.delivery_completeness()] == [(100, 10, 1.0), (101, 0, 0.0)]
+    assert [row["issues"] for row in analytics.issues_per_editor()] == [1, 0]
+    agency.reset_analytics()
+
+
+def test_reports_follow_mutations():
+    agency = build()
+    analytics = agency.analytics
+    paper = agency.get_newspaper(101)
+    paper.add_issue(Issue(id=101, name="Vol. 2", released=True, releasedate="2022-04-11T00:00:00"))
+    paper.get_issue(101).set_editor(agency.get_editor(101))
+    paper.get_issue(101).send_issue(agency.get_subscriber(101))
+    agency.get_subscriber(103).unsubscribe(paper)
+    agency.remove_subscriber(agency.get_subscriber(100))
+    agency.remove_newspaper(agency.get_newspaper(100))
+
+    assert analytics.subscribers_per_paper() == [{"paper_id": 101, "name": "Paper 101", "subscribers": 4}]
+    assert [(row["issue_id"], row["delivered"], row["completeness"])
+            for row in analytics.delivery_completeness()] == [(100, 0, 0.0), (101, 1, 0.25)]
+    assert [row["issues"] for row in analytics.issues_per_editor()] == [0, 1]
+    agency.reset_analytics()
+
+
+def test_compaction_keeps_the_reports():
+    agency = Agency()
+    paper = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.0)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    analytics = agency.analytics
+    for subscriber_id in range(5000):
+        subscriber = Subscriber(id=subscriber_id, name="x")
+        agency.add_subscriber(subscriber)
+        subscriber.subscribe(paper)
+    paper.get_issue(100).send_issue_to_all(paper.subscribers)
+    for subscriber_id in range(0, 5000, 4):
+        agency.get_subscriber(subscriber_id).unsubscribe(paper)
+    for subscriber_id in range(1, 5000, 4):
+        agency.remove_subscriber(agency.get_subscriber(subscriber_id))
+    for subscriber_id in range(2, 5000, 4):
+        agency.remove_subscriber(agency.get_subscriber(subscriber_id))
+
+    row, = analytics.delivery_completeness()
+    assert (row["delivered"], row["subscribers"], row["completeness"]) == (1250, 1250, 1.0)
+    assert analytics.revenue_per_paper()[0]["monthly_revenue"] == 1250.0
+    agency.reset_analytics()
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from ...src.model.ids import FIRST_ID, IdAllocator
+
+
+def test_ids_are_monotonic_per_sequence():
+    allocator = IdAllocator(block_size=10)
+    assert [allocator.next_id("newspaper") for _ in range(25)] == list(range(FIRST_ID, FIRST_ID + 25))
+    assert allocator.next_id("issue") == FIRST_ID
+
+
+def test_ids_in_use_are_skipped():
+    allocator = IdAllocator()
+    in_use = {FIRST_ID: object(), FIRST_ID + 1: object()}
+    assert allocator.next_id("editor", in_use.get) == FIRST_ID + 2
+
+
+def test_blocks_are_reserved_from_the_source():
+    reservations = []
+
+    def reserve(sequence, count, start):
+        reservations.append((sequence, count))
+        return 5000 + 1000 * len(reservations)
+
+    allocator = IdAllocator(reserve, block_size=3)
+    assert [allocator.next_id("subscriber") for _ in range(4)] == [6000, 6001, 6002, 7000]
+    assert reservations == [("subscriber", 3), ("subscriber", 3)]
+
+
+def test_concurrent_allocation_is_unique():
+    allocator = IdAllocator(block_size=7)
+    ids = []
+
+    def allocate():
+        ids.extend(allocator.next_id("subscriber") for _ in range(1000))
+
+    threads = [threading.Thread(target=allocate) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(set(ids)) == 8000
+
+
+def test_many_ids_take_one_reservation():
+    reservations = []
+
+    def reserve(sequence, count, start):
+        reservations.append(count)
+        return 1000 * len(reservations)
+
+    allocator = IdAllocator(reserve, block_size=10)
+    assert allocator.next_id("issue") == 1000
+    assert allocator.next_ids("issue", 50) == list(range(1001, 1010)) + list(range(2000, 2041))
+    assert reservations == [10, 41]
+
+
+def test_reserving_a_block_does_not_hold_the_allocator():
+    # the source takes a database lock, which a writer holds while it
+    # allocates IDs itself
+    database, next_block = threading.RLock(), [FIRST_ID]
+    reserving, holding = threading.Event(), threading.Event()
+
+    def reserve(sequence, count, start):
+        reserving.set()
+        with database:
+            first = next_block[0]
+            next_block[0] += count
+            return first
+
+    allocator = IdAllocator(reserve)
+    ids = {}
+
+    def writer():
+        with database:
+            holding.set()
+            reserving.wait(5)
+            time.sleep(0.05)
+            ids["writer"] = allocator.next_id("subscriber")
+
+    def refill():
+        holding.wait(5)
+        ids["refill"] = allocator.next_id("issue")
+
+    threads = [threading.Thread(target=target, daemon=True) for target in (writer, refill)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(5)
+    assert sorted(ids) == ["refill", "writer"]
@@ -0,0 +1,48 @@
+from ...src.model.ids import IdAllocator
+from ...src.model.jobs import FAILED, FINISHED, JobQueue
+from ...src.storage import SQLiteStorage
+
+
+def test_job_runs_and_reports_progress():
+    jobs = JobQueue(IdAllocator())
+
+    def work(progress):
+        for step in range(3):
+            progress({"step": step})
+        return {"done": True}
+
+    job = jobs.submit("work", work)
+    assert job.wait(5)
+    assert job.status == FINISHED
+    assert job.progress == {"step": 2}
+    assert job.result == {"done": True}
+    assert jobs.get(job.id) is job
+    jobs.shutdown()
+
+
+def test_failing_job():
+    jobs = JobQueue(IdAllocator())
+    job = jobs.submit("work", lambda progress: 1 / 0)
+    assert job.wait(5)
+    assert job.status == FAILED
+    assert job.error.startswith("ZeroDivisionError")
+    jobs.shutdown()
+
+
+def test_job_status_is_persisted(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "data.db"))
+    jobs = JobQueue(IdAllocator(), keep=0)
+    jobs.attach_storage(storage)
+    job = jobs.submit("work", lambda progress: 42)
+    job.wait(5)
+    jobs.submit("work", lambda progress: 43).wait(5)
+    # finished jobs beyond `keep` are looked up in the storage
+    assert jobs.get(job.id) is not job
+    assert jobs.get(job.id).result == 42
+    jobs.shutdown()
+
+    storage.save_job(dict(job.to_dict(), id=job.id + 100, status="running"))
+    restarted = JobQueue(IdAllocator())
+    restarted.attach_storage(storage)
+    assert restarted.get(job.id + 100).status == FAILED
+    storage.close()
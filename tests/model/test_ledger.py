@@ -0,0 +1,68 @@
+from ...src.model.ledger import DeliveryLedger
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.subscriber import Subscriber
+from ..fixtures import app
+
+
+def test_ledger_record_once():
+    ledger = DeliveryLedger()
+    assert ledger.record(100, 1) == True
+    assert ledger.record(100, 1) == False
+    assert ledger.delivered(100, 1)
+    assert not ledger.delivered(100, 2)
+    assert len(ledger) == 1
+
+
+def test_ledger_discard_subscriber():
+    ledger = DeliveryLedger()
+    ledger.record(100, 1)
+    ledger.record(101, 1)
+    ledger.record(101, 2)
+    ledger.discard_subscriber(1)
+    assert ledger.issues_of(1) == []
+    assert list(ledger.pairs()) == [(101, 2)]
+    assert len(ledger) == 1
+
+
+def test_send_issue_is_recorded_on_both_sides(app):
+    paper = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.12)
+    issue = Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00")
+    paper.add_issue(issue)
+    subscriber = Subscriber(id=100, name="Sophia Nguyen")
+    with app.app_context():
+        assert issue.send_issue(subscriber) is None
+        assert issue.send_issue(subscriber) is not None
+    assert subscriber in issue.send_to
+    assert len(issue.send_to) == 1
+    assert subscriber.has_received(issue)
+    assert subscriber.recieved_issues == [issue]
+
+
+def test_check_missing_issues(app):
+    paper = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.12)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    paper.add_issue(Issue(id=101, name="Vol. 2", released=False, releasedate="2025-05-05T00:00:00"))
+    subscriber = Subscriber(id=100, name="Sophia Nguyen")
+    subscriber.subscribe(paper)
+    with app.app_context():
+        subscriber.check_missing_issues()
+    assert subscriber.has_received(paper.get_issue(100))
+    assert not subscriber.has_received(paper.get_issue(101))
+
+
+def test_ledger_compaction_keeps_deliveries():
+    ledger = DeliveryLedger()
+    assert len(ledger.record_many(100, range(0, 200000, 2))) == 100000
+    ledger.compact(100)
+    ledger.discard_subscriber(0)
+    ledger.record(100, 1)
+    ledger.record(100, 0)
+    assert len(ledger.record_many(100, range(200000))) == 99999
+    assert ledger.recipients(100).tolist() == list(range(200000))
+    assert len(ledger) == 200000
+    for subscriber_id in range(0, 200000, 3):
+        ledger.discard_subscriber(subscriber_id)
+    assert len(ledger) == len(ledger.recipients(100)) == 200000 - 66667
+    assert ledger.delivered(100, 1) and not ledger.delivered(100, 3)
+    assert ledger.undelivered(100, [1, 3, 6, 7]) == [3, 6]
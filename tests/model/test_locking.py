@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+
+from ...src.model.agency import Agency
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.subscriber import Subscriber
+from ...src.model.locking import ReadLock, WriteLock
+
+
+def run_threads(target, count=8):
+    threads = [threading.Thread(target=target, args=(number,)) for number in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def test_get_instance_creates_one_agency():
+    Agency.singleton_instance = None
+    instances = []
+    run_threads(lambda number: instances.append(Agency.get_instance()))
+    assert all(instance is instances[0] for instance in instances)
+
+
+def test_concurrent_sign_ups_and_subscriptions():
+    agency = Agency()
+    paper = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.12)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+
+    def sign_up(number):
+        for subscriber_id in range(number * 500, (number + 1) * 500):
+            subscriber = Subscriber(id=subscriber_id, name="x")
+            agency.add_subscriber(subscriber)
+            subscriber.subscribe(paper)
+            if subscriber_id % 3 == 0:
+                agency.remove_subscriber(subscriber)
+            else:
+                paper.get_issue(100).send_issue(subscriber)
+
+    run_threads(sign_up)
+    remaining = [subscriber_id for subscriber_id in range(4000) if subscriber_id % 3]
+    assert sorted(agency.subscribers.keys()) == remaining
+    assert sorted(paper.subscribers.keys()) == remaining
+    assert len(paper.deliveries) == len(remaining)
+
+
+def test_after_release_runs_outside_the_lock():
+    lock = WriteLock()
+    calls = []
+    with lock:
+        with lock:
+            lock.after_release(lambda: calls.append(lock._lock._is_owned()))
+        assert calls == []
+    assert calls == [False]
+
+
+def test_readers_share_the_read_lock_but_exclude_writers():
+    writer = WriteLock()
+    reader = ReadLock(writer)
+    # both readers have to be inside at once to pass the barrier
+    inside, shared, written = threading.Barrier(2, timeout=5), [], []
+
+    def read(number):
+        with reader:
+            inside.wait()
+            shared.append(number)
+
+    def write():
+        with writer:
+            written.append(True)
+
+    run_threads(read, count=2)
+    assert sorted(shared) == [0, 1]
+
+    with reader:
+        thread = threading.Thread(target=write)
+        thread.start()
+        thread.join(0.1)
+        assert written == []
+    thread.join()
+    assert written == [True]
+
+
+def test_a_writer_may_read_but_a_reader_may_not_write():
+    writer = WriteLock()
+    reader = ReadLock(writer)
+    with writer:
+        with reader:
+            with writer:
+                pass
+    with reader:
+        with pytest.raises(RuntimeError):
+            with writer:
+                pass
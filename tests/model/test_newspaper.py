@@ -0,0 +1,37 @@
+import pytest
+
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+
+
+def create_paper():
+    paper = Newspaper(paper_id=100, name="The New York Times", frequency=7, price=13.14)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    paper.add_issue(Issue(id=102, name="Vol. 2", released=False, releasedate="2025-05-05T00:00:00"))
+    return paper
+
+
+def test_get_issue():
+    paper = create_paper()
+    assert paper.get_issue(100).name == "Vol. 1"
+    assert paper.get_issue(102).newspaper is paper
+    assert paper.get_issue(1001) is None
+
+
+def test_get_issues_keeps_order():
+    paper = create_paper()
+    assert [issue.id for issue in paper.get_issues()] == [100, 102]
+
+
+def test_add_issue_same_id_should_raise_error():
+    paper = create_paper()
+    with pytest.raises(ValueError):
+        paper.add_issue(Issue(id=100, name="Vol. 1 again", releasedate="2022-04-04T00:00:00"))
+    assert len(paper.get_issues()) == 2
+
+
+def test_release_issue():
+    paper = create_paper()
+    paper.release_issue(102)
+    assert paper.get_issue(102).released == True
+    assert paper.release_issue(1001) is None
@@ -0,0 +1,88 @@
+import pytest
+
+from ...src.model.editor import Editor
+from ...src.model.issue import Issue
+from ...src.model.newspaper import Newspaper
+from ...src.model.query import Query
+from ...src.model.registry import Registry
+
+
+def make_papers():
+    papers = Registry(key="paper_id")
+    papers.extend(Newspaper(paper_id=paper_id, name=f"Paper {paper_id}", frequency=paper_id % 7 + 1,
+                            price=(paper_id * 37) % 50 / 2) for paper_id in range(1, 201))
+    return papers
+
+
+def test_range_filter_matches_a_scan():
+    papers = make_papers()
+    found, cursor = Query(papers).where("price", 5, 10).page()
+    assert cursor is None
+    assert [paper.paper_id for paper in found] == [paper.paper_id for paper in papers if 5 <= paper.price <= 10]
+
+
+def test_sorted_pages_follow_the_cursor():
+    papers = make_papers()
+    expected = sorted((paper for paper in papers if paper.frequency <= 3), key=lambda paper: (-paper.price, -paper.paper_id))
+
+    pages, after = [], None
+    while True:
+        page, after = Query(papers).where("frequency", high=3).order_by("price", descending=True).page(after, 7)
+        pages.extend(page)
+        if after is None:
+            break
+    assert pages == expected
+
+
+@pytest.mark.parametrize("low, high", [(0, 2), (0, 24), (24, 24)])
+def test_filtered_pages_follow_the_cursor(low, high):
+    # a few wide, a few narrow ranges, so that both ways of finding a page run
+    papers = make_papers()
+    expected = [paper for paper in papers if low <= paper.price <= high and paper.frequency >= 2]
+
+    pages, after = [], None
+    while True:
+        page, after = Query(papers).where("price", low, high).where("frequency", 2).page(after, 5)
+        pages.extend(page)
+        if after is None:
+            break
+    assert pages == expected
+
+
+def test_removed_cursor_of_a_sorted_query_is_rejected():
+    papers = make_papers()
+    page, after = Query(papers).order_by("price").page(limit=3)
+    papers.discard(page[-1])
+
+    with pytest.raises(ValueError):
+        Query(papers).order_by("price").page(after, 3)
+
+
+def test_index_follows_changes():
+    papers = make_papers()
+    assert Query(papers).where("price", 100).page()[0] == []
+
+    paper = papers.get(17)
+    paper.update(name=paper.name, frequency=paper.frequency, price=120)
+    papers.refresh(paper)
+    papers.discard(papers.get(18))
+    papers.append(Newspaper(paper_id=500, name="New", frequency=1, price=150))
+
+    found, _ = Query(papers).where("price", 100).order_by("price").page()
+    assert [paper.paper_id for paper in found] == [17, 500]
+    assert 18 not in papers.index("price")
+
+
+def test_issue_filters():
+    paper = Newspaper(paper_id=1, name="Paper", frequency=7, price=1.0)
+    editor = Editor(id=5, name="Editor")
+    paper.add_issues([Issue(name=f"Vol. {day}", id=day, releasedate=f"2024-03-{day:02d}T08:00:00") for day in range(1, 29)])
+    for issue_id in (3, 4, 5, 20):
+        paper.get_issue(issue_id).set_editor(editor)
+    paper.release_issue(4)
+
+    unreleased = Query(paper.issues).equals("released", False).where("releasedate", "2024-03-02", "2024-03-06")
+    assert [issue.id for issue in unreleased.page()[0]] == [2, 3, 5]
+
+    by_editor = Query(paper.issues).equals("editor_id", 5).order_by("releasedate").page()[0]
+    assert [issue.id for issue in by_editor] == [3, 5, 20, 4]
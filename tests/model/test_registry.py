@@ -0,0 +1,75 @@
+import pytest
+
+from ...src.model.registry import Registry
+from ...src.model.newspaper import Newspaper
+from ...src.model.subscriber import Subscriber
+
+
+def test_registry_keeps_insertion_order():
+    registry = Registry(key="id")
+    subscribers = [Subscriber(id=i, name=f"Subscriber {i}") for i in (5, 1, 3)]
+    registry.extend(subscribers)
+    assert [subscriber.id for subscriber in registry] == [5, 1, 3]
+    assert registry[0] is subscribers[0]
+    assert registry[-1] is subscribers[-1]
+
+
+def test_registry_get_by_key():
+    registry = Registry(key="paper_id")
+    paper = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.12)
+    registry.append(paper)
+    assert registry.get(100) is paper
+    assert registry.get(101) is None
+    assert paper in registry
+
+
+def test_registry_remove():
+    registry = Registry(key="id")
+    subscriber = Subscriber(id=100, name="Sophia Nguyen")
+    registry.append(subscriber)
+    registry.remove(subscriber)
+    assert len(registry) == 0
+    assert subscriber not in registry
+    with pytest.raises(ValueError):
+        registry.remove(subscriber)
+
+
+def test_registry_allows_removal_while_iterating():
+    registry = Registry(key="id", items=[Subscriber(id=i, name="x") for i in range(10)])
+    for subscriber in registry:
+        registry.remove(subscriber)
+    assert len(registry) == 0
+
+
+def test_registry_page():
+    registry = Registry(key="id", items=[Subscriber(id=i, name="x") for i in (7, 3, 5, 1)])
+    items, cursor = registry.page(limit=2)
+    assert [subscriber.id for subscriber in items] == [1, 3]
+    registry.append(Subscriber(id=4, name="x"))
+    registry.remove(registry.get(5))
+    items, cursor = registry.page(after=cursor, limit=2)
+    assert [subscriber.id for subscriber in items] == [4, 7]
+    assert cursor is None
+
+
+def test_tuple_registry_on_a_subscriber():
+    subscriber = Subscriber(id=1, name="Reader")
+    papers = [Newspaper(paper_id=paper_id, name="Heute", frequency=1, price=1.12) for paper_id in (101, 100)]
+    subscriber.subscribed_newspapers.extend(papers)
+    subscriber.subscribed_newspapers.append(papers[0])
+    assert subscriber.subscribed_newspapers.keys() == [101, 100]
+    assert subscriber.subscribed_newspapers.get(100) is papers[1]
+    assert papers[1] in subscriber.subscribed_newspapers
+    subscriber.subscribed_newspapers.remove(papers[0])
+    assert list(subscriber.subscribed_newspapers) == [papers[1]]
+    with pytest.raises(ValueError):
+        subscriber.subscribed_newspapers.remove(papers[0])
+    subscriber.subscribed_newspapers.clear()
+    assert len(subscriber.subscribed_newspapers) == 0
+
+
+def test_entities_have_no_instance_dict():
+    subscriber = Subscriber(id=1, name="Reader")
+    with pytest.raises(AttributeError):
+        subscriber.address = "Vienna"
+    assert Subscriber(id=2, name="".join(["Rea", "der"])).name is subscriber.name
@@ -0,0 +1,62 @@
+import datetime
+import time
+
+from ...src.model.agency import Agency
+from ...src.model.issue import Issue
+from ...src.model.newspaper import Newspaper
+from ...src.model.scheduler import ReleaseScheduler, release_time
+
+
+def make_agency():
+    agency = Agency()
+    paper = Newspaper(paper_id=1, name="Simpsons Comic", frequency=7, price=3.14)
+    agency.add_newspaper(paper)
+    paper.add_issues([Issue(id=day, name=f"Vol. {day}", releasedate=f"2024-03-{day:02d}T08:00:00")
+                      for day in range(1, 11)])
+    return agency, paper
+
+
+def test_due_issues_are_released_in_order():
+    agency, paper = make_agency()
+    scheduler = ReleaseScheduler(agency, batch_size=3)
+    scheduler.rebuild()
+    assert scheduler.release_due(release_time("2024-03-04T08:00:00")) == 4
+    assert [issue.id for issue in paper.issues if issue.released] == [1, 2, 3, 4]
+    assert paper.get_issue(4).releasedate == "2024-03-04T08:00:00"
+    assert scheduler.next_release() == release_time("2024-03-05T08:00:00")
+
+
+def test_release_dates_without_a_time_zone_are_utc():
+    expected = datetime.datetime(2024, 3, 4, 8, tzinfo=datetime.timezone.utc).timestamp()
+    assert release_time("2024-03-04T08:00:00") == expected
+    assert release_time("2024-03-04T09:00:00+01:00") == expected
+    assert release_time("garbage") is None
+
+
+def test_skips_issues_released_by_hand_and_rebuilds():
+    agency, paper = make_agency()
+    scheduler = ReleaseScheduler(agency)
+    scheduler.rebuild()
+    paper.release_issue(2)
+    assert scheduler.release_due(release_time("2024-03-02T08:00:00")) == 1
+
+    # e.g. after a restart: the heap is built from the unreleased issues
+    scheduler = ReleaseScheduler(agency)
+    scheduler.rebuild()
+    assert len(scheduler) == 8
+    assert scheduler.release_due(release_time("2024-03-31")) == 8
+
+
+def test_worker_releases_new_issues_when_due():
+    agency, paper = make_agency()
+    agency.enable_release_scheduler()
+    try:
+        soon = (datetime.datetime.now() + datetime.timedelta(seconds=0.2)).isoformat()
+        paper.add_issue(Issue(id=50, name="Vol. 50", releasedate=soon))
+        deadline = time.monotonic() + 5
+        while not paper.get_issue(50).released and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert paper.get_issue(50).released
+        assert all(issue.released for issue in paper.issues)
+    finally:
+        agency.disable_release_scheduler()
@@ -0,0 +1,80 @@
+import pytest
+
+from ...src.model.agency import Agency
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.editor import Editor
+from ...src.model.subscriber import Subscriber
+
+
+def create_agency():
+    agency = Agency()
+    paper = Newspaper(paper_id=100, name="Die Zeit", frequency=7, price=5.5)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=True, releasedate="2022-04-04T00:00:00"))
+    paper.add_issue(Issue(id=101, name="Vol. 2", released=False, releasedate=None))
+    editor = Editor(id=100, name="Agatha Christie")
+    agency.add_editor(editor)
+    paper.get_issue(100).set_editor(editor)
+    for subscriber_id in range(100, 110):
+        subscriber = Subscriber(id=subscriber_id, name=f"Subscriber {subscriber_id}")
+        agency.add_subscriber(subscriber)
+        if subscriber_id % 2:
+            subscriber.subscribe(paper)
+    paper.get_issue(100).send_issue_to_all(paper.subscribers)
+    agency.add_newspaper(Newspaper(paper_id=101, name="Falter", frequency=7, price=4.2))
+    return agency
+
+
+def test_snapshot_and_restore(tmp_path):
+    path = str(tmp_path / "agency.snapshot")
+    create_agency().snapshot(path)
+
+    restored = Agency()
+    restored.restore(path)
+    paper = restored.get_newspaper(100)
+    assert [p.paper_id for p in restored.all_newspapers()] == [100, 101]
+    assert (paper.name, paper.frequency, paper.price) == ("Die Zeit", 7, 5.5)
+    assert paper.get_issue(101).releasedate is None
+    assert paper.get_issue(100).released
+    assert restored.get_editor(100).get_issues() == [paper.get_issue(100)]
+    assert [subscriber.id for subscriber in paper.subscribers] == [101, 103, 105, 107, 109]
+    assert restored.get_subscriber(101).subscribed_newspapers.get(100) is paper
+    assert len(paper.deliveries) == 5
+    assert restored.get_subscriber(103).has_received(paper.get_issue(100))
+    assert not restored.get_subscriber(102).has_received(paper.get_issue(100))
+    assert restored.get_subscriber(103).create_stats()["Number of issues that the subscriber received for each paper"] == {100: 1}
+
+
+def test_restore_maps_deliveries(tmp_path):
+    path = str(tmp_path / "agency.snapshot")
+    create_agency().snapshot(path)
+    restored = Agency()
+    restored.restore(path)
+    ledger = restored.get_newspaper(100).deliveries
+    assert not ledger.recipients(100).flags.owndata
+    assert ledger.delivered(100, 101)
+    ledger.record(100, 102)
+    assert ledger.recipients(100).tolist() == [101, 102, 103, 105, 107, 109]
+
+
+def test_missing_names_stay_missing(tmp_path):
+    path = str(tmp_path / "agency.snapshot")
+    agency = Agency()
+    agency.add_newspaper(Newspaper(paper_id=100, name="Zeit", frequency=7, price=5.5))
+    agency.add_editor(Editor(id=100, name=None))
+    agency.add_subscriber(Subscriber(id=100, name=None))
+    agency.snapshot(path)
+
+    restored = Agency()
+    restored.restore(path)
+    assert restored.get_editor(100).name is None
+    assert restored.get_subscriber(100).name is None
+    assert restored.get_newspaper(100).name == "Zeit"
+
+
+def test_restore_invalid_file(tmp_path):
+    path = tmp_path / "agency.snapshot"
+    path.write_bytes(b"not a snapshot at all")
+    with pytest.raises(ValueError):
+        Agency().restore(str(path))
@@ -0,0 +1,36 @@
+from ...src.model.agency import Agency
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.subscriber import Subscriber
+
+
+def test_stats_follow_mutations():
+    agency = Agency()
+    daily = Newspaper(paper_id=100, name="Heute", frequency=1, price=1.1)
+    weekly = Newspaper(paper_id=101, name="Die Zeit", frequency=7, price=2.2)
+    agency.add_newspaper(daily)
+    agency.add_newspaper(weekly)
+    for issue_id in (100, 101):
+        daily.add_issue(Issue(id=issue_id, name="Vol.", released=True, releasedate="2022-04-04T00:00:00"))
+    subscriber = Subscriber(id=100, name="Reader")
+    agency.add_subscriber(subscriber)
+    subscriber.subscribe(daily)
+    assert subscriber.create_stats()["Monthly cost"] == 1.1
+
+    subscriber.subscribe(weekly)
+    daily.get_issue(100).send_issue(subscriber)
+    daily.get_issue(101).send_issue_to_all([subscriber])
+    stats = subscriber.create_stats()
+    assert stats["Monthly cost"] == 1.1 + 2.2
+    assert stats["Number of issues that the subscriber received for each paper"] == {100: 2}
+
+    weekly.update(name="Die Zeit", frequency=7, price=3.0)
+    assert subscriber.create_stats()["Monthly cost"] == 1.1 + 3.0
+    subscriber.unsubscribe(daily)
+    assert subscriber.create_stats()["Annual cost"] == 12 * 3.0
+
+    agency.remove_newspaper(daily)
+    agency.remove_newspaper(weekly)
+    stats = subscriber.create_stats()
+    assert stats["Monthly cost"] == 0
+    assert stats["Number of issues that the subscriber received for each paper"] == {}
@@ -0,0 +1,154 @@
+import contextlib
+
+import pytest
+
+from ...src.app import create_app
+from ...src.model.agency import Agency
+from ...src.model.editor import Editor
+from ...src.model.events import EventBus
+from ...src.model.issue import Issue
+from ...src.model.newspaper import Newspaper
+from ...src.storage import SharedSQLiteStorage, open_storage
+from .test_storage import check, fill
+
+
+class Worker(object):
+    # an agency with its own event bus, standing in for a worker process
+    def __init__(self, path, **kwargs):
+        self.bus = EventBus()
+        with self.active():
+            self.agency = Agency()
+            self.storage = SharedSQLiteStorage(path, **kwargs)
+            self.agency.attach_storage(self.storage)
+
+    @contextlib.contextmanager
+    def active(self):
+        previous = EventBus.singleton_instance
+        EventBus.singleton_instance = self.bus
+        try:
+            yield self.agency if hasattr(self, "agency") else None
+        finally:
+            EventBus.singleton_instance = previous
+
+    def sync(self):
+        with self.active():
+            return self.storage.sync()
+
+    def close(self):
+        with self.active():
+            self.storage.close()
+
+
+@pytest.fixture()
+def workers(tmp_path):
+    started = []
+
+    def start(**kwargs):
+        worker = Worker(str(tmp_path / "shared.db"), **kwargs)
+        started.append(worker)
+        return worker
+    yield start
+    for worker in started:
+        worker.close()
+
+
+def test_writes_of_one_worker_reach_the_others(workers):
+    first, second = workers(), workers()
+    with first.active() as agency:
+        fill(agency)
+    assert second.sync() > 0
+    check(second.agency)
+    # its own records are not applied again
+    assert first.sync() == 0
+
+
+def test_transactions_order_conflicting_writes_alike(workers):
+    first, second = workers(), workers()
+    with first.active() as agency:
+        agency.add_newspaper(Newspaper(paper_id=100, name="Daily", frequency=1, price=1.0))
+    with second.active() as agency:
+        with second.storage.transaction():
+            # the transaction syncs first, so the paper is there
+            agency.get_newspaper(100).update(name="Second", frequency=1, price=2.0)
+    with first.active() as agency:
+        with first.storage.transaction():
+            assert agency.get_newspaper(100).name == "Second"
+            agency.get_newspaper(100).update(name="First", frequency=1, price=3.0)
+    second.sync()
+    assert first.agency.get_newspaper(100).name == second.agency.get_newspaper(100).name == "First"
+
+
+def test_new_worker_recovers_everything(workers):
+    first = workers(checkpoint_every=5)
+    with first.active() as agency:
+        fill(agency)
+    first.storage.checkpoint()
+    check(workers().agency)
+
+
+def test_worker_behind_a_trimmed_log_reloads(workers):
+    first, second = workers(log_retention=0), workers()
+    with first.active() as agency:
+        fill(agency)
+    first.storage.checkpoint()
+    assert second.sync() == 0
+    check(second.agency)
+
+
+def test_ids_and_jobs_are_shared(workers):
+    first, second = workers(), workers()
+    ids = {first.agency.ids.next_id("subscriber") for _ in range(150)}
+    ids |= {second.agency.ids.next_id("subscriber") for _ in range(150)}
+    assert len(ids) == 300
+
+    first.storage.save_job({"id": 7, "kind": "deliver", "status": "running"})
+    third = workers()
+    assert third.agency.jobs.get(7).status == "running"
+
+
+def test_requests_read_the_writes_of_other_workers(workers, tmp_path):
+    first, second = workers(), workers()
+    previous = Agency.singleton_instance
+    Agency.singleton_instance = second.agency
+    try:
+        with second.active():
+            client = create_app().test_client()
+            with first.active() as agency:
+                agency.add_newspaper(Newspaper(paper_id=100, name="Daily", frequency=1, price=1.0))
+            assert client.get("/newspaper/100").get_json()["name"] == "Daily"
+
+            response = client.post("/newspaper/", json={"name": "Weekly", "frequency": 7, "price": 2.0})
+            first.sync()
+            assert first.agency.get_newspaper(response.get_json()["paper_id"]).name == "Weekly"
+    finally:
+        Agency.singleton_instance = previous
+
+
+def test_releases_of_other_workers_reach_caches_and_indexes(workers):
+    first, second = workers(), workers()
+    with first.active() as agency:
+        agency.add_editor(Editor(id=5, name="Editor"))
+        paper = Newspaper(paper_id=100, name="Daily", frequency=1, price=1.0)
+        agency.add_newspaper(paper)
+        paper.add_issue(Issue(id=1, name="Vol. 1", releasedate="2024-03-01T08:00:00"))
+        paper.get_issue(1).set_editor(agency.get_editor(5))
+    previous = Agency.singleton_instance
+    Agency.singleton_instance = second.agency
+    try:
+        with second.active():
+            client = create_app().test_client()
+            assert client.get("/newspaper/100/issue").get_json()[0]["released"] is False
+            with first.active() as agency:
+                agency.get_newspaper(100).release_issue(1)
+
+            assert client.get("/newspaper/100/issue").get_json()[0]["released"] is True
+            issues = client.get("/editor/5/issues?released=true").get_json()
+            assert [issue["id"] for issue in issues] == [1]
+    finally:
+        Agency.singleton_instance = previous
+
+
+def test_open_shared_storage(tmp_path):
+    storage = open_storage(f"sqlite+shared://{tmp_path}/shared.db")
+    assert isinstance(storage, SharedSQLiteStorage) and storage.shared
+    storage.pool.close()
@@ -0,0 +1,124 @@
+import pytest
+
+from ...src.model.agency import Agency
+from ...src.model.newspaper import Newspaper
+from ...src.model.issue import Issue
+from ...src.model.editor import Editor
+from ...src.model.subscriber import Subscriber
+from ...src.storage import FileStorage, SQLiteStorage, open_storage
+
+
+def fill(agency: Agency):
+    paper = Newspaper(paper_id=100, name="The New York Times", frequency=7, price=13.14)
+    agency.add_newspaper(paper)
+    paper.add_issue(Issue(id=100, name="Vol. 1", released=False, releasedate="2022-04-04T00:00:00"))
+    paper.add_issue(Issue(id=101, name="Vol. 2", released=False, releasedate="2022-04-11T00:00:00"))
+    paper.release_issue(100)
+    editor = Editor(id=100, name="William Shakespeare")
+    agency.add_editor(editor)
+    paper.get_issue(100).set_editor(editor)
+    for subscriber_id in (100, 101, 102):
+        subscriber = Subscriber(id=subscriber_id, name=f"Subscriber {subscriber_id}")
+        agency.add_subscriber(subscriber)
+        subscriber.subscribe(paper)
+    paper.get_issue(100).send_issue_to_all(paper.subscribers)
+    agency.remove_subscriber(agency.get_subscriber(102))
+    paper.update(name="NYT", frequency=7, price=14.0)
+
+
+def check(agency: Agency):
+    paper = agency.get_newspaper(100)
+    assert paper.name == "NYT"
+    assert paper.price == 14.0
+    assert [issue.id for issue in paper.get_issues()] == [100, 101]
+    assert paper.get_issue(100).released
+    assert paper.get_issue(100).editor_id == 100
+    assert agency.get_editor(100).get_issues() == [paper.get_issue(100)]
+    assert [subscriber.id for subscriber in paper.subscribers] == [100, 101]
+    assert agency.get_subscriber(102) is None
+    assert agency.get_subscriber(101).has_received(paper.get_issue(100))
+    assert len(paper.deliveries) == 2
+
+
+@pytest.fixture(params=["file", "sqlite"])
+def make_storage(request, tmp_path):
+    def make(**kwargs):
+        if request.param == "file":
+            return FileStorage(str(tmp_path / "data"), **kwargs)
+        return SQLiteStorage(str(tmp_path / "data.db"), **kwargs)
+    return make
+
+
+def test_recover_from_log(make_storage):
+    storage = make_storage()
+    agency = Agency()
+    agency.attach_storage(storage)
+    fill(agency)
+    storage.close()
+
+    recovered = Agency()
+    storage = make_storage()
+    recovered.attach_storage(storage)
+    storage.close()
+    check(recovered)
+
+
+def test_recover_from_snapshot_and_log(make_storage):
+    storage = make_storage(synchronous=False)
+    agency = Agency()
+    agency.attach_storage(storage)
+    fill(agency)
+    storage.flush()
+    storage.checkpoint()
+    agency.get_newspaper(100).add_issue(Issue(id=102, name="Vol. 3", releasedate="2022-04-18T00:00:00"))
+    storage.close()
+
+    recovered = Agency()
+    storage = make_storage()
+    recovered.attach_storage(storage)
+    storage.close()
+    assert recovered.get_newspaper(100).get_issue(102).name == "Vol. 3"
+    recovered.get_newspaper(100).issues.pop(102)
+    check(recovered)
+
+
+def test_id_sequences_are_shared_and_persisted(make_storage):
+    first, second = make_storage(), make_storage()
+    agency, other = Agency(), Agency()
+    agency.attach_storage(first)
+    other.attach_storage(second)
+    ids = [agency.ids.next_id("subscriber") for _ in range(150)]
+    ids += [other.ids.next_id("subscriber") for _ in range(150)]
+    ids += [agency.ids.next_id("subscriber") for _ in range(150)]
+    assert len(set(ids)) == 450
+    assert other.ids.next_id("editor") == 10000000
+    first.close()
+    second.close()
+
+    restarted = make_storage()
+    assert restarted.reserve_ids("subscriber", 10, 10000000) > max(ids)
+    restarted.close()
+
+
+class FailingStorage(FileStorage):
+    def _write_log(self, batch):
+        raise OSError("No space left on device")
+
+
+def test_synchronous_writes_fail_when_the_log_cannot_be_written(tmp_path):
+    storage = FailingStorage(str(tmp_path / "data"))
+    Agency().attach_storage(storage)
+    try:
+        with pytest.raises(IOError):
+            storage.append("editor_added", {"id": 1, "name": "Editor"})
+        with pytest.raises(IOError):
+            storage.flush()
+    finally:
+        storage.close()
+
+
+def test_open_storage(tmp_path):
+    assert isinstance(open_storage(f"sqlite://{tmp_path}/data.db"), SQLiteStorage)
+    assert isinstance(open_storage(f"file://{tmp_path}/data"), FileStorage)
+    with pytest.raises(ValueError):
+        open_storage("redis://localhost")